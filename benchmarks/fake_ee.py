@@ -0,0 +1,469 @@
+"""In-process stand-in for the `ee` package, for offline benchmarks.
+
+Only the surface the pipeline touches is implemented. Server-side objects are
+evaluated eagerly on the client, but every call that would be a network
+round-trip in the real API (getInfo, Task.start, Task.list, getMapId, tile
+fetches) goes through FakeBackend.round_trip, which counts it, sleeps for the
+configured latency and can inject failures.
+
+    backend = fake_ee.install(latency=0.05)
+    from modules import parse          # imports the fake as `ee`
+    ...
+    backend.calls                      # {'getInfo': 12, 'Task.start': 3, ...}
+"""
+import sys
+import json
+import time
+import types
+import random
+import calendar
+import threading
+import itertools
+from datetime import datetime, timedelta, timezone
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+class EEException(Exception):
+    pass
+
+
+class FakeBackend:
+    '''Latency, failure injection, round-trip counters and a synthetic scene catalog.
+
+    Parameters:
+        latency: seconds slept per round-trip
+        failure_rate: probability a round-trip raises EEException
+        revisit_days: days between scenes in every synthetic collection
+        task_seconds: time an export task takes to complete
+        seed: seed for cloud cover and failure draws
+    '''
+
+    def __init__(self, latency=0.05, failure_rate=0.0, revisit_days=8, task_seconds=0.05, seed=0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.revisit_days = revisit_days
+        self.task_seconds = task_seconds
+        self.random = random.Random(seed)
+        self.calls = {}
+        self.tasks = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def round_trip(self, kind):
+        with self._lock:
+            self.calls[kind] = self.calls.get(kind, 0) + 1
+            fail = self.random.random() < self.failure_rate
+        time.sleep(self.latency)
+        if fail:
+            raise EEException(f"Injected failure in {kind}")
+
+    def reset(self):
+        self.calls.clear()
+        self.tasks.clear()
+
+    @property
+    def round_trips(self):
+        return sum(self.calls.values())
+
+    def scenes(self, collection_id, start_ms, end_ms):
+        # Deterministic scenes every revisit_days, cloud cover derived from the scene index
+        step = self.revisit_days * 86400000
+        first = -(-start_ms // step)
+        cloud_key = 'CLOUDY_PIXEL_PERCENTAGE' if 'COPERNICUS' in collection_id else 'CLOUD_COVER'
+        for k in range(first, (end_ms - 1) // step + 1):
+            # Footprints cycle over a 2x2 grid of 1-degree tiles
+            x, y = -98.0 + k % 2, 30.0 + k // 2 % 2
+            yield {
+                'system:index': f'{collection_id.rsplit("/", 1)[-1]}_{k}',
+                'system:time_start': k * step,
+                'system:footprint': {'type': 'Polygon', 'coordinates': [
+                    [[x, y], [x + 1, y], [x + 1, y + 1], [x, y + 1], [x, y]]]},
+                cloud_key: (k * 37 + len(collection_id)) % 100 / 2.0,
+            }
+
+    def next_id(self):
+        return f'FAKE{next(self._ids):06d}'
+
+
+BACKEND = FakeBackend()
+
+
+def resolve(value):
+    '''Client-side value of a fake object (what getInfo would return).'''
+    if hasattr(value, '_info'):
+        return value._info()
+    if isinstance(value, dict):
+        return {k: resolve(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [resolve(v) for v in value]
+    return value
+
+
+class ComputedObject:
+    def getInfo(self):
+        BACKEND.round_trip('getInfo')
+        return resolve(self)
+
+    def serialize(self, *args, **kwargs):
+        return json.dumps({'type': type(self).__name__, 'id': id(self)})
+
+
+class Value(ComputedObject):
+    def __init__(self, value):
+        self._v = resolve(value)
+
+    def _info(self):
+        return self._v
+
+    def _op(fn):
+        return lambda self, other=None: Value(fn(self._v, resolve(other)))
+
+    add = _op(lambda a, b: a + b)
+    subtract = _op(lambda a, b: a - b)
+    multiply = _op(lambda a, b: a * b)
+    divide = _op(lambda a, b: a / b)
+    gt = _op(lambda a, b: a > b)
+    lt = _op(lambda a, b: a < b)
+    eq = _op(lambda a, b: a == b)
+    ceil = _op(lambda a, b: -(-a // 1))
+    contains = _op(lambda a, b: b in a)
+    del _op
+
+Number = String = Value
+
+
+class List(Value):
+    @staticmethod
+    def sequence(start, end, step=1):
+        return List(list(range(int(resolve(start)), int(resolve(end)) + 1, int(step))))
+
+    def map(self, fn):
+        return List([fn(Value(v)) for v in self._v])
+
+
+class Dictionary(ComputedObject):
+    def __init__(self, values=None):
+        self._values = dict(values or {})
+
+    def _info(self):
+        return {k: resolve(v) for k, v in self._values.items()}
+
+
+def _to_ms(value):
+    if isinstance(value, Date):
+        return value.ms
+    if isinstance(value, Value):
+        value = value._v
+    if isinstance(value, str):
+        dt = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return int((dt - EPOCH).total_seconds() * 1000)
+    return int(value)
+
+_FORMAT_TOKENS = [("'T'", 'T'), ("'Z'", 'Z'), ('YYYY', '%Y'), ('MM', '%m'), ('dd', '%d'),
+                  ('HH', '%H'), ('mm', '%M'), ('ss', '%S'), ('SSS', '{ms}')]
+
+class Date(ComputedObject):
+    def __init__(self, value):
+        self.ms = value.ms if isinstance(value, Date) else _to_ms(value)
+
+    def _info(self):
+        return {'type': 'Date', 'value': self.ms}
+
+    @property
+    def dt(self):
+        return EPOCH + timedelta(milliseconds=self.ms)
+
+    def millis(self):
+        return Value(self.ms)
+
+    def advance(self, delta, unit):
+        delta, dt = resolve(delta), self.dt
+        if unit in ('month', 'year'):
+            months = int(delta) * (12 if unit == 'year' else 1)
+            index = dt.month - 1 + months
+            year, month = dt.year + index // 12, index % 12 + 1
+            dt = dt.replace(year=year, month=month, day=min(dt.day, calendar.monthrange(year, month)[1]))
+        else:
+            dt = dt + timedelta(**{unit + 's': delta})
+        return Date(int((dt - EPOCH).total_seconds() * 1000))
+
+    def difference(self, other, unit):
+        days = (self.ms - Date(other).ms) / 86400000
+        scale = {'day': 1, 'week': 7, 'month': 30.4375, 'year': 365.25}[unit]
+        return Value(days / scale)
+
+    def format(self, pattern=None):
+        pattern = pattern or "YYYY-MM-dd'T'HH:mm:ss"
+        for token, repl in _FORMAT_TOKENS:
+            pattern = pattern.replace(token, repl)
+        return Value(self.dt.strftime(pattern).replace('{ms}', f'{self.ms % 1000:03d}'))
+
+
+class Geometry(ComputedObject):
+    def __init__(self, coordinates=None, proj=None, geodesic=None):
+        self.type = 'Polygon'
+        if isinstance(coordinates, dict):  # GeoJSON
+            self.type, coordinates = coordinates['type'], coordinates['coordinates']
+        self.coordinates = coordinates or [[[-97.0, 30.0], [-96.0, 30.0], [-96.0, 31.0],
+                                            [-97.0, 31.0], [-97.0, 30.0]]]
+
+    def bounds(self, *args, **kwargs):
+        return self
+
+    def _info(self):
+        return {'type': self.type, 'coordinates': self.coordinates}
+
+
+class Image(ComputedObject):
+    '''Pixel math is a no-op that returns the image; only properties are modeled.'''
+
+    _graphs = itertools.count(1)
+
+    def __init__(self, value=None, properties=None):
+        self.properties = dict(properties or (value.properties if isinstance(value, Image) else {}))
+        # ee.Image(img) wraps the same expression, so it serializes identically
+        self.graph = value.graph if isinstance(value, Image) else next(Image._graphs)
+
+    def _info(self):
+        return {'type': 'Image', 'properties': resolve(self.properties)}
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return lambda *args, **kwargs: self
+
+    def get(self, name):
+        return Value(self.properties.get(name))
+
+    def geometry(self, *args, **kwargs):
+        return Geometry(self.properties.get('system:footprint'))
+
+    def propertyNames(self):
+        return List(list(self.properties))
+
+    def set(self, *args):
+        props = args[0] if len(args) == 1 else {args[0]: args[1]}
+        return Image(properties={**self.properties, **props})
+
+    def serialize(self, *args, **kwargs):
+        return json.dumps({'type': 'Image', 'graph': self.graph, 'properties': resolve(self.properties)},
+                          sort_keys=True, default=str)
+
+    def getMapId(self, vis_params=None):
+        BACKEND.round_trip('getMapId')
+        return {'mapid': BACKEND.next_id(), 'tile_fetcher': _TileFetcher()}
+
+    @staticmethod
+    def cat(*images):
+        return Image()
+
+
+class _TileFetcher:
+    def fetch_tile(self, x, y, z):
+        BACKEND.round_trip('getTile')
+        return b'\x89PNG\r\n\x1a\n' + f'{z}/{x}/{y}'.encode()
+
+
+class Feature(ComputedObject):
+    def __init__(self, geometry, properties=None):
+        self.geometry_ = geometry
+        self.properties = dict(properties or {})
+
+    def _info(self):
+        return {'type': 'Feature', 'geometry': resolve(self.geometry_),
+                'properties': resolve(self.properties)}
+
+    def geometry(self):
+        return self.geometry_ or Geometry()
+
+    def setGeometry(self, geometry):
+        return Feature(geometry, self.properties)
+
+    def set(self, *args):
+        props = args[0] if len(args) == 1 else {args[0]: args[1]}
+        return Feature(self.geometry_, {**self.properties, **props})
+
+
+class Filter:
+    def __init__(self, test):
+        self.test = test
+
+    @staticmethod
+    def eq(name, value):
+        return Filter(lambda p: p.get(name) == value)
+
+    @staticmethod
+    def gt(name, value):
+        return Filter(lambda p: (p.get(name) or 0) > value)
+
+    @staticmethod
+    def inList(name, values):
+        values = set(resolve(values))
+        return Filter(lambda p: p.get(name) in values)
+
+    @staticmethod
+    def stringContains(name, value):
+        return Filter(lambda p: value in str(p.get(name, '')))
+
+
+class ImageCollection(ComputedObject):
+    '''A catalog query (id, date range, metadata filters) plus deferred map functions.'''
+
+    DEFAULT_RANGE = ('2013-01-01', '2026-01-01')
+
+    def __init__(self, source=None, start=None, end=None, filters=(), fns=()):
+        if isinstance(source, ImageCollection):
+            source, start, end = source.source, source.start, source.end
+            filters, fns = source.filters + tuple(filters), source.fns + tuple(fns)
+        self.source = source
+        self.start, self.end = start, end
+        self.filters, self.fns = tuple(filters), tuple(fns)
+
+    def _copy(self, **changes):
+        state = dict(source=self.source, start=self.start, end=self.end,
+                     filters=self.filters, fns=self.fns)
+        state.update(changes)
+        return ImageCollection(**state)
+
+    def _images(self):
+        if isinstance(self.source, tuple):  # merge() of several collections
+            parts = [p if self.start is None else p.filterDate(self.start, self.end) for p in self.source]
+            images = [i for p in parts for i in p._images() if all(f(i.properties) for f in self.filters)]
+        elif isinstance(self.source, list):
+            images = [i for i in self.source if all(f(i.properties) for f in self.filters)]
+        else:
+            start = self.start if self.start is not None else _to_ms(self.DEFAULT_RANGE[0])
+            end = self.end if self.end is not None else _to_ms(self.DEFAULT_RANGE[1])
+            images = [Image(properties=p) for p in BACKEND.scenes(str(self.source), start, end)
+                      if all(f(p) for f in self.filters)]
+        for fn in self.fns:
+            images = [fn(i) for i in images]
+        return images
+
+    @staticmethod
+    def fromImages(images):
+        return ImageCollection(list(resolve(images)) if not isinstance(images, list) else images)
+
+    def filterDate(self, start, end=None):
+        start = _to_ms(start)
+        end = _to_ms(end) if end is not None else start + 86400000
+        lo = start if self.start is None else max(self.start, start)
+        hi = end if self.end is None else min(self.end, end)
+        return self._copy(start=lo, end=hi)
+
+    def merge(self, other):
+        return ImageCollection((self, other))
+
+    def filterBounds(self, geometry):
+        return self  # every synthetic scene covers the AOI
+
+    def filterMetadata(self, name, operator, value):
+        ops = {'less_than': lambda a: a is not None and a < value,
+               'greater_than': lambda a: a is not None and a > value,
+               'equals': lambda a: a == value}
+        return self._copy(filters=self.filters + (lambda p: ops[operator](p.get(name)),))
+
+    def filter(self, flt):
+        return self._copy(filters=self.filters + (flt.test,))
+
+    def map(self, fn):
+        return self._copy(fns=self.fns + (fn,))
+
+    def size(self):
+        return Value(len(self._images()))
+
+    def toList(self, count, offset=0):
+        return List(self._images()[offset:offset + count])
+
+    def _info(self):
+        images = self._images()
+        kind = 'FeatureCollection' if images and isinstance(images[0], Feature) else 'ImageCollection'
+        key = 'features'
+        return {'type': kind, key: [resolve(i) for i in images]}
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return lambda *args, **kwargs: Image()  # median(), mean(), reduce(), ...
+
+
+class FeatureCollection(ComputedObject):
+    def __init__(self, source=None):
+        self.source = source
+
+    def geometry(self, *args, **kwargs):
+        return Geometry()
+
+    def serialize(self, *args, **kwargs):
+        return json.dumps({'type': 'FeatureCollection', 'source': str(self.source)})
+
+    def size(self):
+        return Value(len(self.source) if isinstance(self.source, list) else 1)
+
+    def _info(self):
+        features = self.source if isinstance(self.source, list) else []
+        return {'type': 'FeatureCollection', 'features': [resolve(f) for f in features]}
+
+
+class Algorithms:
+    @staticmethod
+    def If(condition, true_case, false_case):
+        return true_case if resolve(condition) else false_case
+
+
+class Array:
+    def __init__(self, values):
+        self.values = values
+
+
+class Reducer:
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+for _name in ('mean', 'median', 'count', 'percentile', 'minMax'):
+    setattr(Reducer, _name, staticmethod(lambda *args, **kwargs: Reducer()))
+
+
+class _Task:
+    def __init__(self, config):
+        self.config = config
+        self.id = None
+        self.state = 'UNSUBMITTED'
+
+    def start(self):
+        BACKEND.round_trip('Task.start')
+        self.id = BACKEND.next_id()
+        BACKEND.tasks[self.id] = (self, time.monotonic())
+
+    @staticmethod
+    def list():
+        BACKEND.round_trip('Task.list')
+        now = time.monotonic()
+        for task, started in BACKEND.tasks.values():
+            if task.state in ('UNSUBMITTED', 'READY', 'RUNNING'):
+                task.state = 'COMPLETED' if now - started >= BACKEND.task_seconds else 'RUNNING'
+        return [task for task, _ in BACKEND.tasks.values()]
+
+
+def _export(**config):
+    return _Task(config)
+
+
+def install(**backend_options):
+    '''Register this module as `ee` and return its (reconfigured) backend.'''
+    global BACKEND
+    BACKEND = FakeBackend(**backend_options)
+    module = sys.modules[__name__]
+    module.batch = types.SimpleNamespace(
+        Task=_Task,
+        Export=types.SimpleNamespace(image=types.SimpleNamespace(toDrive=_export, toAsset=_export),
+                                     table=types.SimpleNamespace(toDrive=_export)),
+    )
+    module.data = types.SimpleNamespace()
+    module.Reducer = Reducer()
+    module.Initialize = module.Authenticate = lambda *args, **kwargs: None
+    sys.modules['ee'] = module
+    return BACKEND
@@ -0,0 +1,266 @@
+"""Local fake of the Planet Orders and Data APIs, for offline benchmarks.
+
+FakePlanetServer runs a threaded HTTP server on localhost with configurable
+latency and failure injection (429 with Retry-After, or 500). Orders move
+queued -> running -> success over `fulfil_seconds`.
+
+    with FakePlanetServer(latency=0.02) as server:
+        preflight = SRPreflight(api_key='x', base_url=server.data_url)
+        results, failures = asyncio.run(main.submit_month_orders(
+            orders, 'analytic_sr_udm2', delivery,
+            client_factory=orders_client_factory(server.orders_url), preflight=preflight))
+        server.requests     # {'orders.create': 12, 'data.assets': 600, ...}
+"""
+import json
+import time
+import zlib
+import random
+import asyncio
+import threading
+import contextlib
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TERMINAL = ('success', 'partial', 'failed', 'cancelled')
+
+
+class FakePlanetServer:
+    '''Parameters:
+        latency: seconds added to every request
+        failure_rate: probability a request is answered with an injected error
+        rate_limit_share: fraction of injected errors that are 429 (the rest are 500)
+        inaccessible_rate: fraction of item IDs without SR download permission
+        fulfil_seconds: time from order creation to success
+        lost_create_rate: fraction of order creations that succeed but are answered with a 500
+    '''
+
+    def __init__(self, latency=0.02, failure_rate=0.0, rate_limit_share=0.8, inaccessible_rate=0.05,
+                 fulfil_seconds=0.2, seed=0, lost_create_rate=0.0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.rate_limit_share = rate_limit_share
+        self.inaccessible_rate = inaccessible_rate
+        self.fulfil_seconds = fulfil_seconds
+        self.lost_create_rate = lost_create_rate
+        self.random = random.Random(seed)
+        self.requests = {}
+        self.orders = {}
+        self._lock = threading.Lock()
+        self._httpd = None
+
+    # -- state ---------------------------------------------------------------
+
+    def accessible(self, item_id):
+        return (zlib.crc32(item_id.encode()) % 10000) / 10000 >= self.inaccessible_rate
+
+    def order_state(self, order):
+        elapsed = time.monotonic() - order['_created']
+        if elapsed >= self.fulfil_seconds:
+            return 'success'
+        return 'running' if elapsed >= self.fulfil_seconds / 2 else 'queued'
+
+    def order_view(self, order):
+        view = {k: v for k, v in order.items() if not k.startswith('_')}
+        view['state'] = self.order_state(order)
+        return view
+
+    def count(self, route):
+        with self._lock:
+            self.requests[route] = self.requests.get(route, 0) + 1
+            return self.random.random() < self.failure_rate, self.random.random() < self.rate_limit_share
+
+    # -- server --------------------------------------------------------------
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    @property
+    def orders_url(self):
+        return f'{self.url}/compute/ops/orders/v2'
+
+    @property
+    def data_url(self):
+        return f'{self.url}/data/v1'
+
+    def start(self):
+        server_class = type('Server', (ThreadingHTTPServer,), {'request_queue_size': 1024})
+        # The default listen backlog of 5 drops connections under concurrent preflight bursts
+        self._httpd = server_class(('127.0.0.1', 0), _handler(self))
+        self._httpd.daemon_threads = True
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def _handler(server):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, body=None, headers=None):
+            payload = json.dumps(body if body is not None else {}).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _inject(self, route):
+            fail, rate_limited = server.count(route)
+            time.sleep(server.latency)
+            if not fail:
+                return False
+            if rate_limited:
+                self._send(429, {'message': 'Too Many Requests'}, {'Retry-After': '0.05'})
+            else:
+                self._send(500, {'message': 'Injected server error'})
+            return True
+
+        def do_GET(self):
+            path = self.path.split('?')[0].rstrip('/')
+            parts = path.strip('/').split('/')
+            if path.startswith('/data/v1/item-types/') and parts[-1] == 'assets':
+                if self._inject('data.assets'):
+                    return
+                permissions = ['download'] if server.accessible(parts[-2]) else []
+                return self._send(200, {'ortho_analytic_4b_sr': {'_permissions': permissions}})
+            if path == '/compute/ops/orders/v2':
+                if self._inject('orders.list'):
+                    return
+                with server._lock:
+                    orders = [server.order_view(o) for o in server.orders.values()]
+                return self._send(200, {'orders': orders, '_links': {}})
+            if path.startswith('/compute/ops/orders/v2/'):
+                if self._inject('orders.get'):
+                    return
+                order = server.orders.get(parts[-1])
+                if order is None:
+                    return self._send(404, {'message': 'Not found'})
+                return self._send(200, server.order_view(order))
+            self._send(404, {'message': 'Not found'})
+
+        def do_POST(self):
+            if self.path.rstrip('/') != '/compute/ops/orders/v2':
+                return self._send(404, {'message': 'Not found'})
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            if self._inject('orders.create'):
+                return
+            item_ids = [i for p in body.get('products', []) for i in p.get('item_ids', [])]
+            bad = [i for i in item_ids if not server.accessible(i)]
+            if bad:
+                return self._send(400, {'field': {'Details': [
+                    {'message': f'no access to assets: PSScene/{i}/[ortho_analytic_4b_sr]'} for i in bad
+                ]}})
+            with server._lock:
+                order_id = f'order-{len(server.orders) + 1:05d}'
+                server.orders[order_id] = {'id': order_id, 'name': body.get('name'),
+                                           'products': body.get('products'), '_created': time.monotonic(),
+                                           'created_on': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())}
+                view = server.order_view(server.orders[order_id])
+                lost = server.random.random() < server.lost_create_rate
+            if lost:
+                return self._send(500, {'message': 'Injected error after the order was created'})
+            self._send(202, view)
+
+    return Handler
+
+
+def offline_specs(bundle='analytic_sr_udm2', item_type='PSScene'):
+    '''Seed planet.specs so order_request validation works without api.planet.com.
+
+    planet 3.x fetches the bundles spec from the API on first use; 2.x ships it
+    with the package, in which case this is a no-op.
+    '''
+    from planet import specs
+    loader = specs.PRODUCT_BUNDLES
+    if not hasattr(loader, '__getitem__') or isinstance(loader, dict) or getattr(loader, 'cache', None):
+        return
+    loader.cache = {
+        'bundles': {bundle: {'assets': {item_type: ['ortho_analytic_4b_sr', 'ortho_udm2']}}},
+        'bundle_names': [bundle],
+        'item_types': {item_type},
+    }
+
+
+class APIError(Exception):
+    '''Mirrors planet.exceptions: raised from the response text alone, no .response or headers.'''
+
+class TooManyRequests(APIError):
+    pass
+
+class ServerError(APIError):
+    pass
+
+class BadGateway(APIError):
+    pass
+
+ERRORS = {429: TooManyRequests, 500: ServerError, 502: BadGateway}
+
+
+class FakeOrdersClient:
+    '''Orders client with the create_order / get_order / wait / list_orders surface main.py uses.'''
+
+    def __init__(self, base_url, poll_interval=0.05):
+        self.base_url = base_url.rstrip('/')
+        self.poll_interval = poll_interval
+
+    def _request(self, method, url, body=None):
+        data = json.dumps(body).encode() if body is not None else None
+        req = urllib.request.Request(url, data=data, method=method,
+                                     headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(req) as r:
+                return json.loads(r.read() or b'{}')
+        except urllib.error.HTTPError as e:
+            raise ERRORS.get(e.code, APIError)(e.read().decode()) from None
+
+    async def create_order(self, request):
+        return await asyncio.to_thread(self._request, 'POST', self.base_url, request)
+
+    async def get_order(self, order_id):
+        return await asyncio.to_thread(self._request, 'GET', f'{self.base_url}/{order_id}')
+
+    async def list_orders(self, state=None, limit=100, name=None, **filters):
+        # Other filters (e.g. last_modified) are accepted and ignored; the server returns every order
+        page = await asyncio.to_thread(self._request, 'GET', self.base_url)
+        for order in page['orders'][:limit or None]:
+            if (state is None or order['state'] == state) and (name is None or order['name'] == name):
+                yield order
+
+    async def wait(self, order_id, state=None, delay=None, max_attempts=200, callback=None):
+        last, attempts = None, 0
+        while True:
+            current = (await self.get_order(order_id))['state']
+            if current != last and callback is not None:
+                callback(current)
+            last = current
+            if current in TERMINAL or current == state:
+                return current
+            attempts += 1
+            if max_attempts and attempts >= max_attempts:
+                raise TimeoutError(f'{order_id} still {current}')
+            await asyncio.sleep(delay if delay is not None else self.poll_interval)
+
+
+def orders_client_factory(base_url, poll_interval=0.05):
+    '''client_factory for main.submit_month_orders that talks to a FakePlanetServer.'''
+    @contextlib.asynccontextmanager
+    async def factory():
+        yield FakeOrdersClient(base_url, poll_interval)
+    return factory
@@ -0,0 +1,73 @@
+"""Cold-import budget check for every module in modules/.
+
+Each module is imported in a fresh interpreter so nothing is cached from an
+earlier import. Exits non-zero if any module is slower than its budget.
+
+    python benchmarks/import_time.py [--scale 1.5] [--repeat 3]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Seconds per module; `import ee` alone accounts for most of these. Modules in modules/
+# without an entry get DEFAULT_BUDGET, so new modules are checked as soon as they exist.
+DEFAULT_BUDGET = 1.0
+BUDGETS = {
+    'modules': 0.05,
+    'modules.main': 1.2,
+    'modules.ledger': 0.2,
+    'modules._lazy': 0.05,
+    'modules.cache': 0.1,
+    'modules.store': 0.1,      # pyarrow is imported on first use
+    'modules.items': 0.5,      # numpy; shapely is imported on first use
+    'modules.coverage': 0.5,
+    'modules.local': 1.5,
+    'modules.compositor': 1.5,
+}
+
+
+def budgets():
+    '''Budget for the package and every module in it, explicit entries first.'''
+    names = sorted(f'modules.{f[:-3]}' for f in os.listdir(os.path.join(ROOT, 'modules'))
+                   if f.endswith('.py') and f != '__init__.py')
+    return {**BUDGETS, **{n: DEFAULT_BUDGET for n in names if n not in BUDGETS}}
+
+SNIPPET = "import time; t = time.perf_counter(); import {0}; print(time.perf_counter() - t)"
+
+
+def cold_import(module, repeat):
+    times = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, '-c', SNIPPET.format(module)], cwd=ROOT,
+                             capture_output=True, text=True)
+        if out.returncode != 0:
+            raise RuntimeError(f"import {module} failed:\n{out.stderr}")
+        times.append(float(out.stdout.strip().splitlines()[-1]))
+    return min(times)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', type=float, default=1.0, help='multiply every budget (slow CI hosts)')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per module; the fastest counts')
+    args = parser.parse_args(argv)
+
+    failed = []
+    for module, budget in budgets().items():
+        seconds = cold_import(module, args.repeat)
+        limit = budget * args.scale
+        status = 'ok' if seconds <= limit else 'OVER'
+        print(f"{module:<22} {seconds * 1000:8.1f} ms  (budget {limit * 1000:.0f} ms)  {status}")
+        if seconds > limit:
+            failed.append(module)
+    if failed:
+        print(f"{len(failed)} module(s) over budget: {', '.join(failed)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
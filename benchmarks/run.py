@@ -0,0 +1,288 @@
+"""Offline benchmark suite: round-trips and wall time against fake EE/Planet backends.
+
+    python benchmarks/run.py --out results.json [--latency 0.05] [--quick]
+    python benchmarks/run.py --compare before.json after.json [--tolerance 0.2]
+
+Scenarios scale the number of periods, scenes, AOIs and months; every result
+is keyed by scenario name and parameters so two result files can be compared.
+The Planet scenario needs the planet SDK (for order_request) and httpx; it is
+skipped, and reported as skipped, when they are not installed.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import functools
+import platform
+import contextlib
+import io
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.dirname(HERE))
+
+import fake_ee  # noqa: E402  (must be installed as `ee` before modules is imported)
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        value = fn()
+    return time.perf_counter() - start, value
+
+
+def bench_retrieve(backend, periods_list, scenes_per_period):
+    from modules import parse
+    from modules.cache import DiskCache
+    aoi = fake_ee.FeatureCollection('aoi')
+    backend.revisit_days = max(1, 30 // scenes_per_period)
+    results = []
+    for periods in periods_list:
+        end = f'{2000 + periods // 12}-{periods % 12 + 1:02d}-01'
+        for batched in (False, True):
+            backend.reset()
+            seconds, _ = _timed(lambda: parse.retrieveImagery(
+                'L8', '2000-01-01', end, 'M', aoi, None, batched=batched, cache=False))
+            results.append({'name': 'parse.retrieveImagery',
+                            'params': {'periods': periods, 'scenes_per_period': scenes_per_period,
+                                       'batched': batched},
+                            'wall_s': seconds, 'round_trips': backend.round_trips})
+        # Rerun against a warm disk cache (periods are in the past, so all hits)
+        store = DiskCache(':memory:')
+        _timed(lambda: parse.retrieveImagery('L8', '2000-01-01', end, 'M', aoi, None, cache=store))
+        backend.reset()
+        seconds, _ = _timed(lambda: parse.retrieveImagery('L8', '2000-01-01', end, 'M', aoi, None, cache=store))
+        results.append({'name': 'parse.retrieveImagery.cached',
+                        'params': {'periods': periods, 'scenes_per_period': scenes_per_period},
+                        'wall_s': seconds, 'round_trips': backend.round_trips})
+    return results
+
+
+def bench_multisensor(backend, sensor_sets, periods=12):
+    from modules import parse
+    aoi = fake_ee.FeatureCollection('aoi')
+    end = f'{2015 + periods // 12}-{periods % 12 + 1:02d}-01'
+    results = []
+    for sensors in sensor_sets:
+        backend.reset()
+        seconds, _ = _timed(lambda: [parse.retrieveImagery(s, '2015-01-01', end, 'M', aoi, None, cache=False)
+                                     for s in sensors])
+        results.append({'name': 'parse.retrieveImagery.sequential',
+                        'params': {'sensors': len(sensors), 'periods': periods},
+                        'wall_s': seconds, 'round_trips': backend.round_trips})
+        backend.reset()
+        seconds, _ = _timed(lambda: parse.retrieveMultiSensor(sensors, '2015-01-01', end, 'M', aoi, cache=False))
+        results.append({'name': 'parse.retrieveMultiSensor',
+                        'params': {'sensors': len(sensors), 'periods': periods},
+                        'wall_s': seconds, 'round_trips': backend.round_trips})
+    return results
+
+
+def bench_batch(backend, aoi_counts, periods=12):
+    try:
+        from shapely.geometry import box
+    except ImportError as e:
+        return [{'name': 'batch.retrieveBatch', 'params': {}, 'skipped': str(e)}]
+    from modules import parse, batch
+    end = f'{2015 + periods // 12}-{periods % 12 + 1:02d}-01'
+    results = []
+    for n in aoi_counts:
+        aois = [(f'aoi{i}', box(-98 + 2 * (i % 97) / 97, 30 + 2 * (i % 89) / 89,
+                                -97.99 + 2 * (i % 97) / 97, 30.01 + 2 * (i % 89) / 89)) for i in range(n)]
+        backend.reset()
+        seconds, _ = _timed(lambda: [parse.retrieveImagery('L8', '2015-01-01', end, 'M',
+                                                           fake_ee.FeatureCollection(a), None, cache=False)
+                                     for a, _ in aois])
+        results.append({'name': 'parse.retrieveImagery.per_aoi', 'params': {'aois': n, 'periods': periods},
+                        'wall_s': seconds, 'round_trips': backend.round_trips})
+        backend.reset()
+        seconds, _ = _timed(lambda: batch.retrieveBatch('L8', aois, '2015-01-01', end, 'M'))
+        results.append({'name': 'batch.retrieveBatch', 'params': {'aois': n, 'periods': periods},
+                        'wall_s': seconds, 'round_trips': backend.round_trips})
+    return results
+
+
+def bench_collection(backend, periods_list):
+    from modules import main, parse, cloudmask
+    results = []
+    for periods in periods_list:
+        SRDict = {f'{2000 + i // 12}_{i % 12 + 1:02d}': parse.getCollection('L8', 'SR') for i in range(periods)}
+        backend.reset()
+        seconds, _ = _timed(lambda: asyncio.run(main.collection(
+            'L8', None, None, 'M', None, None, SRDict, {}, {},
+            cloudmask.sr)))
+        results.append({'name': 'main.collection', 'params': {'periods': periods},
+                        'wall_s': seconds, 'round_trips': backend.round_trips})
+    return results
+
+
+def bench_export(backend, aoi_counts):
+    from modules import exportto
+    results = []
+    for n in aoi_counts:
+        aois = [fake_ee.FeatureCollection(f'aoi{i}') for i in range(n)]
+        backend.reset()
+        seconds, _ = _timed(lambda: [exportto.export_image(fake_ee.Image(), f'img{i}', 'bench', aoi)
+                                     for i, aoi in enumerate(aois)])
+        results.append({'name': 'exportto.export_image', 'params': {'aois': n},
+                        'wall_s': seconds, 'round_trips': backend.round_trips})
+        backend.reset()
+        jobs = [(fake_ee.Image(), f'img{i}') for i in range(n)]
+        seconds, _ = _timed(lambda: exportto.export_images(
+            jobs, 'bench', aois[0], poll_interval=backend.task_seconds, max_poll_interval=1))
+        results.append({'name': 'exportto.export_images', 'params': {'jobs': n},
+                        'wall_s': seconds, 'round_trips': backend.round_trips})
+    return results
+
+
+def bench_preview(backend, grid_sizes, zoom=10):
+    import tempfile
+    from modules import preview
+    from modules.cache import DiskCache
+    image = fake_ee.ImageCollection('PS').median()
+    vis = {'bands': ['NDVI'], 'min': 0, 'max': 0.85}
+
+    def render(tiles, cache):
+        layer = preview.PreviewLayer(image, vis, level=12, cache=cache)
+        return [layer.tile(*t) for t in tiles]
+
+    results = []
+    for size in grid_sizes:
+        tiles = [(zoom, x, y) for x in range(size) for y in range(size)]
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = DiskCache(os.path.join(tmp, 'tiles.sqlite'))
+            # 'rerun' is the same map cell run again: a fresh layer over the same expression
+            for run in ('cold', 'rerun'):
+                backend.reset()
+                seconds, _ = _timed(lambda: render(tiles, cache))
+                results.append({'name': 'preview.PreviewLayer', 'params': {'tiles': len(tiles), 'run': run},
+                                'wall_s': seconds, 'round_trips': backend.round_trips})
+            cache.close()
+    return results
+
+
+def bench_orders(month_counts, items_per_month, latency):
+    try:
+        import planet  # noqa: F401
+        import httpx  # noqa: F401
+    except ImportError as e:
+        return [{'name': 'main.submit_month_orders', 'params': {}, 'skipped': str(e)}]
+    from fake_planet import FakePlanetServer, offline_specs, orders_client_factory
+    from modules import main
+    from modules.preflight import SRPreflight
+
+    offline_specs()
+
+    delivery = planet.order_request.delivery(
+        cloud_config=planet.order_request.google_earth_engine(project='bench', collection='bench'))
+    # Both wait strategies poll at the fake client's interval so only request counts differ
+    poll_interval = 0.05
+    pollers = {'per_order': False,
+               'shared': functools.partial(main.OrderPoller, min_interval=poll_interval, max_interval=1.0)}
+    results = []
+    for months in month_counts:
+        orders = {f'2000-{m + 1:02d}': [f'2000{m:02d}_{i:05d}_PS2' for i in range(items_per_month)]
+                  for m in range(months)}
+        for wait, poller_factory in pollers.items():
+            with FakePlanetServer(latency=latency) as server:
+                preflight = SRPreflight(api_key='bench', base_url=server.data_url)
+                seconds, (done, failed) = _timed(lambda: asyncio.run(main.submit_month_orders(
+                    orders, 'analytic_sr_udm2', delivery, max_concurrency=8,
+                    client_factory=orders_client_factory(server.orders_url, poll_interval),
+                    preflight=preflight, poller_factory=poller_factory)))
+                results.append({'name': 'main.submit_month_orders',
+                                'params': {'months': months, 'items_per_month': items_per_month, 'wait': wait},
+                                'wall_s': seconds, 'round_trips': sum(server.requests.values()),
+                                'requests': dict(server.requests), 'failures': len(failed)})
+    return results
+
+
+def bench_index_math(sizes, repeat=3):
+    import numpy as np
+    from modules import local
+    rng = np.random.default_rng(0)
+    results = []
+    for size in sizes:
+        bands = {b: rng.integers(7000, 30000, (size, size), dtype=np.uint16)
+                 for b in ('SR_B2', 'SR_B3', 'SR_B4', 'SR_B5', 'SR_B6', 'SR_B7')}
+        bands['QA_PIXEL'] = rng.integers(0, 64, (size, size), dtype=np.uint16)
+        out = np.empty((6, size, size), dtype=np.float32)
+        best = min(_timed(lambda: local.compute(bands, 'L8', out=out))[0] for _ in range(repeat))
+        results.append({'name': 'local.compute', 'params': {'pixels': size * size},
+                        'wall_s': best, 'mpix_per_s': size * size / best / 1e6})
+    return results
+
+
+def run(args):
+    backend = fake_ee.install(latency=args.latency, failure_rate=args.failure_rate)
+    quick = args.quick
+    results = []
+    results += bench_retrieve(backend, [12, 60] if quick else [12, 60, 240], scenes_per_period=4)
+    results += bench_multisensor(backend, [('L8', 'S2'), ('L5', 'L7', 'L8', 'L9', 'S2')])
+    results += bench_batch(backend, [10, 100] if quick else [10, 100, 500])
+    results += bench_collection(backend, [12, 240] if quick else [12, 60, 240])
+    results += bench_export(backend, [2, 10] if quick else [2, 10, 50])
+    results += bench_preview(backend, [4, 8] if quick else [4, 8, 16])
+    results += bench_orders([3] if quick else [3, 12], 50 if quick else 200, args.planet_latency)
+    results += bench_index_math([256, 1024] if quick else [256, 1024, 2048])
+    return {
+        'meta': {'created': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': platform.python_version(),
+                 'platform': platform.platform(), 'latency': args.latency,
+                 'planet_latency': args.planet_latency, 'failure_rate': args.failure_rate},
+        'results': results,
+    }
+
+
+def _key(result):
+    return result['name'], json.dumps(result.get('params', {}), sort_keys=True)
+
+def compare(before_path, after_path, tolerance):
+    '''Print per-scenario ratios; return 1 if any wall time or round-trip count regressed.'''
+    with open(before_path) as f:
+        before = {_key(r): r for r in json.load(f)['results']}
+    with open(after_path) as f:
+        after = {_key(r): r for r in json.load(f)['results']}
+    regressed = False
+    for key in sorted(set(before) & set(after)):
+        b, a = before[key], after[key]
+        if 'wall_s' not in b or 'wall_s' not in a:
+            continue
+        ratio = a['wall_s'] / b['wall_s'] if b['wall_s'] else float('inf')
+        trips = (b.get('round_trips'), a.get('round_trips'))
+        flag = ''
+        if ratio > 1 + tolerance or (None not in trips and trips[1] > trips[0]):
+            flag, regressed = 'REGRESSED', True
+        print(f"{key[0]:<28} {key[1]:<60} {ratio:6.2f}x  trips {trips[0]} -> {trips[1]}  {flag}")
+    return 1 if regressed else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--out', default='bench_results.json')
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds per EE round-trip')
+    parser.add_argument('--planet-latency', type=float, default=0.02, help='seconds per Planet request')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='injected EE failure probability')
+    parser.add_argument('--quick', action='store_true', help='smaller scenario sizes')
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'))
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed wall-time slowdown')
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return compare(*args.compare, args.tolerance)
+    report = run(args)
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=2)
+    for r in report['results']:
+        if 'skipped' in r:
+            print(f"{r['name']:<28} skipped: {r['skipped']}")
+            continue
+        trips = f"{r['round_trips']:>6} trips" if 'round_trips' in r else ''
+        print(f"{r['name']:<28} {json.dumps(r['params']):<60} {r['wall_s']:8.3f} s {trips}")
+    print(f"Results written to {args.out}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,2 +1,20 @@
-from . import ndvi, cloudmask, main
-__all__ = ["ndvi", "cloudmask", "main"]
\ No newline at end of file
+import os
+import importlib
+
+# Submodules load on first access, so importing one (e.g. in a worker process)
+# doesn't import main's Planet stack or build any Earth Engine objects.
+__all__ = ["ndvi", "cloudmask", "main", "indices"]
+
+def __getattr__(name):
+    if name.startswith('_'):
+        raise AttributeError(name)
+    try:
+        return importlib.import_module(f'.{name}', __name__)
+    except ModuleNotFoundError as e:
+        if e.name != f'{__name__}.{name}':
+            raise
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+
+if os.environ.get('GEE_MULTITOOL_PROFILE'):
+    # Opt-in run-wide profiling; see modules/profiler.py
+    importlib.import_module('.profiler', __name__)
\ No newline at end of file
@@ -0,0 +1,24 @@
+import importlib
+
+## Deferred imports, so importing one module doesn't pull in every heavy dependency
+
+
+class LazyModule:
+    '''Stand-in for a module that is imported on first attribute access.'''
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+    def __repr__(self):
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy_import(name):
+    return LazyModule(name)
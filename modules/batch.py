@@ -0,0 +1,192 @@
+import bisect
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import ee
+
+from . import parse
+from .coverage import select_scenes
+from ._lazy import lazy_import
+
+shapely = lazy_import('shapely')
+gpd = lazy_import('geopandas')
+
+## Many-AOI retrieval: the catalog is filtered and its scene footprints fetched
+## once for all AOIs, then each AOI gets its scenes from a client-side STRtree.
+
+
+def load_aois(source, id_property='id', layer=None):
+    '''(aoi_id, shapely geometry in EPSG:4326) pairs.
+
+    Parameters:
+        source: an ee.FeatureCollection, or a path to any vector file geopandas reads (e.g. a GeoPackage)
+        id_property: property naming each AOI; falls back to the feature ID / row index
+        layer: layer to read from a multi-layer file
+    '''
+    if isinstance(source, ee.FeatureCollection):
+        features = source.getInfo()['features']
+        return [(str(f['properties'].get(id_property, f.get('id', i))), shapely.geometry.shape(f['geometry']))
+                for i, f in enumerate(features)]
+    frame = gpd.read_file(source, layer=layer).to_crs(4326)
+    ids = frame[id_property] if id_property in frame.columns else frame.index
+    return [(str(i), g) for i, g in zip(ids, frame.geometry)]
+
+def search_region(geometries):
+    # Union of the AOI envelopes: a small superset for filterBounds, refined locally by the STRtree
+    region = shapely.union_all([g.envelope for g in geometries])
+    return ee.Geometry(shapely.geometry.mapping(region), None, False)
+
+def extractFootprint(img):
+    # extractInfo plus what the client-side index needs: footprint, scene ID and time
+    return parse.extractInfo(img).setGeometry(img.geometry()).set({
+        'index': img.get('system:index'),
+        'time': img.get('system:time_start'),
+    })
+
+def scene_index(satellite, date_start, date_end, region, page_size=2000, cloud_max=None):
+    '''Footprints and cloud info of every scene over the region, fetched in pages.
+
+    Returns:
+        (scenes, footprints): property dicts and shapely geometries, in the same order
+    '''
+    ic = parse.filterPeriod(satellite, parse.getCollection(satellite, 'SR'), date_start, date_end, region,
+                            cloud_max)
+    features = ic.map(extractFootprint)
+    scenes, footprints, offset = [], [], 0
+    while True:
+        page = features.toList(page_size, offset).getInfo()
+        for f in page:
+            scenes.append(f['properties'])
+            footprints.append(shapely.geometry.shape(f['geometry']))
+        if len(page) < page_size:
+            return scenes, footprints
+        offset += page_size
+
+
+class SceneIndex:
+    '''Client-side STRtree over scene footprints, answering "which scenes, per period, cover this AOI".'''
+
+    def __init__(self, satellite, date_start, date_end, step, region, page_size=2000,
+                 cloud_max=None, cloud_prob=False):
+        self.satellite = satellite
+        self.periods = parse.periodBounds(date_start, date_end, step)
+        if not self.periods:
+            raise ValueError(f"no periods between {date_start} and {date_end}")
+        self.starts = [start for _, start, _ in self.periods]
+        first, last = self.periods[0][1], self.periods[-1][2]
+        self.scenes, self.footprints = scene_index(satellite, first, last, region, page_size, cloud_max)
+        self.tree = shapely.STRtree(self.footprints)
+        # Both collections are filtered once; per-AOI collections only add an ID filter
+        self.SRcollection = parse.filterPeriod(
+            satellite, parse.getCollection(satellite, 'SR'), first, last, region, cloud_max, cloud_prob)
+        self.TOAcollection = parse.filterPeriod(
+            satellite, parse.getCollection(satellite, 'TOA'), first, last, region, cloud_max, cloud_prob)
+
+    def period_of(self, millis):
+        i = bisect.bisect_right(self.starts, millis) - 1
+        if i < 0 or millis >= self.periods[i][2]:
+            return None
+        return self.periods[i][0]
+
+    def _grouped(self, geometry):
+        # Period key -> positions of the scenes intersecting the geometry
+        grouped = {key: [] for key, _, _ in self.periods}
+        for i in sorted(self.tree.query(geometry, predicate='intersects')):
+            key = self.period_of(self.scenes[i]['time'])
+            if key is not None:
+                grouped[key].append(i)
+        return grouped
+
+    def _dicts(self, grouped):
+        cloudDict, TOADict, SRDict = {}, {}, {}
+        for key, positions in grouped.items():
+            scenes = [self.scenes[i] for i in positions]
+            cloudDict[key] = parse.summarizeCloudInfo([{'properties': s} for s in scenes])
+            ids = ee.Filter.inList('system:index', [s['index'] for s in scenes])
+            SRDict[key] = self.SRcollection.filter(ids)
+            TOADict[key] = self.TOAcollection.filter(ids)
+        return cloudDict, TOADict, SRDict
+
+    def lookup(self, geometry):
+        '''retrieveImagery-shaped (cloudDict, TOADict, SRDict) for one AOI, without a server call.'''
+        return self._dicts(self._grouped(geometry))
+
+    def select(self, geometry, params=None):
+        '''lookup() restricted, per period, to the fewest scenes meeting the coverage target.
+
+        Parameters:
+            params: overrides of coverage.SCENE_PLAN_PARAMS
+
+        Each cloudDict entry also reports 'available' (intersecting scenes) and
+        'coverage' (fraction of grid cells given the required expected clear observations).
+        '''
+        grouped, stats = {}, {}
+        for key, positions in self._grouped(geometry).items():
+            chosen, fraction = select_scenes(
+                geometry, [self.footprints[i] for i in positions],
+                [self.scenes[i]['cloud_cover'] for i in positions], params)
+            grouped[key] = [positions[c] for c in chosen]
+            stats[key] = {'available': len(positions), 'coverage': round(fraction, 4)}
+        cloudDict, TOADict, SRDict = self._dicts(grouped)
+        for key, entry in cloudDict.items():
+            entry.update(stats[key])
+        return cloudDict, TOADict, SRDict
+
+
+def aoi_collection(aoi_id, geometry, id_property='id'):
+    return ee.FeatureCollection([ee.Feature(ee.Geometry(shapely.geometry.mapping(geometry)),
+                                            {id_property: aoi_id})])
+
+def retrieveBatch(satellite, aois, date_start, date_end, step, process=None, id_property='id',
+                  max_workers=8, page_size=2000, verbose=True, results_store=None, coverage=None):
+    '''retrieveImagery for many AOIs sharing one catalog query.
+
+    Parameters:
+        satellite: a Landsat key or 'S2'
+        aois: ee.FeatureCollection, vector file path, or list of (aoi_id, shapely geometry)
+        process: optional fn(aoi_id, aoi_fc, cloudDict, TOADict, SRDict) run per AOI in the
+            worker pool (e.g. building collections or starting exports); its return value
+            becomes the AOI's result
+        max_workers: AOIs processed at once
+        results_store: optional ResultsStore; each AOI's scenes are appended tagged with its ID
+        coverage: True or a dict of coverage.SCENE_PLAN_PARAMS overrides to keep only the
+            minimal covering scene set per period (see SceneIndex.select)
+
+    Returns:
+        (results, failures): aoi_id -> result (default: (cloudDict, TOADict, SRDict)),
+        and aoi_id -> exception for AOIs that failed; one failure does not stop the rest
+    '''
+    if not (satellite.startswith('L') or satellite == 'S2'):
+        raise ValueError(f"retrieveBatch supports Landsat and S2 only, got {satellite!r}")
+    if not isinstance(aois, (list, tuple)):
+        aois = load_aois(aois, id_property)
+    index = SceneIndex(satellite, date_start, date_end, step,
+                       search_region([g for _, g in aois]), page_size)
+    if verbose:
+        print(f"{len(index.scenes)} {satellite} scenes over {len(aois)} AOIs")
+
+    def run(aoi_id, geometry):
+        if coverage:
+            cloudDict, TOADict, SRDict = index.select(geometry, coverage if isinstance(coverage, dict) else None)
+        else:
+            cloudDict, TOADict, SRDict = index.lookup(geometry)
+        if results_store is not None:
+            results_store.add_cloud_info(cloudDict, satellite, aoi=str(aoi_id))
+        if process is None:
+            return cloudDict, TOADict, SRDict
+        return process(aoi_id, aoi_collection(aoi_id, geometry, id_property), cloudDict, TOADict, SRDict)
+
+    results, failures = {}, {}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(run, aoi_id, geometry): aoi_id for aoi_id, geometry in aois}
+        for done, future in enumerate(as_completed(futures), 1):
+            aoi_id = futures[future]
+            try:
+                results[aoi_id] = future.result()
+            except Exception as e:
+                failures[aoi_id] = e
+                if verbose:
+                    print(f"[{done}/{len(aois)}] {aoi_id} failed: {type(e).__name__}: {e}")
+                continue
+            if verbose:
+                print(f"[{done}/{len(aois)}] {aoi_id} done")
+    return results, failures
@@ -0,0 +1,128 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from typing import Any, Optional
+
+## Persistent, content-addressed cache for results fetched from Earth Engine
+## (cloud summaries, scene metadata), so notebook reruns skip repeat round-trips.
+
+ENV_PATH = 'GEE_MULTITOOL_CACHE'
+DEFAULT_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'gee_multitool', 'cache.sqlite')
+
+_MISS = object()
+
+
+def content_key(*parts) -> str:
+    '''sha256 of the JSON encoding of parts; equal inputs give equal keys across sessions.'''
+    payload = json.dumps(parts, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class DiskCache:
+    '''SQLite-backed key/value store with a TTL and size-bounded LRU eviction.
+
+    Entries stored with ttl=None never expire (e.g. summaries of periods already
+    in the past) but are still subject to eviction when the cache is over size.
+
+    Parameters:
+        path: SQLite file (default: $GEE_MULTITOOL_CACHE or ~/.cache/gee_multitool/cache.sqlite)
+        max_bytes: total size of stored values before least recently used entries are dropped
+        ttl: default seconds an entry stays valid
+    '''
+
+    def __init__(self, path=None, max_bytes=256 * 2**20, ttl=6 * 3600):
+        self.path = path or os.environ.get(ENV_PATH) or DEFAULT_PATH
+        if self.path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value TEXT,
+                size INTEGER,
+                expires REAL,
+                accessed REAL
+            )''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)')
+        self.conn.commit()
+
+    def get(self, key: str, default=None) -> Any:
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute('SELECT value, expires FROM entries WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return default
+            if row[1] is not None and row[1] < now:
+                self.conn.execute('DELETE FROM entries WHERE key = ?', (key,))
+                self.conn.commit()
+                return default
+            self.conn.execute('UPDATE entries SET accessed = ? WHERE key = ?', (now, key))
+            self.conn.commit()
+        # Raw bytes (e.g. map tiles) are stored as BLOBs and returned as-is
+        return row[0] if isinstance(row[0], bytes) else json.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl=_MISS):
+        '''Store a JSON-serializable value or bytes; ttl=None keeps it until evicted.'''
+        ttl = self.ttl if ttl is _MISS else ttl
+        payload = value if isinstance(value, bytes) else json.dumps(value)
+        size = len(payload) if isinstance(payload, bytes) else len(payload.encode())  # bytes, not characters
+        now = time.time()
+        with self._lock:
+            self.conn.execute('''
+                INSERT OR REPLACE INTO entries (key, value, size, expires, accessed)
+                VALUES (?, ?, ?, ?, ?)''',
+                (key, payload, size, now + ttl if ttl is not None else None, now))
+            self._evict()
+            self.conn.commit()
+
+    def delete(self, key: str):
+        with self._lock:
+            self.conn.execute('DELETE FROM entries WHERE key = ?', (key,))
+            self.conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self.conn.execute('DELETE FROM entries')
+            self.conn.commit()
+
+    def size(self) -> int:
+        return self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+
+    def _evict(self):
+        self.conn.execute('DELETE FROM entries WHERE expires IS NOT NULL AND expires < ?', (time.time(),))
+        excess = self.size() - self.max_bytes
+        if excess <= 0:
+            return
+        # Oldest access first, until enough bytes are freed
+        doomed, freed = [], 0
+        for key, size in self.conn.execute('SELECT key, size FROM entries ORDER BY accessed'):
+            doomed.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        self.conn.executemany('DELETE FROM entries WHERE key = ?', doomed)
+
+    def close(self):
+        self.conn.close()
+
+
+_default = None
+
+def default_cache() -> DiskCache:
+    # Shared instance so every call in a session uses one connection
+    global _default
+    if _default is None:
+        _default = DiskCache()
+    return _default
+
+def resolve(cache) -> Optional[DiskCache]:
+    '''Map a `cache=` argument (True, False/None, or a DiskCache) to a cache or None.'''
+    if cache is True:
+        return default_cache()
+    return cache or None
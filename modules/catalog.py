@@ -0,0 +1,173 @@
+import os
+import sqlite3
+import time
+from datetime import datetime, timezone
+from typing import List, Optional
+
+import ee
+
+from . import cache
+
+## Local index of the images delivered into a GEE ImageCollection asset, so monthly
+## lookups are SQLite queries rather than server-side filterDate/size checks.
+
+# Incremental syncs only see added or updated assets, so every so often the whole
+# collection is listed and rows for assets deleted from it are dropped.
+FULL_SYNC_SECONDS = 24 * 3600
+CATALOG_PATH = os.path.join(os.path.dirname(cache.DEFAULT_PATH), 'planet_catalog.sqlite')
+
+
+def _millis(timestamp) -> Optional[int]:
+    # RFC 3339 timestamps as returned by the asset API, e.g. "2023-06-01T17:15:12.345Z"
+    if not timestamp:
+        return None
+    dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+    return int(round(dt.timestamp() * 1000))
+
+def _bounds(geometry):
+    # (west, south, east, north) of a GeoJSON geometry
+    if not geometry:
+        return None, None, None, None
+    coords, stack = [], [geometry['coordinates']]
+    while stack:
+        c = stack.pop()
+        if c and isinstance(c[0], (int, float)):
+            coords.append(c)
+        else:
+            stack.extend(c)
+    xs, ys = [c[0] for c in coords], [c[1] for c in coords]
+    return min(xs), min(ys), max(xs), max(ys)
+
+def month_bounds(key):
+    '''(start_millis, end_millis) of a month key such as "2023-06" or "2023_06".'''
+    year, month = (int(p) for p in key.replace('_', '-').split('-')[:2])
+    start = datetime(year, month, 1, tzinfo=timezone.utc)
+    end = datetime(year + month // 12, month % 12 + 1, 1, tzinfo=timezone.utc)
+    return int(start.timestamp() * 1000), int(end.timestamp() * 1000)
+
+
+class AssetCatalog:
+    '''SQLite-backed index of one ImageCollection asset: asset ID, acquisition time,
+    footprint bounds and the Planet order each asset came from.'''
+
+    def __init__(self, collection_id, path=CATALOG_PATH):
+        self.collection_id = collection_id
+        self.path = path
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS assets (
+                asset_id TEXT PRIMARY KEY,
+                collection TEXT,
+                item_id TEXT,
+                acquired INTEGER,
+                west REAL, south REAL, east REAL, north REAL,
+                updated TEXT,
+                order_id TEXT,
+                order_name TEXT
+            )''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS assets_acquired ON assets (collection, acquired)')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS syncs (
+                collection TEXT PRIMARY KEY,
+                last_update TEXT,
+                last_full REAL
+            )''')
+        if 'last_full' not in [r[1] for r in self.conn.execute('PRAGMA table_info(syncs)')]:
+            self.conn.execute('ALTER TABLE syncs ADD COLUMN last_full REAL')
+        self.conn.commit()
+
+    def _sync_state(self):
+        row = self.conn.execute('SELECT last_update, last_full FROM syncs WHERE collection = ?',
+                                (self.collection_id,)).fetchone()
+        return (row[0], row[1]) if row else (None, None)
+
+    def last_update(self) -> Optional[str]:
+        return self._sync_state()[0]
+
+    def sync(self, ledger=None, page_size=1000, full=None) -> int:
+        '''Fetch assets updated since the last sync; returns how many were added, changed or removed.
+
+        Parameters:
+            ledger: Optional OrderLedger used to attribute each asset to its order
+            full: List the whole collection and drop rows for assets no longer in it.
+                None (default) does so when the last full sync is FULL_SYNC_SECONDS old.
+        '''
+        sources = {}
+        if ledger is not None:
+            for order in ledger.orders():
+                for item_id in order['item_ids']:
+                    sources[item_id] = (order['order_id'], order['name'])
+
+        last, last_full = self._sync_state()
+        if full is None:
+            full = last_full is None or time.time() - last_full >= FULL_SYNC_SECONDS
+        params = {'parent': self.collection_id, 'pageSize': page_size, 'view': 'FULL'}
+        if last and not full:
+            params['filter'] = f'update_time > "{last}"'
+        newest, count, listed = last, 0, []
+        while True:
+            page = ee.data.listAssets(params)
+            rows = []
+            for asset in page.get('assets', []):
+                if asset.get('type') != 'IMAGE':
+                    continue
+                asset_id = asset.get('id') or asset['name'].split('/assets/', 1)[-1]
+                item_id = asset_id.rsplit('/', 1)[-1]
+                order_id, order_name = sources.get(item_id, (None, None))
+                updated = asset.get('updateTime')
+                listed.append(asset_id)
+                if full and last and updated and updated <= last:
+                    continue  # unchanged since the last sync
+                rows.append((asset_id, self.collection_id, item_id, _millis(asset.get('startTime')),
+                             *_bounds(asset.get('geometry')), updated, order_id, order_name))
+                if updated and (newest is None or updated > newest):
+                    newest = updated
+            self.conn.executemany('INSERT OR REPLACE INTO assets VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+            count += len(rows)
+            token = page.get('nextPageToken')
+            if not token:
+                break
+            params['pageToken'] = token
+        if full:
+            # Only a complete listing says which assets are gone
+            self.conn.execute('CREATE TEMP TABLE IF NOT EXISTS listed (asset_id TEXT PRIMARY KEY)')
+            self.conn.execute('DELETE FROM listed')
+            self.conn.executemany('INSERT OR IGNORE INTO listed VALUES (?)', ((a,) for a in listed))
+            count += self.conn.execute(
+                'DELETE FROM assets WHERE collection = ? AND asset_id NOT IN (SELECT asset_id FROM listed)',
+                (self.collection_id,)).rowcount
+            last_full = time.time()
+        self.conn.execute('INSERT OR REPLACE INTO syncs VALUES (?, ?, ?)', (self.collection_id, newest, last_full))
+        self.conn.commit()
+        return count
+
+    def asset_ids(self, start_ms, end_ms, bounds=None) -> List[str]:
+        '''Asset IDs acquired in [start_ms, end_ms), optionally intersecting (west, south, east, north).'''
+        sql = 'SELECT asset_id FROM assets WHERE collection = ? AND acquired >= ? AND acquired < ?'
+        args = [self.collection_id, start_ms, end_ms]
+        if bounds is not None:
+            sql += ' AND west <= ? AND east >= ? AND south <= ? AND north >= ?'
+            args += [bounds[2], bounds[0], bounds[3], bounds[1]]
+        return [r[0] for r in self.conn.execute(sql + ' ORDER BY acquired', args)]
+
+    def collection(self, start_ms, end_ms, bounds=None):
+        '''The matching assets as an ee.ImageCollection (empty, not a placeholder, when none match).'''
+        return ee.ImageCollection.fromImages([ee.Image(i) for i in self.asset_ids(start_ms, end_ms, bounds)])
+
+    def month(self, key, bounds=None):
+        return self.collection(*month_bounds(key), bounds=bounds)
+
+    def orders(self, start_ms=None, end_ms=None) -> List[dict]:
+        '''Per-asset provenance rows (asset_id, item_id, acquired, order_id, order_name).'''
+        sql = 'SELECT asset_id, item_id, acquired, order_id, order_name FROM assets WHERE collection = ?'
+        args = [self.collection_id]
+        if start_ms is not None:
+            sql += ' AND acquired >= ? AND acquired < ?'
+            args += [start_ms, end_ms]
+        return [dict(r) for r in self.conn.execute(sql + ' ORDER BY acquired', args)]
+
+    def close(self):
+        self.conn.close()
@@ -1,46 +1,82 @@
 import ee
 
-def toa(image, satellite):
-    sat = str(satellite).upper()
+## QA definitions shared with the local NumPy engine (modules/local.py)
+# Collection 2 QA_PIXEL: bit 1 dilated cloud, 2 cirrus, 3 cloud, 4 cloud shadow, 5 snow
+LANDSAT_TOA_BITS = (3, 4)   # cloud, cloud shadow
+LANDSAT_SR_BITS  = (3, 4)   # cloud, cloud shadow
+S2_QA60_BITS     = (10, 11) # opaque clouds, cirrus
+S2_SCL_REJECT    = (0,   # No data
+                    1,   # Saturated/defective
+                    3,   # Cloud shadow
+                    8,   # Cloud medium prob
+                    9,   # Cloud high prob
+                    10,  # Thin cirrus
+                    11)  # Snow/ice
+
+S2_CLOUD_PROB_MAX = 40 # s2cloudless probability (%) above which a pixel counts as cloud
+
+MASKS = { ## Declarative mask spec: the QA band and the bits or class codes it rejects
+    ('L', 'SR'):   {'band': 'QA_PIXEL', 'bits': LANDSAT_SR_BITS},
+    ('L', 'TOA'):  {'band': 'QA_PIXEL', 'bits': LANDSAT_TOA_BITS},
+    ('S2', 'SR'):  {'band': 'SCL', 'classes': S2_SCL_REJECT},
+    ('S2', 'TOA'): {'band': 'QA60', 'bits': S2_QA60_BITS},
+}
 
-    if sat.startswith('L'):  # Landsat
-        
-        qa = image.select('QA_PIXEL')
-        # Bit 3 is cloud shadow in C2 L2; adjust if you need cloud bit as well
-        cloud_shadow = qa.bitwiseAnd(1 << 3).gt(0)
-        return image.updateMask(cloud_shadow.Not())
-    elif sat == 'S2':
-        qa = image.select('QA60')
-
-        cloud_bit_mask  = 1 << 10
-        cirrus_bit_mask = 1 << 11
-    
-        mask = (
-            qa.bitwiseAnd(cloud_bit_mask).eq(0)
-            .And(qa.bitwiseAnd(cirrus_bit_mask).eq(0))
-        )
-    
-        return image.updateMask(mask).divide(10000)
-
-def sr(image, satellite):
+def maskSpec(satellite, product='SR'):
     sat = str(satellite).upper()
+    return MASKS.get(('L' if sat.startswith('L') else sat, product))
+
+def bitmask(bits):
+    mask = 0
+    for bit in bits:
+        mask |= 1 << bit
+    return mask
+
+def keepMask(image, spec):
+    '''Compile a mask spec to one operation: a combined bitwiseAnd, or a single remap of class codes.'''
+    qa = image.select(spec['band'])
+    if 'bits' in spec:
+        return qa.bitwiseAnd(bitmask(spec['bits'])).eq(0)
+    classes = list(spec['classes'])
+    return qa.remap(classes, [0] * len(classes), 1)
+
+def mask(image, satellite, product='SR', cloud_prob_max=None):
+    '''Apply the satellite/product mask spec; unknown sensors are returned unmasked.
+
+    Parameters:
+        cloud_prob_max: S2 only; also reject pixels whose joined s2cloudless
+            probability (see joinCloudProbability) is at or above this value
+            (True: S2_CLOUD_PROB_MAX)
+    '''
+    spec = maskSpec(satellite, product)
+    if spec is None:
+        return image
+    if cloud_prob_max is True:
+        cloud_prob_max = S2_CLOUD_PROB_MAX
+    keep = keepMask(image, spec)
+    if cloud_prob_max is not None and str(satellite).upper() == 'S2':
+        keep = keep.And(ee.Image(image.get('cloud_prob')).select('probability').lt(cloud_prob_max))
+    return image.updateMask(keep)
+
+def joinCloudProbability(collection, probabilities):
+    '''Attach each S2 image's S2_CLOUD_PROBABILITY image as 'cloud_prob' in a single join.
+
+    Parameters:
+        collection: S2 SR or TOA collection
+        probabilities: S2_CLOUD_PROBABILITY filtered to the same dates and bounds
+    '''
+    joined = ee.Join.saveFirst('cloud_prob').apply(
+        primary=collection,
+        secondary=probabilities,
+        condition=ee.Filter.equals(leftField='system:index', rightField='system:index')
+    )
+    return ee.ImageCollection(joined)
+
+def toa(image, satellite, cloud_prob_max=None):
+    masked = mask(image, satellite, 'TOA', cloud_prob_max)
+    if str(satellite).upper() == 'S2':
+        return masked.divide(10000)
+    return masked
 
-    if sat.startswith('L'):  # Landsat
-        qa = image.select('QA_PIXEL')
-        cloud_shadow = qa.bitwiseAnd(1 << 3).gt(0)
-        cloud        = qa.bitwiseAnd(1 << 5).gt(0)  # bit 5 is cloud in C2 L2
-        return image.updateMask(cloud_shadow.Or(cloud).Not())
-
-    elif sat == 'S2':  # Sentinel-2 SR has SCL
-        scl = image.select('SCL')
-        bad = (scl.eq(0)  # No data
-               .Or(scl.eq(1))   # Saturated/defective
-               .Or(scl.eq(3))   # Cloud shadow
-               .Or(scl.eq(8))   # Cloud medium prob
-               .Or(scl.eq(9))   # Cloud high prob
-               .Or(scl.eq(10))  # Thin cirrus
-               .Or(scl.eq(11))) # Snow/ice
-        return image.updateMask(bad.Not())
-
-    # Fallback: no masking
-    return image
\ No newline at end of file
+def sr(image, satellite, cloud_prob_max=None):
+    return mask(image, satellite, 'SR', cloud_prob_max)
@@ -0,0 +1,158 @@
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import numpy as np
+
+from . import local
+
+## Out-of-core temporal compositor for local scene stacks (the local
+## counterpart of ic.median()). Scenes must share one grid (same CRS,
+## transform and size), e.g. GEE exports or scenes warped to a common grid.
+
+try:
+    import rasterio
+    from rasterio.windows import Window
+except Exception:
+    rasterio = None
+
+
+def _parse_reducer(name):
+    if name in ('median', 'mean', 'count'):
+        return name, None
+    if name.startswith('p') and name[1:].replace('.', '', 1).isdigit():
+        return 'percentile', float(name[1:])
+    raise ValueError(f"Unknown reducer '{name}'; use median, mean, count or pNN")
+
+def output_names(bands, reducers):
+    names = []
+    for r in reducers:
+        if r == 'count':
+            names.append('count')
+        else:
+            names += [f'{b}_{r}' for b in bands]
+    return names
+
+def tile_side(n_scenes, n_bands, max_tile_bytes):
+    '''Largest tile edge (multiple of 16) whose scene stack fits in max_tile_bytes.
+
+    The time axis is the only thing that grows with the number of scenes, so
+    shrinking the tile keeps peak memory per worker fixed.
+    '''
+    pixels = max_tile_bytes // (4 * max(n_scenes, 1) * max(n_bands, 1))
+    side = int(np.sqrt(pixels)) // 16 * 16
+    return max(side, 16)
+
+
+def _read_tile(path, indexes, window, qa_index, satellite, product, mask_path):
+    with rasterio.open(path) as src:
+        data = src.read(indexes, window=window, out_dtype='float32')
+        if src.nodata is not None:
+            data[data == src.nodata] = np.nan
+        keep = None
+        if qa_index is not None:
+            qa = src.read(qa_index, window=window)
+            keep = local.sr_mask(qa, satellite) if product == 'SR' else local.toa_mask(qa, satellite)
+    if mask_path is not None:
+        with rasterio.open(mask_path) as m:
+            clear = m.read(1, window=window) != 0  # e.g. udm2 band 1 ("clear")
+        keep = clear if keep is None else keep & clear
+    if keep is not None:
+        data[:, ~keep] = np.nan
+    return data
+
+def _reduce_tile(args):
+    (paths, mask_paths, indexes, qa_index, satellite, product, window, reducers) = args
+    h, w = int(window.height), int(window.width)
+    # One preallocated (time, band, row, col) stack per tile
+    stack = np.empty((len(paths), len(indexes), h, w), dtype=np.float32)
+    for t, path in enumerate(paths):
+        stack[t] = _read_tile(path, indexes, window, qa_index, satellite, product,
+                              mask_paths[t] if mask_paths else None)
+
+    out = []
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)  # all-NaN pixels stay NaN
+        for r in reducers:
+            kind, q = _parse_reducer(r)
+            if kind == 'median':
+                out.append(np.nanmedian(stack, axis=0))
+            elif kind == 'mean':
+                out.append(np.nanmean(stack, axis=0))
+            elif kind == 'percentile':
+                out.append(np.nanpercentile(stack, q, axis=0).astype(np.float32))
+            else:
+                out.append((~np.isnan(stack[:, 0])).sum(axis=0)[None].astype(np.float32))
+    return window, np.concatenate(out, axis=0)
+
+
+def composite(src_paths, dst_path, reducers=('median',), bands=None, satellite=None,
+              product='SR', mask_paths=None, max_tile_bytes=256 * 2**20, processes=None):
+    '''Reduce a stack of scenes across time, tile by tile, into one GeoTIFF.
+
+    Parameters:
+        src_paths: scene GeoTIFFs on a shared grid
+        dst_path: output GeoTIFF (tiled, deflate-compressed), written incrementally
+        reducers: any of 'median', 'mean', 'count' and percentiles such as 'p90'
+        bands: band names to reduce (default: every non-QA band)
+        satellite: key of indices.SENSORS; enables the cloudmask QA rules if the QA band is present
+        product: 'SR' or 'TOA', selects the QA rules
+        mask_paths: optional per-scene rasters, first band nonzero where clear (PlanetScope udm2)
+        max_tile_bytes: budget for one tile's scene stack; tiles shrink as scenes are added
+        processes: worker processes (default: os.cpu_count())
+    '''
+    if rasterio is None:
+        raise ImportError("rasterio is required for local compositing")
+    src_paths = list(src_paths)
+    if not src_paths:
+        raise ValueError("No scenes to composite")
+    for r in reducers:
+        _parse_reducer(r)
+
+    with rasterio.open(src_paths[0]) as first:
+        profile = first.profile.copy()
+        file_bands = local._band_names(first, None, satellite)
+        for path in src_paths[1:]:
+            with rasterio.open(path) as other:
+                if (other.width, other.height, other.transform, other.crs) != \
+                        (first.width, first.height, first.transform, first.crs):
+                    raise ValueError(f"{path} is not on the same grid as {src_paths[0]}")
+
+    qa = local.qa_band(satellite, product) if satellite else None
+    qa_index = file_bands.index(qa) + 1 if qa in file_bands else None
+    if bands is None:
+        bands = [b for b in file_bands if b != qa]
+    indexes = [file_bands.index(b) + 1 for b in bands]
+    names = output_names(bands, reducers)
+
+    side = tile_side(len(src_paths), len(indexes), max_tile_bytes)
+    block = min(512, side)
+    side = side // block * block  # windows line up with output blocks
+    profile.update(count=len(names), dtype='float32', nodata=np.nan, tiled=True,
+                   blockxsize=block, blockysize=block, compress='deflate', predictor=3,
+                   BIGTIFF='IF_SAFER')
+    windows = [
+        Window(col, row, min(side, profile['width'] - col), min(side, profile['height'] - row))
+        for row in range(0, profile['height'], side)
+        for col in range(0, profile['width'], side)
+    ]
+
+    processes = processes or os.cpu_count() or 1
+    with rasterio.open(dst_path, 'w', **profile) as dst, \
+            ProcessPoolExecutor(max_workers=processes) as pool:
+        for i, name in enumerate(names, start=1):
+            dst.set_band_description(i, name)
+        # Keep only a couple of tiles per worker in flight so results never pile up
+        pending = set()
+        for window in windows:
+            pending.add(pool.submit(_reduce_tile, (src_paths, mask_paths, indexes, qa_index,
+                                                   satellite, product, window, reducers)))
+            if len(pending) >= 2 * processes:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for f in done:
+                    window_done, data = f.result()
+                    dst.write(data, window=window_done)
+        for f in pending:
+            window, data = f.result()
+            dst.write(data, window=window)
+    return names
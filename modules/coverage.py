@@ -0,0 +1,99 @@
+import math
+
+import numpy as np
+
+from ._lazy import lazy_import
+
+shapely = lazy_import('shapely')
+
+## Coverage-driven scene selection for Landsat and S2: the AOI is divided into a grid and,
+## per period, the fewest scenes are chosen that give the target fraction of cells the
+## required number of expected clear observations (a scene counts for its clear fraction,
+## 1 - cloud_cover / 100, in every cell it contains). PlanetScope gets the same from plaknit.
+
+# Defaults for SceneIndex.select / retrieveImagery(coverage=...); override any key per call
+SCENE_PLAN_PARAMS = {
+    'coverage_target': 0.98,  # fraction of grid cells that must be satisfied
+    'min_clear_obs': 1,       # expected clear observations required per cell
+    'cell_size_m': 1000,
+    'max_cells': 250000,      # cells are enlarged beyond this to bound the matrix size
+}
+
+METRES_PER_DEGREE = 111320.0
+
+
+def aoi_grid(geometry, cell_size_m=1000, max_cells=250000):
+    '''Centres of the grid cells whose centre falls inside the AOI, as shapely points.'''
+    west, south, east, north = geometry.bounds
+    lat = math.radians((south + north) / 2)
+    dy = cell_size_m / METRES_PER_DEGREE
+    dx = dy / max(math.cos(lat), 1e-6)
+    cells = math.ceil((east - west) / dx) * math.ceil((north - south) / dy)
+    if cells > max_cells:
+        grow = math.sqrt(cells / max_cells)
+        dx, dy = dx * grow, dy * grow
+    xs, ys = np.meshgrid(np.arange(west + dx / 2, east, dx), np.arange(south + dy / 2, north, dy))
+    xs, ys = xs.ravel(), ys.ravel()
+    inside = shapely.contains_xy(geometry, xs, ys)
+    if not inside.any():
+        # AOI smaller than a cell: a single representative cell
+        return np.array([geometry.representative_point()])
+    return shapely.points(xs[inside], ys[inside])
+
+def coverage_matrix(footprints, cells):
+    '''Boolean (scenes x cells) matrix of which scene footprint contains which cell centre.'''
+    matrix = np.zeros((len(footprints), len(cells)), dtype=bool)
+    if len(footprints) and len(cells):
+        scene_idx, cell_idx = shapely.STRtree(cells).query(footprints, predicate='contains')
+        matrix[scene_idx, cell_idx] = True
+    return matrix
+
+def greedy_cover(matrix, cloud_cover, coverage_target=0.98, min_clear_obs=1):
+    '''Greedy set multicover weighted by expected clear fraction: repeatedly take the scene
+    adding the most expected clear observations to unmet cells (ties go to the clearer
+    scene) until coverage_target of the cells have min_clear_obs of them, or no remaining
+    scene adds any. A scene with unknown cloud cover counts as fully cloudy.
+
+    Parameters:
+        matrix: boolean (scenes x cells) coverage_matrix
+        cloud_cover: scene cloud cover in percent
+
+    Returns:
+        (chosen row indices in selection order, fraction of cells satisfied)
+    '''
+    n_scenes, n_cells = matrix.shape
+    if n_cells == 0:
+        return [], 1.0
+    cloud = np.nan_to_num(np.asarray(cloud_cover, dtype=float).reshape(n_scenes), nan=100.0)
+    clear = np.clip(1 - cloud / 100, 0, 1)
+    need = np.full(n_cells, float(min_clear_obs))
+    cells = [np.flatnonzero(row) for row in matrix]
+    available = clear > 0
+    goal = coverage_target * n_cells
+    chosen = []
+    # A small tolerance so that e.g. 0.9 + 0.1 meets a target of 1
+    while np.count_nonzero(need <= 1e-9) < goal and available.any():
+        # Unmet cells take up to the scene's clear fraction; met cells (need 0) add nothing
+        gains = np.array([np.minimum(need[c], w).sum() for c, w in zip(cells, clear)])
+        gains[~available] = -1
+        best = np.lexsort((cloud, -gains))[0]
+        if gains[best] <= 1e-9:
+            break
+        chosen.append(int(best))
+        available[best] = False
+        need[cells[best]] = np.maximum(need[cells[best]] - clear[best], 0)
+    return chosen, float(np.count_nonzero(need <= 1e-9) / n_cells)
+
+def select_scenes(geometry, footprints, cloud_cover, params=None):
+    '''Indices of the minimal scene set for one AOI and period, plus the coverage reached.
+
+    Parameters:
+        geometry: shapely AOI
+        footprints: shapely scene footprints (candidates already pass the cloud filter)
+        cloud_cover: scene cloud cover in percent; weights each scene's contribution
+        params: overrides of SCENE_PLAN_PARAMS
+    '''
+    params = dict(SCENE_PLAN_PARAMS, **(params or {}))
+    cells = aoi_grid(geometry, params['cell_size_m'], params['max_cells'])
+    matrix = coverage_matrix(footprints, cells)
+    return greedy_cover(matrix, cloud_cover, params['coverage_target'], params['min_clear_obs'])
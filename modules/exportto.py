@@ -1,16 +1,120 @@
-def export_image(image, description, folder, aoi, scale=30):
+import time
 
+import ee
+
+from . import zonal
+
+
+def aoi_bounds(aoi):
+    # The one getInfo an export batch needs: the AOI's bounding rectangle
+    return aoi.geometry().bounds().getInfo()['coordinates']
+
+def split_bounds(coordinates, tiles=(1, 1)):
+    '''Split a bounding rectangle into a (columns, rows) grid of rectangles, client-side.'''
+    xs = [p[0] for p in coordinates[0]]
+    ys = [p[1] for p in coordinates[0]]
+    xmin, xmax, ymin, ymax = min(xs), max(xs), min(ys), max(ys)
+    nx, ny = tiles
+    dx, dy = (xmax - xmin) / nx, (ymax - ymin) / ny
+    regions = {}
+    for row in range(ny):
+        for col in range(nx):
+            x0, y0 = xmin + col * dx, ymin + row * dy
+            x1, y1 = x0 + dx, y0 + dy
+            regions[(row, col)] = [[[x0, y0], [x1, y0], [x1, y1], [x0, y1], [x0, y0]]]
+    return regions
+
+def export_image(image, description, folder, aoi, scale=30, region=None, start=True):
+    '''Export one image to Drive. Pass region (e.g. from aoi_bounds) to skip the bounds getInfo.'''
     task = ee.batch.Export.image.toDrive(
         image=image.clip(aoi),
         description=description,
         folder=folder,
         scale=scale,
-        region=aoi.geometry().bounds().getInfo()['coordinates'],
+        region=region if region is not None else aoi_bounds(aoi),
         crs='EPSG:26914',
         maxPixels=1e13
     )
-    task.start()
-    print(f"Export task started: {description}")
+    if start:
+        task.start()
+        print(f"Export task started: {description}")
+    return task
+
+DONE_STATES = ('COMPLETED',)
+FAILED_STATES = ('FAILED',)  # retried
+CANCELLED_STATES = ('CANCELLED', 'CANCEL_REQUESTED')  # someone stopped the task: final, never resubmitted
+
+def export_images(jobs, folder, aoi, scale=30, tiles=(1, 1), max_running=8, max_retries=2,
+                  poll_interval=10, max_poll_interval=120):
+    '''Run many exports with a bounded number of EE tasks in flight.
+
+    Parameters:
+        jobs: iterable of (image, description)
+        tiles: (columns, rows) to shard the AOI into; each shard is its own task
+        max_running: tasks allowed READY/RUNNING at once
+        max_retries: resubmits for a failed task (cancelled tasks are not resubmitted)
+        poll_interval, max_poll_interval: polling backoff bounds in seconds
+
+    Returns:
+        dict of task description -> final state ('COMPLETED', 'CANCELLED'/'CANCEL_REQUESTED'
+        or 'FAILED' once retries are used up)
+    '''
+    coordinates = aoi_bounds(aoi)
+    regions = split_bounds(coordinates, tiles)
+    queue = []
+    for image, description in jobs:
+        for (row, col), region in regions.items():
+            name = description if len(regions) == 1 else f"{description}_r{row}c{col}"
+            queue.append((image, name, region))
+
+    total = len(queue)
+    running = {}            # task id -> (task, job)
+    attempts = {}
+    final = {}
+    interval = poll_interval
+    while queue or running:
+        while queue and len(running) < max_running:
+            job = queue.pop(0)
+            image, name, region = job
+            task = export_image(image, name, folder, aoi, scale=scale, region=region, start=False)
+            task.start()
+            attempts[name] = attempts.get(name, 0) + 1
+            running[task.id] = (task, job)
+
+        time.sleep(interval)
+        # One list call covers every task, instead of a status() call per task
+        states = {t.id: t.state for t in ee.batch.Task.list()}
+        changed = False
+        for task_id, (task, job) in list(running.items()):
+            state = str(states.get(task_id, 'READY')).split('.')[-1]
+            if state in DONE_STATES + FAILED_STATES + CANCELLED_STATES:
+                changed = True
+                del running[task_id]
+                name = job[1]
+                if state in FAILED_STATES and attempts[name] <= max_retries:
+                    print(f"Export {name} {state.lower()}; retrying ({attempts[name]}/{max_retries})")
+                    queue.append(job)
+                else:
+                    final[name] = state
+        if changed:
+            failed = sum(1 for st in final.values() if st in FAILED_STATES)
+            cancelled = sum(1 for st in final.values() if st in CANCELLED_STATES)
+            print(f"Exports: {len(final)}/{total} finished ({failed} failed, {cancelled} cancelled), "
+                  f"{len(running)} running, {len(queue)} queued")
+            interval = poll_interval
+        else:
+            interval = min(max_poll_interval, interval * 2)
+    return final
+
 
+def export_summary_csv(periods, regions, path, bands=('NDVI', 'EVI', 'SAVI'), scale=30, **kwargs):
+    '''Write per-polygon statistics for every period and index band to a .csv or .parquet file.
 
-def export_summary_csv(
\ No newline at end of file
+    Parameters:
+        periods: dict of period key -> ee.Image or ee.ImageCollection
+        regions: ee.FeatureCollection of AOI polygons
+        kwargs: passed to zonal.zonal_stats (percentiles, id_property, chunk_size, ...)
+    '''
+    path = zonal.zonal_stats(periods, regions, bands=bands, scale=scale, out_path=path, **kwargs)
+    print(f"Summary written: {path}")
+    return path
@@ -0,0 +1,116 @@
+import ee
+
+## Fused spectral index engine: reflectance is scaled once per image and every
+## requested index is computed from that single scaled image.
+
+TCAP_BANDS = ['blue', 'green', 'red', 'nir', 'swir1', 'swir2']
+TCAP_NAMES = ['TCAP_Brightness', 'TCAP_Greenness', 'TCAP_Wetness']
+
+TCAP_TM = [  # Landsat 4-7
+    [ 0.3037,  0.2793,  0.4743,  0.5585,  0.5082,  0.1863],
+    [-0.2848, -0.2435, -0.5436,  0.7243,  0.0840, -0.1800],
+    [ 0.1509,  0.1973,  0.3279,  0.3406, -0.7112, -0.4572]
+]
+TCAP_OLI = [  # Landsat 8-9
+    [ 0.3029,  0.2786,  0.4733,  0.5599,  0.5080,  0.1872],   # Brightness
+    [-0.2941, -0.2430, -0.5424,  0.7276,  0.0713, -0.1608],   # Greenness
+    [ 0.1511,  0.1973,  0.3283,  0.3407, -0.7117, -0.4559]    # Wetness
+]
+TCAP_MSI = [  # Sentinel-2
+    [ 0.3510,  0.3813,  0.3437,  0.7196,  0.2396,  0.1949],   # Brightness
+    [-0.3599, -0.3533, -0.4734,  0.6633,  0.0087, -0.2856],   # Greenness
+    [ 0.2578,  0.2305,  0.0883,  0.1071, -0.7611, -0.5308]    # Wetness
+]
+
+_TM_BANDS = {'blue': 'SR_B1', 'green': 'SR_B2', 'red': 'SR_B3',
+             'nir': 'SR_B4', 'swir1': 'SR_B5', 'swir2': 'SR_B7'}
+_OLI_BANDS = {'blue': 'SR_B2', 'green': 'SR_B3', 'red': 'SR_B4',
+              'nir': 'SR_B5', 'swir1': 'SR_B6', 'swir2': 'SR_B7'}
+
+SENSORS = { ## Common band name -> sensor band, plus the DN -> reflectance scale/offset
+    'L4': {'bands': _TM_BANDS, 'scale': 2.75e-5, 'offset': -0.2, 'tcap': TCAP_TM},
+    'L5': {'bands': _TM_BANDS, 'scale': 2.75e-5, 'offset': -0.2, 'tcap': TCAP_TM},
+    'L7': {'bands': _TM_BANDS, 'scale': 2.75e-5, 'offset': -0.2, 'tcap': TCAP_TM},
+    'L8': {'bands': _OLI_BANDS, 'scale': 2.75e-5, 'offset': -0.2, 'tcap': TCAP_OLI},
+    'L9': {'bands': _OLI_BANDS, 'scale': 2.75e-5, 'offset': -0.2, 'tcap': TCAP_OLI},
+    'S2': {
+        'bands': {'blue': 'B2', 'green': 'B3', 'red': 'B4',
+                  'nir': 'B8', 'swir1': 'B11', 'swir2': 'B12'},
+        'scale': 1e-4, 'offset': 0.0, 'tcap': TCAP_MSI
+    },
+    'PS': {
+        'bands': {'blue': 'B1', 'green': 'B2', 'red': 'B3', 'nir': 'B4'},
+        'scale': 1.0, 'offset': 0.0,
+        'indices': ('NDVI',)  # PS is left unscaled, so only ratio indices are valid
+    }
+}
+
+
+def _ndvi(refl, sensor):
+    red, nir = refl.select('red'), refl.select('nir')
+    return nir.subtract(red).divide(nir.add(red)).rename('NDVI')
+
+def _evi(refl, sensor):
+    red, nir, blue = refl.select('red'), refl.select('nir'), refl.select('blue')
+    return nir.subtract(red).multiply(2.5).divide(
+        nir.add(red.multiply(6)).subtract(blue.multiply(7.5)).add(1)
+    ).rename('EVI')
+
+def _savi(refl, sensor):
+    red, nir = refl.select('red'), refl.select('nir')
+    # SAVI (L = 0.5)
+    return nir.subtract(red).multiply(1.5).divide(
+        nir.add(red).add(0.5)
+    ).rename('SAVI')
+
+def _tcap(refl, sensor):
+    array2D = refl.select(TCAP_BANDS).toArray().toArray(1)
+    return ee.Image(ee.Array(sensor['tcap'])) \
+        .matrixMultiply(array2D) \
+        .arrayProject([0]) \
+        .arrayFlatten([TCAP_NAMES])
+
+INDICES = { ## Index name -> (common bands it reads, function of the scaled image)
+    'NDVI': (('red', 'nir'), _ndvi),
+    'EVI':  (('red', 'nir', 'blue'), _evi),
+    'SAVI': (('red', 'nir'), _savi),
+    'TCAP': (tuple(TCAP_BANDS), _tcap),
+}
+
+
+def supported(satellite, name):
+    sensor = SENSORS.get(str(satellite).upper())
+    if sensor is None or name not in INDICES:
+        return False
+    if name not in sensor.get('indices', INDICES.keys()):
+        return False
+    if name == 'TCAP' and 'tcap' not in sensor:
+        return False
+    return all(b in sensor['bands'] for b in INDICES[name][0])
+
+def scaled(img, satellite, bands):
+    '''Select the given common bands once, renamed to their common names, as reflectance.'''
+    sensor = SENSORS[str(satellite).upper()]
+    return img.select([sensor['bands'][b] for b in bands], list(bands)) \
+        .multiply(sensor['scale']).add(sensor['offset'])
+
+def addIndices(img, satellite, names=('NDVI', 'EVI', 'SAVI', 'TCAP')):
+    '''Add any subset of INDICES to an image from a single scaled reflectance image.
+
+    Parameters:
+        img: an ee.Image in the sensor's native band names
+        satellite: a key of SENSORS
+        names: indices to add; ones the sensor cannot support are skipped
+    '''
+    sat = str(satellite).upper()
+    names = [n for n in names if supported(sat, n)]
+    if not names:
+        return img  # unknown sensor or nothing computable; no-op
+
+    bands = []
+    for n in names:
+        bands += [b for b in INDICES[n][0] if b not in bands]
+
+    refl = scaled(img, sat, bands)
+    sensor = SENSORS[sat]
+    return img.addBands(ee.Image.cat([INDICES[n][1](refl, sensor) for n in names]))
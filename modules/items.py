@@ -0,0 +1,310 @@
+import re
+import json
+from collections.abc import Mapping
+from datetime import datetime, timezone
+
+import numpy as np
+
+from ._lazy import lazy_import
+
+shapely = lazy_import('shapely')
+
+## Columnar store for PlanetScope plans: item IDs, acquisition times, cloud/clear
+## fractions, sun elevation and footprint bounds held in NumPy arrays instead of one
+## dict per item, with vectorized filters and an STRtree for AOI/tile queries.
+## It reads like the month -> plan dict it replaces, converting a month on access.
+
+_OFFSET = re.compile(r'[+-]\d\d:?\d\d$')
+_MISSING = object()  # a key the item did not have, as opposed to one set to None
+_CORE = ('id', 'collection', 'clear_fraction', 'properties')
+
+
+def _utc(value):
+    # ISO string -> naive UTC string that datetime64 accepts; 'NaT' for anything else
+    if not isinstance(value, str):
+        return 'NaT'
+    if value.endswith('Z'):
+        return value[:-1]
+    if _OFFSET.search(value):
+        return datetime.fromisoformat(value).astimezone(timezone.utc).replace(tzinfo=None).isoformat()
+    return value
+
+def _datetimes(values):
+    # ISO strings (any UTC offset) -> UTC datetime64[us]; missing -> NaT
+    return np.array([_utc(v) for v in values], dtype='datetime64[us]')
+
+def _numeric(values):
+    return all(v is None or (isinstance(v, (int, float)) and not isinstance(v, bool)) for v in values)
+
+def _geojson(footprints):
+    # shapely geometries -> GeoJSON dicts with list coordinates, as the Data API returns them (None stays None).
+    # Plain 2D polygons (scene footprints) are sliced out of one coordinate array by offset.
+    footprints = np.asarray(footprints, dtype=object)
+    out = [None] * len(footprints)
+    simple = ((shapely.get_type_id(footprints) == 3) & (shapely.get_num_interior_rings(footprints) == 0)
+              & ~shapely.has_z(footprints) & ~shapely.is_empty(footprints))
+    if simple.any():
+        coords = shapely.get_coordinates(footprints[simple]).tolist()
+        ends = np.cumsum(shapely.get_num_coordinates(footprints[simple])).tolist()
+        start = 0
+        for j, end in zip(np.flatnonzero(simple).tolist(), ends):
+            out[j] = {'type': 'Polygon', 'coordinates': [coords[start:end]]}
+            start = end
+    rest = np.flatnonzero(~simple & (footprints != None))  # noqa: E711
+    for j, text in zip(rest.tolist(), shapely.to_geojson(footprints[rest]).tolist()):
+        out[j] = json.loads(text)
+    return out
+
+def _footprints(values):
+    '''Shapely geometry array of GeoJSON footprints; None where a value would not convert
+    back to an equal dict (those stay with the item's other uncolumned keys).'''
+    footprints = np.full(len(values), None, dtype=object)
+    rows = [i for i, v in enumerate(values) if isinstance(v, dict) and set(v) == {'type', 'coordinates'}]
+    if rows:
+        parsed = shapely.from_geojson([json.dumps(values[i]) for i in rows], on_invalid='ignore')
+        for i, geometry, back in zip(rows, parsed, _geojson(parsed)):
+            if geometry is not None and back == values[i]:
+                footprints[i] = geometry
+    return footprints
+
+def _bbox(value):
+    # A plain [west, south, east, north] list, the only bbox form the float columns hand back
+    if isinstance(value, list) and len(value) == 4 and _numeric(value) and None not in value:
+        return value
+    return None
+
+def _extra(item, has_bbox, has_footprint):
+    # Whatever the columns cannot hold: unknown keys, non-dict properties, odd bbox/geometry values
+    columnar = _CORE + ('bbox',) * has_bbox + ('geometry',) * has_footprint
+    extra = {k: v for k, v in item.items() if k not in columnar}
+    if 'properties' in item and not isinstance(item['properties'], dict):
+        extra['properties'] = item['properties']
+    return extra or None
+
+
+class _Column:
+    '''One column: float64 for numbers (NaN = missing), category codes for
+    repeated strings/flags, and a plain object array for anything unhashable.
+    Rows where the key was absent (_MISSING) are tracked apart from None values.'''
+
+    def __init__(self, values):
+        present = np.array([v is not _MISSING for v in values], dtype=bool)
+        self.present = None if present.all() else present
+        values = [v if v is not _MISSING else None for v in values]
+        self.kind, self.categories = 'object', None
+        if _numeric(values):
+            self.kind = 'int' if all(isinstance(v, int) for v in values if v is not None) else 'float'
+            self.values = np.array([np.nan if v is None else v for v in values], dtype=float)
+            return
+        try:
+            categories = list(dict.fromkeys(values))
+        except TypeError:
+            self.values = np.empty(len(values), dtype=object)
+            self.values[:] = values
+            return
+        self.kind, self.categories = 'category', categories
+        lookup = {v: i for i, v in enumerate(categories)}
+        self.values = np.array([lookup[v] for v in values], dtype=np.int32)
+
+    def take(self, idx):
+        column = _Column.__new__(_Column)
+        column.kind, column.categories, column.values = self.kind, self.categories, self.values[idx]
+        column.present = None if self.present is None else self.present[idx]
+        return column
+
+    def tolist(self, idx):
+        '''Python values of rows idx (None where missing), converted column-wise.'''
+        values = self.values[idx]
+        if self.kind == 'category':
+            categories = self.categories
+            return [categories[v] for v in values.tolist()]
+        if self.kind == 'object':
+            return values.tolist()
+        missing = np.isnan(values)
+        out = (np.where(missing, 0, values).astype(np.int64) if self.kind == 'int' else values).tolist()
+        for j in np.flatnonzero(missing).tolist():
+            out[j] = None
+        return out
+
+    def has(self, idx):
+        '''Per row of idx, whether the item had this key (None: every row had it).'''
+        return None if self.present is None else self.present[idx].tolist()
+
+
+class ItemStore(Mapping):
+    '''Planned PlanetScope items for many months in columnar form.
+
+    As a Mapping it behaves like planPlanetScope's month -> plan dict (store[month]
+    builds that month's plan dict on demand), so existing callers keep working.
+
+    Parameters:
+        plans: dict of month -> plan, as plan_monthly_composites / planPlanetScope return
+    '''
+
+    def __init__(self, plans=None):
+        plans = plans or {}
+        self.plans = {m: {k: v for k, v in plan.items() if k != 'items'} for m, plan in plans.items()}
+        self.month_names = sorted(plans)
+        items, months = [], []
+        for code, month in enumerate(self.month_names):
+            for item in plans[month].get('items', []):
+                items.append(item)
+                months.append(code)
+        props = [item['properties'] if isinstance(item.get('properties'), dict) else {} for item in items]
+        keys = list(dict.fromkeys(k for p in props for k in p))
+
+        self.id = np.array([item.get('id') or '' for item in items], dtype=str)
+        self.month = np.array(months, dtype=np.int32)
+        self.clear_fraction = np.array([np.nan if item.get('clear_fraction') is None else item['clear_fraction']
+                                        for item in items], dtype=float)
+        self.acquired = _datetimes([p.get('acquired') for p in props])
+        # Footprints as a shapely geometry array and bboxes as floats; bounds come from the
+        # bbox when there is one, else from the footprint, else NaN (plaknit plans carry neither)
+        self.footprint = _footprints([item.get('geometry') for item in items])
+        bboxes = [_bbox(item.get('bbox')) for item in items]
+        self.has_bbox = np.array([b is not None for b in bboxes], dtype=bool)
+        self.bounds = np.full((len(items), 4), np.nan)
+        if self.has_bbox.any():
+            self.bounds[self.has_bbox] = [b for b in bboxes if b is not None]
+        shaped = np.array([g is not None for g in self.footprint], dtype=bool) & ~self.has_bbox
+        if shaped.any():
+            self.bounds[shaped] = shapely.bounds(self.footprint[shaped])
+        self.collection = _Column([item.get('collection') for item in items])
+        self.properties = {k: _Column([p.get(k, _MISSING) for p in props]) for k in keys}
+        # Which core keys each item had, and everything else, so to_items() hands items back unchanged
+        self._has = {k: np.array([k in item for item in items], dtype=bool) for k in _CORE}
+        self._has['properties'] = np.array([isinstance(item.get('properties'), dict) for item in items], dtype=bool)
+        self._has['id'] &= np.array([isinstance(item.get('id'), str) for item in items], dtype=bool)
+        self._extra = np.empty(len(items), dtype=object)
+        self._extra[:] = [_extra(item, has_bbox, g is not None)
+                          for item, has_bbox, g in zip(items, self.has_bbox.tolist(), self.footprint)]
+        self._itemless = {m for m, plan in plans.items() if 'items' not in plan}
+        self._tree = None
+
+    @classmethod
+    def from_plans(cls, plans):
+        return plans if isinstance(plans, cls) else cls(plans)
+
+    ## Mapping interface: month -> plan dict
+
+    def __getitem__(self, month):
+        if month not in self.plans:
+            raise KeyError(month)
+        if month in self._itemless:
+            return dict(self.plans[month])
+        code = self.month_names.index(month)
+        return dict(self.plans[month], items=self.to_items(np.flatnonzero(self.month == code)))
+
+    def __iter__(self):
+        return (m for m in self.month_names if m in self.plans)
+
+    def __len__(self):
+        return len(self.plans)
+
+    @property
+    def size(self):
+        return len(self.id)
+
+    def column(self, name):
+        '''A property as an array (numeric properties; NaN where missing).'''
+        return self.properties[name].values
+
+    def _take(self, idx):
+        # A store over a subset of rows; months left without items keep their plan metadata
+        sub = ItemStore.__new__(ItemStore)
+        sub.plans, sub.month_names, sub._itemless = self.plans, self.month_names, self._itemless
+        for name in ('id', 'month', 'clear_fraction', 'acquired', 'footprint', 'has_bbox', 'bounds', '_extra'):
+            setattr(sub, name, getattr(self, name)[idx])
+        sub.collection = self.collection.take(idx)
+        sub.properties = {k: c.take(idx) for k, c in self.properties.items()}
+        sub._has = {k: has[idx] for k, has in self._has.items()}
+        sub._tree = None
+        return sub
+
+    def filter(self, months=None, start=None, end=None, cloud_max=None, clear_min=None,
+               sun_elevation_min=None, ids=None):
+        '''Vectorized row filter; items missing a filtered value are dropped.
+
+        Parameters:
+            months: month keys to keep
+            start / end: ISO acquisition bounds, [start, end)
+            cloud_max: keep cloud_cover <= cloud_max (same units as the plan, a 0-1 fraction for plaknit)
+            clear_min: keep clear_fraction >= clear_min
+            sun_elevation_min: keep sun_elevation >= this (degrees)
+            ids: item IDs to keep
+        '''
+        keep = np.ones(self.size, dtype=bool)
+        if months is not None:
+            codes = [self.month_names.index(m) for m in months if m in self.month_names]
+            keep &= np.isin(self.month, codes)
+        if start is not None:
+            keep &= self.acquired >= _datetimes([start])[0]
+        if end is not None:
+            keep &= self.acquired < _datetimes([end])[0]
+        if cloud_max is not None:
+            keep &= self.column('cloud_cover') <= cloud_max
+        if clear_min is not None:
+            keep &= self.clear_fraction >= clear_min
+        if sun_elevation_min is not None:
+            keep &= self.column('sun_elevation') >= sun_elevation_min
+        if ids is not None:
+            keep &= np.isin(self.id, list(ids))
+        return self._take(np.flatnonzero(keep))
+
+    def intersecting(self, geometry, predicate='intersects'):
+        '''Items whose footprint bounds meet a shapely geometry (e.g. an AOI or a tile).
+
+        Items without a footprint were planned for the AOI as a whole and always match.
+        '''
+        known = ~np.isnan(self.bounds).any(axis=1)
+        if self._tree is None:
+            self._tree = shapely.STRtree(shapely.box(*self.bounds[known].T))
+        hits = np.flatnonzero(known)[self._tree.query(geometry, predicate=predicate)]
+        return self._take(np.sort(np.concatenate([hits, np.flatnonzero(~known)])))
+
+    def ids_by_month(self):
+        '''month -> item IDs (empty IDs skipped), for months that have any.'''
+        grouped = {}
+        for code in np.unique(self.month):
+            ids = self.id[(self.month == code) & (self.id != '')]
+            if len(ids):
+                grouped[self.month_names[code]] = ids.tolist()
+        return grouped
+
+    def to_items(self, idx=None):
+        '''Rows as the item dicts they were built from, with the same keys and values.'''
+        idx = np.arange(self.size) if idx is None else np.asarray(idx, dtype=np.intp)
+        has = {k: v[idx].tolist() for k, v in self._has.items()}
+        ids = self.id[idx].tolist()
+        collection = self.collection.tolist(idx)
+        clear = self.clear_fraction[idx]
+        clear = [None if missing else v for v, missing in zip(clear.tolist(), np.isnan(clear).tolist())]
+        columns = [(k, c.tolist(idx), c.has(idx)) for k, c in self.properties.items()]
+        has_bbox, bounds = self.has_bbox[idx].tolist(), self.bounds[idx].tolist()
+        extra = self._extra[idx]
+        geometries = _geojson(self.footprint[idx])
+
+        items = []
+        for j in range(len(idx)):
+            item = {}
+            if has['id'][j]:
+                item['id'] = ids[j]
+            if has['collection'][j]:
+                item['collection'] = collection[j]
+            if has['clear_fraction'][j]:
+                item['clear_fraction'] = clear[j]
+            if has['properties'][j]:
+                item['properties'] = {k: values[j] for k, values, present in columns
+                                      if present is None or present[j]}
+            if has_bbox[j]:
+                item['bbox'] = bounds[j]
+            if geometries[j] is not None:
+                item['geometry'] = geometries[j]
+            if extra[j]:
+                item.update(extra[j])
+            items.append(item)
+        return items
+
+    def to_plans(self):
+        '''The month -> plan dict this store was built from (restricted to its rows).'''
+        return {month: self[month] for month in self}
@@ -0,0 +1,102 @@
+import os
+import json
+import hashlib
+import sqlite3
+import time
+from typing import List, Optional
+
+from . import cache
+
+## Local ledger of placed Planet orders, so a rerun resumes in-flight orders
+## and skips delivered ones instead of placing them again.
+
+IN_FLIGHT = ('queued', 'running')
+DELIVERED = ('success', 'partial')
+LEDGER_PATH = os.path.join(os.path.dirname(cache.DEFAULT_PATH), 'planet_orders.sqlite')
+
+
+def order_key(name: str, item_ids: List[str], product_bundle: str) -> str:
+    payload = json.dumps([name, sorted(set(item_ids)), product_bundle])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class OrderLedger:
+    '''SQLite-backed record of orders keyed by month name, item-ID set and bundle.'''
+
+    def __init__(self, path=LEDGER_PATH):
+        self.path = path
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS orders (
+                key TEXT PRIMARY KEY,
+                name TEXT,
+                product_bundle TEXT,
+                item_ids TEXT,
+                order_id TEXT,
+                state TEXT,
+                details TEXT,
+                created REAL,
+                updated REAL
+            )''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS orders_order_id ON orders (order_id)')
+        self.conn.commit()
+
+    def lookup(self, name, item_ids, product_bundle) -> Optional[dict]:
+        row = self.conn.execute('SELECT * FROM orders WHERE key = ?',
+                                (order_key(name, item_ids, product_bundle),)).fetchone()
+        return self._row(row)
+
+    def get(self, order_id) -> Optional[dict]:
+        row = self.conn.execute('SELECT * FROM orders WHERE order_id = ?', (order_id,)).fetchone()
+        return self._row(row)
+
+    def record(self, name, item_ids, product_bundle, order_id, state, details=None):
+        now = time.time()
+        self.conn.execute('''
+            INSERT INTO orders (key, name, product_bundle, item_ids, order_id, state, details, created, updated)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(key) DO UPDATE SET
+                order_id = excluded.order_id, state = excluded.state,
+                details = COALESCE(excluded.details, orders.details), updated = excluded.updated''',
+            (order_key(name, item_ids, product_bundle), name, product_bundle,
+             json.dumps(sorted(set(item_ids))), order_id, state,
+             json.dumps(details) if details is not None else None, now, now))
+        self.conn.commit()
+
+    def update(self, order_id, state, details=None):
+        if details is None:
+            self.conn.execute('UPDATE orders SET state = ?, updated = ? WHERE order_id = ?',
+                              (state, time.time(), order_id))
+        else:
+            self.conn.execute('UPDATE orders SET state = ?, details = ?, updated = ? WHERE order_id = ?',
+                              (state, json.dumps(details), time.time(), order_id))
+        self.conn.commit()
+
+    def orders(self, states=None) -> List[dict]:
+        if states:
+            marks = ','.join('?' * len(states))
+            rows = self.conn.execute(f'SELECT * FROM orders WHERE state IN ({marks})', tuple(states))
+        else:
+            rows = self.conn.execute('SELECT * FROM orders')
+        return [self._row(r) for r in rows]
+
+    def tracker(self, name, item_ids, product_bundle):
+        '''Callback (order_id, state, details=None) that keeps this order's row current.'''
+        def on_state(order_id, state, details=None):
+            self.record(name, item_ids, product_bundle, order_id, state, details)
+        return on_state
+
+    def close(self):
+        self.conn.close()
+
+    @staticmethod
+    def _row(row) -> Optional[dict]:
+        if row is None:
+            return None
+        entry = dict(row)
+        entry['item_ids'] = json.loads(entry['item_ids'])
+        entry['details'] = json.loads(entry['details']) if entry['details'] else None
+        return entry
@@ -0,0 +1,210 @@
+import os
+
+import numpy as np
+
+from . import indices, cloudmask
+
+## Local NumPy backend: the same indices and QA masks as the Earth Engine
+## modules, for GeoTIFFs already on disk (PlanetScope orders, exported Landsat/S2).
+
+try:
+    import rasterio
+    from rasterio.windows import Window
+except Exception:
+    rasterio = None
+
+
+def scale(dn, satellite, out=None):
+    sensor = indices.SENSORS[str(satellite).upper()]
+    out = np.multiply(dn, sensor['scale'], out=out, dtype=np.float32, casting='unsafe')
+    out += sensor['offset']
+    return out
+
+def _ratio(num, den, out):
+    # EE masks pixels where the denominator is zero; NaN plays that role here
+    with np.errstate(divide='ignore', invalid='ignore'):
+        np.divide(num, den, out=out)
+    out[den == 0] = np.nan
+    return out
+
+def ndvi(red, nir, out=None):
+    return _ratio(nir - red, nir + red, out if out is not None else np.empty_like(red))
+
+def evi(red, nir, blue, out=None):
+    den = nir + 6 * red - 7.5 * blue + 1
+    return _ratio(2.5 * (nir - red), den, out if out is not None else np.empty_like(red))
+
+def savi(red, nir, out=None):
+    # SAVI (L = 0.5)
+    return _ratio(1.5 * (nir - red), nir + red + 0.5, out if out is not None else np.empty_like(red))
+
+def tcap(refl, satellite, out=None):
+    '''Tasseled Cap rotation as one matrix multiply.
+
+    Parameters:
+        refl: (6, rows, cols) reflectance in indices.TCAP_BANDS order
+        satellite: a key of indices.SENSORS with TCAP coefficients
+    '''
+    rot = np.asarray(indices.SENSORS[str(satellite).upper()]['tcap'], dtype=np.float32)
+    flat = refl.reshape(refl.shape[0], -1)
+    if out is None:
+        out = np.empty((rot.shape[0],) + refl.shape[1:], dtype=np.float32)
+    np.matmul(rot, flat, out=out.reshape(rot.shape[0], -1))
+    return out
+
+LOCAL_INDICES = { ## Index name -> function of a dict of scaled common bands
+    'NDVI': lambda b, sat, out: ndvi(b['red'], b['nir'], out=out[0]),
+    'EVI':  lambda b, sat, out: evi(b['red'], b['nir'], b['blue'], out=out[0]),
+    'SAVI': lambda b, sat, out: savi(b['red'], b['nir'], out=out[0]),
+    'TCAP': lambda b, sat, out: tcap(np.stack([b[n] for n in indices.TCAP_BANDS]), sat, out=out),
+}
+
+def output_names(names):
+    out = []
+    for n in names:
+        out += indices.TCAP_NAMES if n == 'TCAP' else [n]
+    return out
+
+
+def _reject_bits(qa, bits):
+    return (qa.astype(np.int64) & cloudmask.bitmask(bits)) == 0
+
+def _reject_classes(qa, classes):
+    # Lookup table indexed by class code, like the single remap in cloudmask.keepMask
+    lut = np.ones(max(max(classes), int(qa.max(initial=0))) + 1, dtype=bool)
+    lut[list(classes)] = False
+    return lut[qa]
+
+def keep_mask(qa, spec):
+    '''Boolean keep-mask for a cloudmask.MASKS spec.
+
+    A float QA band (e.g. read into a float stack) is cast to integers; NaN is not kept.
+    '''
+    if spec is None:
+        return np.ones(qa.shape, dtype=bool)
+    valid = None
+    if not np.issubdtype(qa.dtype, np.integer):
+        valid = np.isfinite(qa)
+        qa = np.where(valid, qa, 0).astype(np.int64)
+    keep = _reject_bits(qa, spec['bits']) if 'bits' in spec else _reject_classes(qa, spec['classes'])
+    return keep if valid is None else keep & valid
+
+def sr_mask(qa, satellite):
+    '''Boolean keep-mask matching cloudmask.sr (QA_PIXEL for Landsat, SCL for S2).'''
+    return keep_mask(qa, cloudmask.maskSpec(satellite, 'SR'))
+
+def toa_mask(qa, satellite):
+    '''Boolean keep-mask matching cloudmask.toa (QA_PIXEL for Landsat, QA60 for S2).'''
+    return keep_mask(qa, cloudmask.maskSpec(satellite, 'TOA'))
+
+def qa_band(satellite, product='SR'):
+    spec = cloudmask.maskSpec(satellite, product)
+    return spec['band'] if spec else None
+
+
+def compute(bands, satellite, names=('NDVI', 'EVI', 'SAVI', 'TCAP'), product='SR', out=None):
+    '''Compute indices from native-band DN arrays.
+
+    Parameters:
+        bands: dict of sensor band name -> 2D array (must include the QA band for masking)
+        satellite: a key of indices.SENSORS
+        names: indices to compute; unsupported ones are skipped like indices.addIndices
+        product: 'SR' or 'TOA', selects the QA mask
+        out: optional preallocated (len(output_names(names)), rows, cols) float32 buffer
+
+    Returns:
+        (list of output band names, float32 array with masked pixels set to NaN)
+    '''
+    sat = str(satellite).upper()
+    sensor = indices.SENSORS[sat]
+    names = [n for n in names if indices.supported(sat, n)]
+    shape = next(iter(bands.values())).shape
+    if out is None:
+        out = np.empty((len(output_names(names)),) + shape, dtype=np.float32)
+
+    needed = []
+    for n in names:
+        needed += [b for b in indices.INDICES[n][0] if b not in needed]
+    refl = {b: scale(bands[sensor['bands'][b]], sat) for b in needed}
+
+    i = 0
+    for n in names:
+        width = len(indices.TCAP_NAMES) if n == 'TCAP' else 1
+        LOCAL_INDICES[n](refl, sat, out[i:i + width])
+        i += width
+
+    qa = qa_band(sat, product)
+    if qa is not None and qa in bands:
+        keep = sr_mask(bands[qa], sat) if product == 'SR' else toa_mask(bands[qa], sat)
+        out[:, ~keep] = np.nan
+    return output_names(names), out
+
+
+def _band_names(src, band_names, satellite):
+    if band_names:
+        return list(band_names)
+    if all(src.descriptions):
+        return list(src.descriptions)  # GEE exports carry band names as descriptions
+    return [f'B{i + 1}' for i in range(src.count)]  # e.g. PlanetScope analytic: B1..B4
+
+def process(src_path, dst_path, satellite, names=('NDVI', 'EVI', 'SAVI', 'TCAP'),
+            product='SR', band_names=None, block_size=512):
+    '''Compute indices for a multi-band GeoTIFF, one window at a time.
+
+    Input and output buffers are allocated once per window shape and reused, so
+    memory is bounded by block_size rather than by the raster size.
+
+    Parameters:
+        src_path: multi-band GeoTIFF in the sensor's native bands
+        dst_path: float32 GeoTIFF to write, one band per output index
+        band_names: band names in file order, if the file has no band descriptions
+        block_size: window edge length in pixels, rounded down to a multiple of 16
+            (the GeoTIFF tile size must be one)
+    '''
+    if rasterio is None:
+        raise ImportError("rasterio is required for local GeoTIFF processing")
+    block_size = max(int(block_size) // 16 * 16, 16)
+
+    sat = str(satellite).upper()
+    sensor = indices.SENSORS[sat]
+    names = [n for n in names if indices.supported(sat, n)]
+    outputs = output_names(names)
+
+    with rasterio.open(src_path) as src:
+        file_bands = _band_names(src, band_names, sat)
+        wanted = [sensor['bands'][b] for n in names for b in indices.INDICES[n][0]]
+        qa = qa_band(sat, product)
+        if qa in file_bands:
+            wanted.append(qa)
+        wanted = list(dict.fromkeys(wanted))
+        indexes = [file_bands.index(b) + 1 for b in wanted]
+
+        profile = src.profile.copy()
+        profile.update(count=len(outputs), dtype='float32', nodata=np.nan,
+                       tiled=True, blockxsize=block_size, blockysize=block_size,
+                       compress='deflate')
+
+        buffers = {}
+        try:
+            with rasterio.open(dst_path, 'w', **profile) as dst:
+                for i, name in enumerate(outputs, start=1):
+                    dst.set_band_description(i, name)
+                for row in range(0, src.height, block_size):
+                    for col in range(0, src.width, block_size):
+                        window = Window(col, row, min(block_size, src.width - col),
+                                        min(block_size, src.height - row))
+                        shape = (int(window.height), int(window.width))
+                        if shape not in buffers:  # at most four shapes: interior and edges
+                            buffers[shape] = (
+                                np.empty((len(indexes),) + shape, dtype=src.dtypes[0]),
+                                np.empty((len(outputs),) + shape, dtype=np.float32),
+                            )
+                        inbuf, outbuf = buffers[shape]
+                        src.read(indexes, window=window, out=inbuf)
+                        compute(dict(zip(wanted, inbuf)), sat, names, product=product, out=outbuf)
+                        dst.write(outbuf, window=window)
+        except BaseException:
+            if os.path.exists(dst_path):
+                os.remove(dst_path)  # never leave a partly written raster behind
+            raise
+    return outputs
@@ -1,35 +1,58 @@
 import ee
-import geemap
-import pandas as pd
-import numpy as np
-import json
-import matplotlib.pyplot as plt
-import requests
-from requests.auth import HTTPBasicAuth
 import os
-import planet
+import json
 import asyncio
-import geopandas as gpd
-from requests.auth import HTTPBasicAuth
+import concurrent.futures
+import contextlib
+import functools
+import time
+import random
+import warnings
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from . import indices, profiler
+from ._lazy import lazy_import
+from .catalog import AssetCatalog, CATALOG_PATH
+from .items import ItemStore
+from .ledger import OrderLedger, IN_FLIGHT, DELIVERED, LEDGER_PATH
+from .preflight import default_preflight
+
+# Heavy, Planet-only dependencies are imported on first use
+planet = lazy_import('planet')
+
+# Indices collection() adds by default; ones a sensor cannot support are skipped (PS: NDVI only)
+SR_INDICES = ('NDVI', 'EVI', 'SAVI', 'TCAP')
 
-from planet.subscription_request import (
-    toar_tool,
-    reproject_tool,
-    file_format_tool,
-    build_request,
-    catalog_source,
-)
+# Former per-index callables of collection(); accepted with a warning, indices come from index_names
+_DEPRECATED_ADDBANDS = ('ndvi_addBand', 'evi_addBand', 'savi_addBand', 'tct_addBands')
 
+GEE_PROJECT = 'seer-hl'
+GEE_COLLECTION = 'planet-test'
+GEE_ASSET = f'projects/{GEE_PROJECT}/assets/{GEE_COLLECTION}'
 
-cloud_config = planet.order_request.google_earth_engine(
-    project='seer-hl', collection='planet-test')
 
-delivery_config = planet.order_request.delivery(cloud_config=cloud_config)
+@functools.lru_cache(maxsize=None)
+def get_cloud_config():
+    return planet.order_request.google_earth_engine(
+        project=GEE_PROJECT, collection=GEE_COLLECTION)
 
-master_ic = ee.ImageCollection('projects/seer-hl/assets/planet-test')
+@functools.lru_cache(maxsize=None)
+def get_delivery_config():
+    return planet.order_request.delivery(cloud_config=get_cloud_config())
 
-import os, requests
-from requests.auth import HTTPBasicAuth
+@functools.lru_cache(maxsize=None)
+def get_master_ic():
+    return ee.ImageCollection(GEE_ASSET)
+
+def __getattr__(name):
+    # cloud_config / delivery_config / master_ic used to be built at import time
+    builders = {'cloud_config': get_cloud_config,
+                'delivery_config': get_delivery_config,
+                'master_ic': get_master_ic}
+    if name in builders:
+        return builders[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 PL_API_KEY = os.environ.get("PL_API_KEY", "")
 
@@ -38,48 +61,296 @@ def empty_ic():
     return ee.ImageCollection.fromImages([dummy]) \
         .filter(ee.Filter.eq('system:index', 'NOPE'))
 
-def has_sr(item_id: str) -> bool:
-    url = f"https://api.planet.com/data/v1/item-types/PSScene/items/{item_id}/assets/"
-    r = requests.get(url, auth=HTTPBasicAuth(PL_API_KEY, ""))
-    if r.status_code != 200:
-        return False
-    a = r.json().get("ortho_analytic_4b_sr")
-    return bool(a and "download" in a.get("_permissions", []))
+async def filter_sr_ids_async(item_ids):
+    '''Item IDs whose SR asset can be downloaded (concurrent and cached, see preflight.SRPreflight).'''
+    keep, _ = await default_preflight().filter(list(item_ids))
+    return keep
 
 def filter_sr_ids(item_ids):
-    return [i for i in item_ids if has_sr(i)]
+    '''Blocking filter_sr_ids_async. Inside a running event loop (e.g. Jupyter) the check
+    runs on a worker thread with its own loop; await filter_sr_ids_async there instead.'''
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(filter_sr_ids_async(item_ids))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, filter_sr_ids_async(item_ids)).result()
+
+# Planet SDK exceptions and httpx transport errors worth retrying. The SDK builds its
+# exceptions from the response text alone, so there is no Retry-After header to honour.
+RETRY_ERRORS = ('TooManyRequests', 'ServerError', 'BadGateway', 'ConnectError', 'ConnectTimeout',
+                'ReadError', 'ReadTimeout', 'RemoteProtocolError')
+# Of those, the ones after which the server may still have processed the request
+AMBIGUOUS_ERRORS = ('ServerError', 'BadGateway', 'ReadError', 'ReadTimeout', 'RemoteProtocolError')
+
+def _is_retryable(error: Exception) -> bool:
+    return type(error).__name__ in RETRY_ERRORS
+
+async def with_retries(fn, *args, limiter=None, max_retries=5, base_delay=1.0, max_delay=120.0,
+                       recover=None, **kwargs):
+    '''Await fn(*args, **kwargs), retrying rate-limited and transient failures.
+
+    Exponential backoff with full jitter. This is the only retry layer: the planet
+    Session's own retries are turned off in planet_orders_client. The optional
+    limiter (an asyncio.Semaphore) bounds how many requests are in flight across
+    all months.
 
-async def create_and_deliver_order(order_request, client):
+    Parameters:
+        recover: Optional async fn(error) called before each retry; a non-None result
+            is returned instead of retrying (see place_order)
+    '''
+    for attempt in range(max_retries + 1):
+        try:
+            if limiter is None:
+                with profiler.span('planet.http', fn.__name__):
+                    return await fn(*args, **kwargs)
+            async with limiter:
+                with profiler.span('planet.http', fn.__name__):
+                    return await fn(*args, **kwargs)
+        except Exception as e:
+            if attempt == max_retries or not _is_retryable(e):
+                raise
+            if recover is not None:
+                recovered = await recover(e)
+                if recovered is not None:
+                    return recovered
+            delay = random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+            print(f"{type(e).__name__}; retrying in {delay:.1f}s (attempt {attempt + 1}/{max_retries})")
+            await asyncio.sleep(delay)
+
+def _created_seconds(order) -> Optional[float]:
+    created = order.get('created_on')
+    if not created:
+        return None
+    return datetime.fromisoformat(created.replace('Z', '+00:00')).timestamp()
+
+async def place_order(order_request, client, limiter=None, skew=60.0):
+    '''create_order that does not place duplicates.
+
+    create_order is a non-idempotent POST: after a timeout or server error the order
+    may exist anyway. Before each retry after such an error, orders with the request's
+    name created since the first attempt (less skew seconds) are listed, and the
+    newest one is returned instead of posting again.
+    '''
+    started = time.time() - skew
+    name = order_request.get('name')
+
+    async def recover(error):
+        if type(error).__name__ not in AMBIGUOUS_ERRORS or not name:
+            return None
+        async def named():
+            return [o async for o in client.list_orders(name=name, limit=0)]
+        placed = [o for o in await with_retries(named, limiter=limiter)
+                  if (_created_seconds(o) or 0) >= started]
+        if not placed:
+            return None
+        order = max(placed, key=_created_seconds)
+        print(f"{name}: order {order['id']} was placed despite {type(error).__name__}; not resubmitting")
+        return order
+
+    return await with_retries(client.create_order, order_request, limiter=limiter, recover=recover)
+
+async def create_and_deliver_order(order_request, client, limiter=None, on_state=None, poller=None):
     '''Create and deliver an order.
 
     Parameters:
         order_request: An order request
         client: An Order client object
+        limiter: Optional asyncio.Semaphore shared by every order in the run
+        on_state: Optional callback (order_id, state, details=None), e.g. OrderLedger.tracker
+        poller: Optional OrderPoller shared by every order in the run
+    '''
+    # Place an order to the Orders API
+    order = await place_order(order_request, client, limiter)
+    if on_state is not None:
+        on_state(order['id'], order.get('state', 'queued'))
+    return await wait_for_order(order['id'], client, limiter, on_state, poller)
+
+async def wait_for_order(order_id, client, limiter=None, on_state=None, poller=None):
+    '''Wait on an already placed order (new or resumed from the ledger) and return its details.
+
+    With a shared OrderPoller the order is tracked by the run's single polling loop;
+    otherwise it gets its own client.wait loop and StateBar.
     '''
-    with planet.reporting.StateBar(state='creating') as reporter:
-        # Place an order to the Orders API
-        order = await client.create_order(order_request)
-        reporter.update(state='created', order_id=order['id'])
+    if poller is not None:
+        def changed(state):
+            print(f"Order {order_id}: {state}")
+            if on_state is not None:
+                on_state(order_id, state)
+        order_details = await poller.wait(order_id, callback=changed)
+        if on_state is not None:
+            on_state(order_id, order_details.get('state'), order_details)
+        return order_details
+
+    with planet.reporting.StateBar(state='created', order_id=order_id) as reporter:
+        def callback(state):
+            reporter.update_state(state)
+            if on_state is not None:
+                on_state(order_id, state)
         # Wait while the order is being completed
-        await client.wait(order['id'],
-                          callback=reporter.update_state,
-                          max_attempts=0)
+        with profiler.span('planet.wait', order_id):
+            # Restarting the wait after a transient error is safe; it only polls
+            await with_retries(client.wait, order_id,
+                               callback=callback,
+                               max_attempts=0)
 
     # Grab the details of the orders
-    order_details = await client.get_order(order_id=order['id'])
+    order_details = await with_retries(client.get_order, order_id=order_id, limiter=limiter)
+    if on_state is not None:
+        on_state(order_id, order_details.get('state'), order_details)
 
     return order_details
 
 
+TERMINAL_STATES = ('success', 'partial', 'failed', 'cancelled')
+
+def _rfc3339(seconds):
+    return datetime.fromtimestamp(seconds, tz=timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+class OrderPoller:
+    '''One polling loop for every in-flight order of a run.
+
+    Each tick lists the orders modified since the previous tick (with some overlap
+    for clock skew) and routes state changes to per-order callbacks and futures, so
+    waiting on many orders costs a few list requests per interval. The interval
+    adapts to how long pending orders have gone without a state change: freshly
+    placed orders are polled often, long-queued ones less so. An order the listing
+    has not shown yet, or not for stale_after seconds, is fetched on its own.
+
+    Parameters:
+        client: orders client with list_orders(last_modified=..., limit=...) and get_order
+        limiter: Optional asyncio.Semaphore shared with the rest of the run
+        min_interval / max_interval: bounds on seconds between ticks
+        age_factor: interval as a fraction of the shortest time since a pending order changed
+    '''
+
+    def __init__(self, client, limiter=None, min_interval=5.0, max_interval=120.0, age_factor=0.1,
+                 overlap=300.0, stale_after=600.0):
+        self.client = client
+        self.limiter = limiter
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.age_factor = age_factor
+        self.overlap = overlap
+        self.stale_after = stale_after
+        self.requests = 0
+        self._pending = {}
+        self._since = None
+        self._last_poll = 0.0
+        self._task = None
+        self._wake = asyncio.Event()
+
+    def watch(self, order_id, callback=None) -> asyncio.Future:
+        '''Future resolving to the order's details once it reaches a terminal state.'''
+        now = time.time()
+        entry = self._pending.get(order_id)
+        if entry is None:
+            # 'seen' starts at 0: an order the first tick's listing does not show (e.g. one
+            # resumed from the ledger that finished while the kernel was down) is fetched then
+            entry = self._pending[order_id] = {
+                'future': asyncio.get_running_loop().create_future(),
+                'callbacks': [], 'state': None, 'changed': now, 'seen': 0.0,
+            }
+            since = now - self.overlap
+            self._since = since if self._since is None else min(self._since, since)
+        if callback is not None:
+            entry['callbacks'].append(callback)
+        self._wake.set()
+        if self._task is None or self._task.done():
+            self._last_poll = now  # first tick after min_interval, not immediately
+            self._task = asyncio.create_task(self._run())
+        return entry['future']
+
+    async def wait(self, order_id, callback=None) -> dict:
+        return await asyncio.shield(self.watch(order_id, callback))
 
-async def submit_month_order(month_order):
+    def interval(self) -> float:
+        if not self._pending:
+            return self.max_interval
+        quiet = time.time() - max(e['changed'] for e in self._pending.values())
+        return min(self.max_interval, max(self.min_interval, self.age_factor * quiet))
+
+    def _update(self, order, now):
+        entry = self._pending.get(order.get('id'))
+        if entry is None:
+            return
+        entry['seen'] = now
+        state = order.get('state')
+        if state != entry['state']:
+            entry['state'], entry['changed'] = state, now
+            for callback in entry['callbacks']:
+                callback(state)
+        if state in TERMINAL_STATES:
+            del self._pending[order['id']]
+            if not entry['future'].done():
+                entry['future'].set_result(order)
+
+    async def poll(self):
+        '''One tick: a single list call, plus get_order for orders the listing has gone quiet on.'''
+        start = time.time()
+        client = self.client
+
+        async def list_orders():
+            return [o async for o in client.list_orders(last_modified=f'{_rfc3339(self._since)}/..', limit=0)]
+
+        orders = await with_retries(list_orders, limiter=self.limiter)
+        self.requests += 1
+        self._since = start - self.overlap
+        for order in orders:
+            self._update(order, start)
+        for order_id, entry in list(self._pending.items()):
+            if start - entry['seen'] > self.stale_after:
+                order = await with_retries(client.get_order, order_id=order_id, limiter=self.limiter)
+                self.requests += 1
+                self._update(order, time.time())
+        self._last_poll = start
+
+    async def _run(self):
+        try:
+            while self._pending:
+                # Sleep until the next tick; a newly watched order shortens the wait
+                while True:
+                    timeout = self._last_poll + self.interval() - time.time()
+                    if timeout <= 0:
+                        break
+                    self._wake.clear()
+                    try:
+                        await asyncio.wait_for(self._wake.wait(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                await self.poll()
+        except Exception as e:
+            for entry in self._pending.values():
+                if not entry['future'].done():
+                    entry['future'].set_exception(e)
+            self._pending.clear()
+
+    async def close(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+
+
+@contextlib.asynccontextmanager
+async def planet_orders_client(base_url=None):
+    '''Orders client for one run.
+
+    Anything exposing async create_order / get_order / wait(order_id, callback, max_attempts)
+    and an async-iterator list_orders(name=..., last_modified=..., limit=...) can stand in for it, e.g. a client pointed at a local fake orders server via base_url.
+    '''
     async with planet.Session() as ps:
-        client = ps.client('orders')
-        order_details = await create_and_deliver_order(month_order, client)
-        return order_details
+        # with_retries does the retrying; the session's own retries would repeat every
+        # attempt (create_order POSTs included) up to MAX_RETRIES more times
+        ps.max_retries = 0
+        yield ps.client('orders', base_url=base_url) if base_url else ps.client('orders')
 
-import json
-from typing import List, Optional
+async def submit_month_order(month_order, client=None, limiter=None, on_state=None, poller=None):
+    if client is not None:
+        return await create_and_deliver_order(month_order, client, limiter, on_state, poller)
+    async with planet_orders_client() as client:
+        order_details = await create_and_deliver_order(month_order, client, limiter, on_state)
+        return order_details
 
 def _parse_error_payload(error: Exception) -> Optional[dict]:
     # Try to extract JSON payload from httpx / Planet exceptions
@@ -133,13 +404,32 @@ def _extract_inaccessible_item_ids(error: Exception) -> List[str]: ## From Plank
     return inaccessible
 
 
-async def submit_order_filtering_inaccessible(
-    name: str,
-    item_ids: List[str],
-    product_bundle: str,
-    delivery_config
-):
-    # try full batch first
+async def _resume_tracked(name, item_ids, product_bundle, client=None, limiter=None, ledger=None, poller=None):
+    # Details of a delivered (skipped) or in-flight (resumed) ledger order; None if one must be placed
+    if ledger is None:
+        return None
+    entry = ledger.lookup(name, item_ids, product_bundle)
+    if entry and entry['state'] in DELIVERED and entry['details']:
+        print(f"{name}: order {entry['order_id']} already delivered; skipping")
+        return entry['details']
+    if entry and entry['state'] in IN_FLIGHT:
+        print(f"{name}: resuming wait on order {entry['order_id']}")
+        on_state = ledger.tracker(name, item_ids, product_bundle)
+        if client is not None:
+            return await wait_for_order(entry['order_id'], client, limiter, on_state, poller)
+        async with planet_orders_client() as client:
+            return await wait_for_order(entry['order_id'], client, limiter, on_state)
+    return None
+
+async def _submit_tracked(name, item_ids, product_bundle, delivery_config,
+                          client=None, limiter=None, ledger=None, order_name=None, poller=None,
+                          key_ids=None):
+    # Place one order for exactly these item IDs; the ledger records it under key_ids
+    # (the item list the caller asked for, before any filtering)
+    on_state = None
+    if ledger is not None:
+        on_state = ledger.tracker(name, item_ids if key_ids is None else key_ids, product_bundle)
+
     data_products = [
         planet.order_request.product(
             item_ids=item_ids,
@@ -148,94 +438,238 @@ async def submit_order_filtering_inaccessible(
         )
     ]
     month_order = planet.order_request.build_request(
-        name=name, products=data_products, delivery=delivery_config
+        name=order_name or name, products=data_products, delivery=delivery_config
     )
+    return await submit_month_order(month_order, client, limiter, on_state, poller)
+
+async def submit_order_filtering_inaccessible(
+    name: str,
+    item_ids: List[str],
+    product_bundle: str,
+    delivery_config,
+    client=None,
+    limiter=None,
+    ledger=None,
+    preflight=None,
+    poller=None
+):
+    # The ledger is keyed by the requested item IDs, so delivered or in-flight orders are
+    # found without any preflight requests, whatever the preflight would answer today
+    details = await _resume_tracked(name, item_ids, product_bundle, client, limiter, ledger, poller)
+    if details is not None:
+        return details
+    order_ids = item_ids
+    if preflight is not None:
+        # Drop items without SR download access before ordering, not after a failed order
+        order_ids, dropped = await preflight.filter(item_ids)
+        if dropped:
+            print(f"{name}: {len(dropped)} items lack SR access; ordering {len(order_ids)}")
+        if not order_ids:
+            raise RuntimeError(f"All items inaccessible for {name}: {dropped}")
+    # try full batch first; inaccessible items that slip past preflight are still filtered
     try:
-        return await submit_month_order(month_order)
+        return await _submit_tracked(name, order_ids, product_bundle, delivery_config,
+                                     client, limiter, ledger, poller=poller, key_ids=item_ids)
     except Exception as e:
         bad_ids = _extract_inaccessible_item_ids(e)
         if not bad_ids:
             raise
-        keep_ids = [i for i in item_ids if i not in bad_ids]
+        keep_ids = [i for i in order_ids if i not in bad_ids]
         print(f"Filtering {len(bad_ids)} inaccessible items; proceeding with {len(keep_ids)}")
         if not keep_ids:
             raise RuntimeError(f"All items inaccessible for {name}: {bad_ids}") from e
         # rebuild and resubmit without inaccessible items
-        data_products = [
-            planet.order_request.product(
-                item_ids=keep_ids,
+        return await _submit_tracked(name, keep_ids, product_bundle, delivery_config,
+                                     client, limiter, ledger, order_name=f"{name}-filtered", poller=poller,
+                                     key_ids=item_ids)
+        
+
+# Items per order; Planet caps a single order at 500
+ORDER_CHUNK_SIZE = 500
+
+def merge_order_details(name, details, errors=None):
+    '''Fold the per-chunk results of one month back into a single month result.'''
+    errors = errors or {}
+    if len(details) == 1 and not errors:
+        return details[0]
+    states = [d.get('state') for d in details]
+    return {
+        'name': name,
+        'state': 'success' if states and not errors and all(st == 'success' for st in states) else 'partial',
+        'orders': details,
+        'errors': {k: f"{type(e).__name__}: {e}" for k, e in errors.items()},
+    }
+
+async def submit_month_in_chunks(name, item_ids, product_bundle, delivery_config, client=None,
+                                 limiter=None, ledger=None, preflight=None, chunk_size=ORDER_CHUNK_SIZE,
+                                 poller=None):
+    '''Split one month's items into orders of at most chunk_size and run them concurrently.
+
+    Each chunk is preflighted and filtered on its own, so an inaccessible item only
+    costs its chunk a resubmit. A month fails only if every chunk fails.
+    '''
+    chunks = [item_ids[i:i + chunk_size] for i in range(0, len(item_ids), chunk_size)]
+    names = [name] if len(chunks) == 1 else [f"{name}-{i + 1}of{len(chunks)}" for i in range(len(chunks))]
+    if len(chunks) > 1:
+        print(f"{name}: splitting {len(item_ids)} items into {len(chunks)} orders")
+
+    outcomes = await asyncio.gather(*[
+        submit_order_filtering_inaccessible(
+            name=chunk_name,
+            item_ids=chunk,
+            product_bundle=product_bundle,
+            delivery_config=delivery_config,
+            client=client,
+            limiter=limiter,
+            ledger=ledger,
+            preflight=preflight,
+            poller=poller
+        )
+        for chunk_name, chunk in zip(names, chunks)
+    ], return_exceptions=True)
+
+    details, errors = [], {}
+    for chunk_name, outcome in zip(names, outcomes):
+        if isinstance(outcome, BaseException):
+            errors[chunk_name] = outcome
+        else:
+            details.append(outcome)
+    if not details:
+        first = next(iter(errors.values()))
+        if len(errors) == 1:
+            raise first
+        raise RuntimeError(f"All {len(errors)} orders failed for {name}") from first
+    return merge_order_details(name, details, errors)
+
+async def submit_month_orders(month_orders, product_bundle, delivery_config, max_concurrency=4,
+                              ledger=None, client_factory=planet_orders_client, preflight=None,
+                              chunk_size=ORDER_CHUNK_SIZE, poller_factory=None):
+    '''Submit and await every month's order through one shared Planet session.
+
+    Parameters:
+        month_orders: dict of month name -> list of item IDs
+        max_concurrency: Orders API requests allowed in flight at once
+        ledger: Optional OrderLedger; delivered months are skipped and in-flight ones resumed
+        client_factory: async context manager yielding an orders client
+        preflight: Optional SRPreflight run on each month's items before ordering
+        chunk_size: maximum items per order; larger months become several orders
+        poller_factory: fn(client, limiter) -> OrderPoller (default OrderPoller) tracking every
+            order in one polling loop; False gives each order its own wait loop
+
+    Returns:
+        (results, failures): month -> order details, month -> exception
+    '''
+    limiter = asyncio.Semaphore(max_concurrency)
+    months = list(month_orders.keys())
+    async with client_factory() as client:
+        if poller_factory is False:
+            poller = None
+        else:
+            poller = (poller_factory or OrderPoller)(client, limiter)
+        outcomes = await asyncio.gather(*[
+            submit_month_in_chunks(
+                name=month,
+                item_ids=month_orders[month],
                 product_bundle=product_bundle,
-                item_type='PSScene'
+                delivery_config=delivery_config,
+                client=client,
+                limiter=limiter,
+                ledger=ledger,
+                preflight=preflight,
+                chunk_size=chunk_size,
+                poller=poller
             )
-        ]
-        month_order = planet.order_request.build_request(
-            name=f"{name}-filtered", products=data_products, delivery=delivery_config
-        )
-        return await submit_month_order(month_order)
-        
+            for month in months
+        ], return_exceptions=True)
+        if poller is not None:
+            await poller.close()
+
+    results, failures = {}, {}
+    for month, outcome in zip(months, outcomes):
+        if isinstance(outcome, BaseException):
+            failures[month] = outcome
+        else:
+            results[month] = outcome
+    return results, failures
 
 async def collection(satellite, date_start, date_end, step, aoi_fc, aoi_path, SRDict, TOADict, cloudDict,
-                     cloudmask_sr, ndvi_addBand, evi_addBand, savi_addBand, tct_addBands):
+                     cloudmask_sr, index_names=SR_INDICES, cloud_prob_max=None, max_concurrency=4,
+                     ledger_path=LEDGER_PATH, chunk_size=ORDER_CHUNK_SIZE,
+                     catalog_path=CATALOG_PATH, results_store=None, **deprecated):
+    '''Per-period SR collections with index bands added (Landsat/S2 are cloud masked first;
+    PlanetScope plans are ordered and delivered to GEE first).
+
+    Parameters:
+        index_names: names from indices.INDICES to add, in one pass per image
+        cloud_prob_max: S2 only; passed to cloudmask_sr to also mask pixels whose s2cloudless
+            probability is at or above it (True: cloudmask.S2_CLOUD_PROB_MAX). SRDict must
+            come from parse.retrieveImagery(..., cloud_prob=True), which joins the probabilities.
+        ledger_path / catalog_path: PS only; SQLite files for the order ledger and the delivered
+            asset catalog, next to the imagery cache in ~/.cache/gee_multitool by default.
+            None disables them.
+    '''
+    unknown = sorted(set(deprecated) - set(_DEPRECATED_ADDBANDS))
+    if unknown:
+        raise TypeError(f"collection() got unexpected keyword arguments: {', '.join(unknown)}")
+    if deprecated:
+        warnings.warn(f"collection(): {', '.join(sorted(deprecated))} no longer used; pass index_names instead",
+                      DeprecationWarning, stacklevel=2)
+    index_names = tuple(index_names)
+
     if satellite == 'PS':
         
-        tasks = []
-        for month in sorted(SRDict.keys()):
-            entry = SRDict[month]
-            items = entry.get("items", [])
-            item_ids = [item["id"] for item in items if item.get("id")]
-            if not item_ids:
-                continue
+        # Plain plan dicts are converted once; IDs are then read column-wise per month
+        month_orders = ItemStore.from_plans(SRDict).ids_by_month()
+        for month, item_ids in month_orders.items():
             print(f"Submitting Planet order for {month} ({len(item_ids)} scenes)")
-           
-            tasks.append(
-                submit_order_filtering_inaccessible(
-                    name=month,
-                    item_ids=item_ids,
-                    product_bundle='analytic_sr_udm2',
-                    delivery_config=delivery_config
-                )
-            )
-        results = await asyncio.gather(*tasks)
+
+        ledger = OrderLedger(ledger_path) if ledger_path else None
+        results, failures = await submit_month_orders(
+            month_orders,
+            product_bundle='analytic_sr_udm2',
+            delivery_config=get_delivery_config(),
+            max_concurrency=max_concurrency,
+            ledger=ledger,
+            preflight=default_preflight(),
+            chunk_size=chunk_size
+        )
+        for month, error in failures.items():
+            print(f"Planet order for {month} failed: {type(error).__name__}: {error}")
+        if results_store is not None:
+            results_store.add_orders(results, failures, satellite)
         print("Planet order delivery to GEE completed")
         preprocessed_SRDict = {}
 
-        for month in sorted(SRDict.keys()):
-            start = ee.Date(month + '-01')
-            end   = start.advance(1, 'month')
-        
-            ic = master_ic.filterDate(start, end)
-            ic = ee.ImageCollection(ee.Algorithms.If(ic.size().gt(0), ic, empty_ic()))
-        
-            preprocessed_SRDict[month] = ic
+        if catalog_path:
+            # Only assets changed since the last sync are listed (the whole collection once a day);
+            # months are local lookups
+            catalog = AssetCatalog(GEE_ASSET, catalog_path)
+            print(f"Catalog sync: {catalog.sync(ledger=ledger)} new, updated or removed assets")
+            for month in sorted(SRDict.keys()):
+                preprocessed_SRDict[month] = catalog.month(month)
+            catalog.close()
+        else:
+            for month in sorted(SRDict.keys()):
+                start = ee.Date(month + '-01')
+                end   = start.advance(1, 'month')
+
+                ic = get_master_ic().filterDate(start, end)
+                ic = ee.ImageCollection(ee.Algorithms.If(ic.size().gt(0), ic, empty_ic()))
+
+                preprocessed_SRDict[month] = ic
         processed_SRDict = {}
-        for key, SRcollection in SRDict.items():
-            processed_SRDict[key] = (
-                SRcollection
-                #.map(lambda img: cloudmask_sr(img, satellite))
-                .map(lambda img: ndvi_addBand(img, satellite))
-                #.map(lambda img: evi_addBand(img, satellite))
-                #.map(lambda img: savi_addBand(img, satellite))
-                #.map(lambda img: tct_addBands(img, satellite))
+        for key, SRcollection in preprocessed_SRDict.items():
+            processed_SRDict[key] = SRcollection.map(
+                lambda img: indices.addIndices(img, satellite, index_names)
             )
         return processed_SRDict
 
-    # Otherwise process the SR ImageCollections by key (unchanged)
+    # Otherwise mask and add every SR index in a single pass per image
+    if cloud_prob_max is not None and str(satellite).upper() == 'S2':
+        cloudmask_sr = functools.partial(cloudmask_sr, cloud_prob_max=cloud_prob_max)
     processed_SRDict = {}
     for key, SRcollection in SRDict.items():
-        processed_SRDict[key] = (
-            SRcollection
-            .map(lambda img: cloudmask_sr(img, satellite))
-            .map(lambda img: ndvi_addBand(img, satellite))
-            .map(lambda img: evi_addBand(img, satellite))
-            .map(lambda img: savi_addBand(img, satellite))
+        processed_SRDict[key] = SRcollection.map(
+            lambda img: indices.addIndices(cloudmask_sr(img, satellite), satellite, index_names)
         )
-    processed_TOADict = {}
-    for key, TOAcollection in SRDict.items():
-         processed_SRDict[key] = (
-             TOAcollection
-            .map(lambda img: cloudmask_toa(img, satellite))
-            .map(lambda img: tct_addBands(img, satellite))
     return processed_SRDict
-
-
-        
\ No newline at end of file
@@ -1,71 +1,85 @@
 import ee
 
-import geemap
-import pandas as pd
-import numpy as np
-import json
-import matplotlib.pyplot as plt
-import requests
-from requests.auth import HTTPBasicAuth
 import os
-import planet
-import geopandas as gpd
+import time
+import hashlib
+import calendar
+import functools
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date, datetime, timezone
 
-from planet.subscription_request import (
-    toar_tool,
-    reproject_tool,
-    file_format_tool,
-    build_request,
-    catalog_source,
-)
+from . import cache as diskcache, cloudmask, indices
+from .items import ItemStore
 
 
 # API Key stored as an env variable
 PLANET_API_KEY = os.getenv('PL_API_KEY')
 
-COLLECTION = { ## Dictionary to handle Landsat 4-9
+COLLECTION_IDS = { ## Asset IDs for Landsat 4-9 and Sentinel-2; see getCollection
     'L4': {
-        'RAW': ee.ImageCollection('LANDSAT/LT04/C01/T1'),
-        'TOA': ee.ImageCollection('LANDSAT/LT04/C02/T1_TOA'),
-        'SR': ee.ImageCollection('LANDSAT/LT04/C02/T1_L2'),
-        'TIR': ['B6'],
-        'VISW': ['SR_B1', 'SR_B2', 'SR_B3', 'SR_B4', 'SR_B5', 'SR_B7', 'QA_PIXEL']
+        'RAW': 'LANDSAT/LT04/C01/T1',
+        'TOA': 'LANDSAT/LT04/C02/T1_TOA',
+        'SR': 'LANDSAT/LT04/C02/T1_L2',
     },
     'L5': {
-        'RAW': ee.ImageCollection('LANDSAT/LT05/C01/T1'),
-        'TOA': ee.ImageCollection('LANDSAT/LT05/C02/T1_TOA'),
-        'SR': ee.ImageCollection('LANDSAT/LT05/C02/T1_L2'),
-        'TIR': ['B6'],
-        'VISW': ['SR_B1', 'SR_B2', 'SR_B3', 'SR_B4', 'SR_B5', 'SR_B7', 'QA_PIXEL']
+        'RAW': 'LANDSAT/LT05/C01/T1',
+        'TOA': 'LANDSAT/LT05/C02/T1_TOA',
+        'SR': 'LANDSAT/LT05/C02/T1_L2',
     },
     'L7': {
-        'RAW':ee.ImageCollection("LANDSAT/LE07/C02/T1"),
-        'TOA': ee.ImageCollection('LANDSAT/LE07/C02/T1_TOA'),
-        'SR': ee.ImageCollection('LANDSAT/LE07/C02/T1_L2'),
-        'TIR': ['B6_VCID_1', 'B6_VCID_2'],
-        'VISW': ['SR_B1', 'SR_B2', 'SR_B3', 'SR_B4', 'SR_B5', 'SR_B7', 'QA_PIXEL']
+        'RAW': "LANDSAT/LE07/C02/T1",
+        'TOA': 'LANDSAT/LE07/C02/T1_TOA',
+        'SR': 'LANDSAT/LE07/C02/T1_L2',
     },
     'L8': {
-        'RAW': ee.ImageCollection("LANDSAT/LC08/C02/T1"),
-        'TOA': ee.ImageCollection('LANDSAT/LC08/C02/T1_TOA'),
-        'SR': ee.ImageCollection('LANDSAT/LC08/C02/T1_L2'),
-        'TIR': ['B10', 'B11'],
-        'VISW': ['SR_B1', 'SR_B2', 'SR_B3', 'SR_B4', 'SR_B5', 'SR_B6', 'SR_B7', 'QA_PIXEL']
+        'RAW': "LANDSAT/LC08/C02/T1",
+        'TOA': 'LANDSAT/LC08/C02/T1_TOA',
+        'SR': 'LANDSAT/LC08/C02/T1_L2',
     },
     'L9': {
-        'RAW': ee.ImageCollection('LANDSAT/LC09/C01/T1'),
-        'TOA': ee.ImageCollection('LANDSAT/LC09/C02/T1_TOA'),
-        'SR': ee.ImageCollection('LANDSAT/LC09/C02/T1_L2'),
-        'TIR': ['B10', 'B11'],
-        'VISW': ['SR_B1', 'SR_B2', 'SR_B3', 'SR_B4', 'SR_B5', 'SR_B6', 'SR_B7', 'QA_PIXEL']
+        'RAW': 'LANDSAT/LC09/C01/T1',
+        'TOA': 'LANDSAT/LC09/C02/T1_TOA',
+        'SR': 'LANDSAT/LC09/C02/T1_L2',
     },
     'S2' : {
-        'TOA': ee.ImageCollection('COPERNICUS/S2_HARMONIZED'),
-        'SR': ee.ImageCollection('COPERNICUS/S2_SR_HARMONIZED'),
-        'CLOUD_PROB': ee.ImageCollection('COPERNICUS/S2_CLOUD_PROBABILITY')
+        'TOA': 'COPERNICUS/S2_HARMONIZED',
+        'SR': 'COPERNICUS/S2_SR_HARMONIZED',
+        'CLOUD_PROB': 'COPERNICUS/S2_CLOUD_PROBABILITY'
     }
 }
 
+BANDS = { ## Thermal and VIS/SWIR band lists per sensor
+    'L4': {'TIR': ['B6'],
+           'VISW': ['SR_B1', 'SR_B2', 'SR_B3', 'SR_B4', 'SR_B5', 'SR_B7', 'QA_PIXEL']},
+    'L5': {'TIR': ['B6'],
+           'VISW': ['SR_B1', 'SR_B2', 'SR_B3', 'SR_B4', 'SR_B5', 'SR_B7', 'QA_PIXEL']},
+    'L7': {'TIR': ['B6_VCID_1', 'B6_VCID_2'],
+           'VISW': ['SR_B1', 'SR_B2', 'SR_B3', 'SR_B4', 'SR_B5', 'SR_B7', 'QA_PIXEL']},
+    'L8': {'TIR': ['B10', 'B11'],
+           'VISW': ['SR_B1', 'SR_B2', 'SR_B3', 'SR_B4', 'SR_B5', 'SR_B6', 'SR_B7', 'QA_PIXEL']},
+    'L9': {'TIR': ['B10', 'B11'],
+           'VISW': ['SR_B1', 'SR_B2', 'SR_B3', 'SR_B4', 'SR_B5', 'SR_B6', 'SR_B7', 'QA_PIXEL']},
+}
+
+@functools.lru_cache(maxsize=None)
+def getCollection(satellite, product):
+    # ee.ImageCollection objects are built on first use, not at import time
+    return ee.ImageCollection(COLLECTION_IDS[satellite][product])
+
+@functools.lru_cache(maxsize=None)
+def _buildCollection():
+    table = {}
+    for sat, products in COLLECTION_IDS.items():
+        table[sat] = {product: getCollection(sat, product) for product in products}
+        table[sat].update(BANDS.get(sat, {}))
+    return table
+
+def __getattr__(name):
+    # COLLECTION keeps its old shape for callers, but is only built when first read
+    if name == 'COLLECTION':
+        return _buildCollection()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 def getCloudInfo(collection):
 
     size = collection.size().getInfo()
@@ -75,14 +89,37 @@ def getCloudInfo(collection):
 
     features = collection.map(extractInfo).getInfo()
 
+    return summarizeCloudInfo(features['features'])
+
+def summarizeCloudInfo(features):
+    # Client-side half of getCloudInfo: turns extractInfo features into the cloudDict entry
     images = [{
         'date': f['properties']['date'],
         'cloud_cover': f['properties']['cloud_cover']
-    } for f in features['features']]
+    } for f in features]
 
     images = sorted(images, key=lambda x: x['date'])
 
-    return {'num_images': size, 'images': images}
+    return {'num_images': len(images), 'images': images}
+
+def getCloudInfoBatch(collections, chunk_size=48):
+    '''Cloud summaries for many filtered collections in as few getInfo calls as possible.
+
+    Parameters:
+        collections: dict of period key -> filtered ee.ImageCollection
+        chunk_size: number of periods evaluated per server call
+    '''
+    keys = list(collections.keys())
+    cloudDict = {}
+    for i in range(0, len(keys), chunk_size):
+        chunk = keys[i:i + chunk_size]
+        # One ee.Dictionary per chunk so the whole chunk is a single round-trip
+        info = ee.Dictionary({
+            key: collections[key].map(extractInfo) for key in chunk
+        }).getInfo()
+        for key in chunk:
+            cloudDict[key] = summarizeCloudInfo(info[key]['features'])
+    return cloudDict
 
 def extractInfo(img):
     return ee.Feature(None, {
@@ -96,19 +133,265 @@ def extractInfo(img):
 
 
 
-try:
-    from plaknit import planner as planner_cli
-except Exception:
-    planner_cli = None
+@functools.lru_cache(maxsize=None)
+def plannerCli():
+    # plaknit is only needed (and only imported) for the PlanetScope path
+    try:
+        from plaknit import planner
+    except Exception:
+        return None
+    return planner
+
+# plan_monthly_composites settings for the PlanetScope path; all of them are part of the plan cache key
+PS_PLAN_PARAMS = {
+    'item_type': 'PSScene',
+    'instrument_types': ('PS2.SD',),  # or ("PS2",) / ("PSB.SD",)
+    'cloud_max': 0.15,
+    'sun_elevation_min': 35,
+    'coverage_target': 0.98,
+    'min_clear_fraction': 0.8,
+    'min_clear_obs': 3,
+    'tile_size_m': 1000,
+}
+
+def planMonths(start_date, end_date):
+    '''Calendar months of an inclusive YYYY-MM-DD range, clipped to it, as the planner groups them.'''
+    start, end = date.fromisoformat(start_date), date.fromisoformat(end_date)
+    current, months = date(start.year, start.month, 1), []
+    while current <= end:
+        month_end = date(current.year, current.month, calendar.monthrange(current.year, current.month)[1])
+        months.append((current.strftime('%Y-%m'), max(current, start).isoformat(), min(month_end, end).isoformat()))
+        current = date(current.year + current.month // 12, current.month % 12 + 1, 1)
+    return months
+
+def _planMonth(aoi_path, start_date, end_date, params):
+    # Runs in a worker process; one plan_monthly_composites call for a single month
+    plan = plannerCli().plan_monthly_composites(
+        aoi_path=aoi_path, start_date=start_date, end_date=end_date, **params)
+    return next(iter(plan.values()), None)
+
+def planPlanetScope(aoi_path, start_date, end_date, params=None, max_workers=8, cache=True):
+    '''plan_monthly_composites split per month, planned in a process pool and cached on disk.
+
+    Cache keys hash the AOI file's bytes, the month's bounds and every planner
+    parameter, so extending the end date only plans the new (or now longer) month.
+    Months whose planned range ended before today are cached without expiry.
+
+    Returns:
+        dict of month (YYYY-MM) -> month plan, as plan_monthly_composites returns
+    '''
+    params = dict(PS_PLAN_PARAMS, **(params or {}))
+    store = diskcache.resolve(cache)
+    with open(aoi_path, 'rb') as f:
+        aoi_hash = hashlib.sha256(f.read()).hexdigest()
+
+    months = planMonths(start_date, end_date)
+    keys = {m: diskcache.content_key('psPlan', aoi_hash, m, s, e, params) for m, s, e in months}
+    plans = {}
+    if store is not None:
+        for month, key in keys.items():
+            hit = store.get(key)
+            if hit is not None:
+                plans[month] = hit
+
+    todo = [(m, s, e) for m, s, e in months if m not in plans]
+    if todo:
+        # Planning is mostly STAC search latency, so workers are not capped at the CPU count
+        with ProcessPoolExecutor(max_workers=min(len(todo), max_workers)) as pool:
+            futures = {m: pool.submit(_planMonth, aoi_path, s, e, params) for m, s, e in todo}
+            today = date.today().isoformat()
+            for month, start, end in todo:
+                plans[month] = futures[month].result()
+                if store is not None and plans[month] is not None:
+                    # A month whose (clipped) end is in the past will not gain new scenes
+                    store.set(keys[month], plans[month], ttl=None if end < today else store.ttl)
+    return {m: plans[m] for m, _, _ in months if plans.get(m) is not None}
+
+def _isoDate(value):
+    # YYYY-MM-DD of a date argument, with a server call only when it isn't a plain string/millis
+    millis = _localMillis(value)
+    if millis is None:
+        return ee.Date(value).format('YYYY-MM-dd').getInfo()
+    return datetime.fromtimestamp(millis / 1000, tz=timezone.utc).strftime('%Y-%m-%d')
+
+def periodBounds(date_start, date_end, step):
+    '''Period boundaries worked out on the client.
+
+    Mirrors the ee.Date.advance loop (month ends are clamped the same way Joda does).
+    ISO date strings and millis are read locally; other inputs (e.g. ee.Date) cost
+    a single getInfo for the two dates.
+
+    Returns:
+        list of (key, start_millis, end_millis) tuples
+    '''
+    start_ms, end_ms = _localMillis(date_start), _localMillis(date_end)
+    if start_ms is None or end_ms is None:
+        start_ms, end_ms = ee.List([
+            ee.Date(date_start).millis(), ee.Date(date_end).millis()
+        ]).getInfo()
+    start = datetime.fromtimestamp(start_ms / 1000, tz=timezone.utc)
+    end = datetime.fromtimestamp(end_ms / 1000, tz=timezone.utc)
+
+    periods = []
+    while start < end:
+        if step == 'A':
+            agg_end = _advanceMonths(start, 12)
+        elif step == 'M':
+            agg_end = _advanceMonths(start, 1)
+        else:
+            agg_end = end
+        periods.append((start.strftime('%Y_%m'), _toMillis(start), _toMillis(agg_end)))
+        start = agg_end
+    return periods
+
+def _localMillis(value):
+    # ISO date strings and millis need no server call; ee.Date and anything else do
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return int(value)
+    if isinstance(value, str):
+        try:
+            dt = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return _toMillis(dt)
+    return None
+
+def _advanceMonths(dt, months):
+    month_index = dt.month - 1 + months
+    year, month = dt.year + month_index // 12, month_index % 12 + 1
+    day = min(dt.day, calendar.monthrange(year, month)[1])
+    return dt.replace(year=year, month=month, day=day)
+
+def _toMillis(dt):
+    return int(round(dt.timestamp() * 1000))
+
+CLOUD_MAX = 20 # default scene-level cloud cover threshold (%); can be relaxed when pixels are masked well
+
+def cloudProperty(satellite):
+    return 'CLOUD_COVER' if satellite.startswith('L') else 'CLOUDY_PIXEL_PERCENTAGE'
+
+def filterPeriod(satellite, collection, date_start, agg_end, aoi_fc, cloud_max=None, cloud_prob=False):
+    '''Date, bounds and scene cloud filter.
+
+    Parameters:
+        cloud_max: scene-level cloud cover threshold (default CLOUD_MAX)
+        cloud_prob: S2 only; join S2_CLOUD_PROBABILITY to each image as 'cloud_prob'
+            (for cloudmask.sr/toa with cloud_prob_max)
+    '''
+    filtered = collection.filterDate(date_start, agg_end).filterBounds(aoi_fc)
+    filtered = filtered.filterMetadata(cloudProperty(satellite), 'less_than',
+                                       CLOUD_MAX if cloud_max is None else cloud_max)
+    if cloud_prob and satellite == 'S2':
+        probabilities = getCollection('S2', 'CLOUD_PROB').filterDate(date_start, agg_end).filterBounds(aoi_fc)
+        filtered = cloudmask.joinCloudProbability(filtered, probabilities)
+    return filtered
+
+def cloudInfoKey(satellite, product, period_start, period_end, aoi_fc, cloud_max=None, cloud_prob=False):
+    # Everything that determines the filtered collection; serialize() is local, not a round-trip
+    return diskcache.content_key(
+        'cloudInfo', COLLECTION_IDS[satellite][product], period_start, period_end,
+        aoi_fc.serialize(), cloudProperty(satellite), 'less_than',
+        CLOUD_MAX if cloud_max is None else cloud_max, bool(cloud_prob and satellite == 'S2'),
+    )
+
+def cachedCloudInfo(satellite, collections, bounds, aoi_fc, cache, chunk_size=48,
+                    cloud_max=None, cloud_prob=False):
+    '''getCloudInfoBatch that only fetches periods missing from the disk cache.
+
+    Periods that ended before now are stored without expiry; the current period
+    uses the cache's TTL so newly acquired scenes are picked up.
+
+    Parameters:
+        collections: dict of period key -> filtered SR collection
+        bounds: dict of period key -> (start_millis, end_millis)
+    '''
+    keys = {key: cloudInfoKey(satellite, 'SR', *bounds[key], aoi_fc, cloud_max, cloud_prob)
+            for key in collections}
+    cloudDict, misses = {}, {}
+    for key, ck in keys.items():
+        hit = cache.get(ck)
+        if hit is None:
+            misses[key] = collections[key]
+        else:
+            cloudDict[key] = hit
+    if misses:
+        fetched = getCloudInfoBatch(misses, chunk_size=chunk_size)
+        now_ms = time.time() * 1000
+        for key, info in fetched.items():
+            cache.set(keys[key], info, ttl=None if bounds[key][1] <= now_ms else cache.ttl)
+        cloudDict.update(fetched)
+    return {key: cloudDict[key] for key in collections}
+
+def planScenes(satellite, date_start, date_end, step, aoi_fc, params=None, cloud_max=None, cloud_prob=False):
+    '''Coverage-driven scene selection: per period, the fewest scenes that give the
+    AOI grid the required clear observations (coverage.SCENE_PLAN_PARAMS).
+
+    Footprints of every candidate scene are fetched once in paged calls; selection is local.
+    '''
+    from . import batch  # batch builds on this module
+    aois = batch.load_aois(aoi_fc)
+    geometry = batch.shapely.union_all([g for _, g in aois])
+    index = batch.SceneIndex(satellite, date_start, date_end, step, batch.search_region([geometry]),
+                             cloud_max=cloud_max, cloud_prob=cloud_prob)
+    return index.select(geometry, params)
 
-def retrieveImagery(satellite, date_start, date_end, step, aoi_fc, aoi_path):
+def printCloudInfo(key, cloudInfo):
+    print(f"\n--- Images within {key} ---")
+    print(f"Number of cloud-free images: {cloudInfo['num_images']}")
+    if 'coverage' in cloudInfo:
+        print(f"Selected from {cloudInfo['available']} scenes; AOI coverage {cloudInfo['coverage']:.0%}")
+    if cloudInfo['num_images'] > 0:
+        print("Images and their cloud coverage:")
+        for img in cloudInfo['images']:
+            sensor = f" [{img['sensor']}]" if 'sensor' in img else ''
+            print(f"  {img['date']}: {img['cloud_cover']}%{sensor}")
+    else:
+        print("No cloud-free images available.")
+
+def retrieveImagery(satellite, date_start, date_end, step, aoi_fc, aoi_path,
+                    batched=True, chunk_size=48, cache=True, verbose=True,
+                    cloud_max=None, cloud_prob=False, results_store=None, coverage=None):
     cloudDict, TOADict, SRDict = {}, {}, {}
+    start_arg, end_arg = date_start, date_end
     date_start = ee.Date(date_start)
     date_end   = ee.Date(date_end)
 
-    if satellite.startswith("L") or satellite == "S2":
-        SRcollection = COLLECTION[satellite]['SR']
-        TOACollection = COLLECTION[satellite]['TOA']
+    if (satellite.startswith("L") or satellite == "S2") and coverage:
+        # Keep only the fewest scenes per period that cover the AOI grid (see coverage.py)
+        cloudDict, TOADict, SRDict = planScenes(satellite, start_arg, end_arg, step, aoi_fc,
+                                                coverage if isinstance(coverage, dict) else None,
+                                                cloud_max, cloud_prob)
+        if verbose:
+            for key in SRDict:
+                printCloudInfo(key, cloudDict[key])
+
+    elif (satellite.startswith("L") or satellite == "S2") and batched:
+        # Periods are computed locally and all cloud summaries fetched in chunked calls
+        SRcollection = getCollection(satellite, 'SR')
+        TOACollection = getCollection(satellite, 'TOA')
+        bounds = {}
+        for key, period_start, period_end in periodBounds(start_arg, end_arg, step):
+            SRDict[key] = filterPeriod(satellite, SRcollection, period_start, period_end, aoi_fc,
+                                       cloud_max, cloud_prob)
+            TOADict[key] = filterPeriod(satellite, TOACollection, period_start, period_end, aoi_fc,
+                                        cloud_max, cloud_prob)
+            bounds[key] = (period_start, period_end)
+
+        store = diskcache.resolve(cache)
+        if store is None:
+            cloudDict = getCloudInfoBatch(SRDict, chunk_size=chunk_size)
+        else:
+            cloudDict = cachedCloudInfo(satellite, SRDict, bounds, aoi_fc, store, chunk_size=chunk_size,
+                                        cloud_max=cloud_max, cloud_prob=cloud_prob)
+        if verbose:
+            for key in SRDict:
+                printCloudInfo(key, cloudDict[key])
+
+    elif satellite.startswith("L") or satellite == "S2":
+        SRcollection = getCollection(satellite, 'SR')
+        TOACollection = getCollection(satellite, 'TOA')
         while date_start.difference(date_end, 'day').getInfo() < 0:
             if step == 'A':
                 agg_end = date_start.advance(1, 'year')
@@ -117,15 +400,10 @@ def retrieveImagery(satellite, date_start, date_end, step, aoi_fc, aoi_path):
             else:
                 agg_end = date_end 
         
-            agg_end_iso = agg_end.format("YYYY-MM-dd'T'HH:mm:ss.SSS'Z'").getInfo()
-            SRfiltered = SRcollection.filterDate(date_start, agg_end).filterBounds(aoi_fc)
-            TOAfiltered = TOACollection.filterDate(date_start, agg_end).filterBounds(aoi_fc)
-            if satellite.startswith('L'):
-                TOAfiltered = TOAfiltered.filterMetadata('CLOUD_COVER', 'less_than', 20)
-                SRfiltered  = SRfiltered.filterMetadata('CLOUD_COVER', 'less_than', 20)
-            else:  # S2
-                TOAfiltered = TOAfiltered.filterMetadata('CLOUDY_PIXEL_PERCENTAGE', 'less_than', 20)
-                SRfiltered  = SRfiltered.filterMetadata('CLOUDY_PIXEL_PERCENTAGE', 'less_than', 20)
+            SRfiltered = filterPeriod(satellite, SRcollection, date_start, agg_end, aoi_fc,
+                                      cloud_max, cloud_prob)
+            TOAfiltered = filterPeriod(satellite, TOACollection, date_start, agg_end, aoi_fc,
+                                       cloud_max, cloud_prob)
         
             cloudInfo = getCloudInfo(SRfiltered)
             key = date_start.format('YYYY_MM').getInfo()
@@ -133,41 +411,156 @@ def retrieveImagery(satellite, date_start, date_end, step, aoi_fc, aoi_path):
             SRDict[key] = SRfiltered
             TOADict[key] = TOAfiltered
     
-            print(f"\n--- Images within {key} ---")
-            print(f"Number of cloud-free images: {cloudInfo['num_images']}")
-            if cloudInfo['num_images'] > 0:
-                print("Images and their cloud coverage:")
-                for img in cloudInfo['images']:
-                    print(f"  {img['date']}: {img['cloud_cover']}%")
-            else:
-                print("No cloud-free images available.")
+            if verbose:
+                printCloudInfo(key, cloudInfo)
     
             date_start = agg_end
-            stepCnt += 1
     else:
         if step == 'M':
-            start_str = date_start.format("YYYY-MM-dd").getInfo()
-            end_str   = date_end.format("YYYY-MM-dd").getInfo()
-            
-            SRmonthly_plan = planner_cli.plan_monthly_composites(
-                aoi_path=aoi_path,
-                start_date=start_str,
-                end_date=end_str,
-                item_type="PSScene",
-                instrument_types=("PS2.SD",),  # or ("PS2",) / ("PSB.SD",)
-                cloud_max=0.15,
-                sun_elevation_min=35,
-                coverage_target=0.98,
-                min_clear_fraction=0.8,
-                min_clear_obs=3,
-                tile_size_m=1000
-            )
-
-            SRDict = SRmonthly_plan
+            start_str = _isoDate(start_arg)
+            end_str   = _isoDate(end_arg)
+
+            # Planned month by month in worker processes; unchanged months come from the cache.
+            # Items are held column-wise; SRDict[month] still returns the plan dict
+            SRDict = ItemStore(planPlanetScope(aoi_path, start_str, end_str, cache=cache))
 
             
 
                  
 
-            
-    return cloudDict, TOADict, SRDict
\ No newline at end of file
+    if results_store is not None and cloudDict:
+        # Scene metadata is appended to the Parquet store (see modules/store.py)
+        results_store.add_cloud_info(cloudDict, satellite)
+    return cloudDict, TOADict, SRDict
+
+
+def harmonize(img, satellite, bands, mask=True):
+    '''Cloud-masked reflectance under common band names, tagged with its SENSOR.'''
+    if mask:
+        img = cloudmask.sr(img, satellite)
+    return indices.scaled(img, satellite, bands) \
+        .copyProperties(img, ['system:time_start', 'system:index', cloudProperty(satellite)]) \
+        .set('SENSOR', satellite)
+
+def commonBands(satellites):
+    # Common names every requested sensor maps, in TCAP_BANDS order
+    return [b for b in indices.TCAP_BANDS
+            if all(b in indices.SENSORS[sat]['bands'] for sat in satellites)]
+
+def retrieveMultiSensor(satellites, date_start, date_end, step, aoi_fc, max_workers=None,
+                        harmonized=True, chunk_size=48, cache=True, verbose=False, results_store=None):
+    '''retrieveImagery for several Landsat/S2 sensors at once, merged per period.
+
+    Each sensor runs in its own thread (the time is spent waiting on Earth Engine),
+    so the total is close to the slowest sensor rather than the sum.
+
+    Parameters:
+        satellites: e.g. ('L5', 'L7', 'L8', 'L9', 'S2')
+        max_workers: threads (default: one per sensor)
+        harmonized: merge SR scenes as reflectance under commonBands() names
+        verbose: print each merged period's scenes
+        results_store: optional ResultsStore receiving every sensor's scenes
+
+    Returns:
+        cloudDict: period -> {'num_images', 'images' (each with its 'sensor'), 'sensors': {sat: count}}
+        TOADict: period -> {sat: filtered TOA collection}
+        SRDict: period -> merged SR collection (harmonized) or {sat: collection}
+    '''
+    satellites = [str(s).upper() for s in satellites]
+    unsupported = [s for s in satellites if not (s.startswith('L') or s == 'S2')]
+    if unsupported:
+        raise ValueError(f"retrieveMultiSensor supports Landsat and S2 only, got {unsupported}")
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(satellites)) as pool:
+        futures = {sat: pool.submit(retrieveImagery, sat, date_start, date_end, step, aoi_fc, None,
+                                    chunk_size=chunk_size, cache=cache, verbose=False,
+                                    results_store=results_store)
+                   for sat in satellites}
+        per_sensor = {sat: f.result() for sat, f in futures.items()}
+
+    bands = commonBands(satellites)
+    cloudDict, TOADict, SRDict = {}, {}, {}
+    for sat in satellites:
+        sat_cloud, sat_toa, sat_sr = per_sensor[sat]
+        for key, ic in sat_sr.items():
+            entry = cloudDict.setdefault(key, {'num_images': 0, 'images': [], 'sensors': {}})
+            info = sat_cloud[key]
+            entry['num_images'] += info['num_images']
+            entry['images'] += [dict(img, sensor=sat) for img in info['images']]
+            entry['sensors'][sat] = info['num_images']
+            TOADict.setdefault(key, {})[sat] = sat_toa[key]
+            if harmonized:
+                ic = ic.map(lambda img, sat=sat: harmonize(img, sat, bands))
+                SRDict[key] = SRDict[key].merge(ic) if key in SRDict else ic
+            else:
+                SRDict.setdefault(key, {})[sat] = ic
+
+    for key, entry in cloudDict.items():
+        entry['images'].sort(key=lambda x: x['date'])
+        if verbose:
+            printCloudInfo(key, entry)
+    return cloudDict, TOADict, SRDict
+
+
+STEP_UNITS = {'A': 'year', 'M': 'month'}
+
+def reduceComposite(ic, reducer='median', percentile=50):
+    if reducer == 'percentile':
+        # Keep the input band names so every period has the same bands
+        return ic.reduce(ee.Reducer.percentile([percentile])).regexpRename(f'_p{percentile}$', '')
+    return getattr(ic, reducer)()
+
+def compositeImagery(satellite, date_start, date_end, step, aoi_fc, reducer='median', percentile=50,
+                     names=('NDVI', 'EVI', 'SAVI'), drop_empty=True, cloud_max=None, cloud_prob_max=None):
+    '''One ImageCollection holding a masked, index-enriched composite per period.
+
+    The period sequence is built server-side with ee.List.sequence, and masking,
+    indices and the temporal reduction run inside one mapped expression, so the
+    whole series can be exported or sampled as a single request. Periods start at
+    date_start.advance(i, unit) (not chained advances), which only differs from
+    retrieveImagery's keys when starting after the 28th of a month.
+
+    Parameters:
+        reducer: 'median', 'mean' or 'percentile'
+        percentile: used when reducer == 'percentile'
+        names: indices.addIndices names to add before reducing
+        drop_empty: drop periods without any scenes
+        cloud_max: scene-level cloud cover threshold (default CLOUD_MAX)
+        cloud_prob_max: S2 only; join s2cloudless probabilities and mask pixels at or above it
+
+    Returns:
+        ee.ImageCollection, each image tagged with 'period' (YYYY_MM), 'num_images'
+        and system:time_start/end
+    '''
+    date_start = ee.Date(date_start)
+    date_end = ee.Date(date_end)
+    unit = STEP_UNITS.get(step)
+    if unit:
+        count = date_end.difference(date_start, unit).ceil()
+        offsets = ee.List.sequence(0, count.subtract(1))
+        series_end = date_start.advance(count, unit)
+    else:
+        offsets = ee.List([0])
+        series_end = date_end
+
+    # Scene-level filters run once over the whole series, not per period
+    scenes = filterPeriod(satellite, getCollection(satellite, 'SR'), date_start, series_end, aoi_fc,
+                          cloud_max, cloud_prob=cloud_prob_max is not None)
+
+    def composite(offset):
+        start = date_start.advance(offset, unit) if unit else date_start
+        end = start.advance(1, unit) if unit else date_end
+        ic = scenes.filterDate(start, end).map(
+            lambda img: indices.addIndices(cloudmask.sr(img, satellite, cloud_prob_max), satellite, names)
+        )
+        return reduceComposite(ic, reducer, percentile).set({
+            'period': start.format('YYYY_MM'),
+            'num_images': ic.size(),
+            'system:time_start': start.millis(),
+            'system:time_end': end.millis(),
+        })
+
+    composites = ee.ImageCollection.fromImages(offsets.map(composite))
+    if drop_empty:
+        composites = composites.filter(ee.Filter.gt('num_images', 0))
+    return composites
@@ -0,0 +1,99 @@
+import os
+import time
+import asyncio
+from typing import Dict, List, Optional, Tuple
+
+from . import profiler
+from ._lazy import lazy_import
+
+httpx = lazy_import('httpx')
+
+## Concurrent, cached check that PSScene items expose a downloadable SR asset,
+## run before an order is placed instead of parsing the order's failure.
+
+DATA_API_URL = "https://api.planet.com/data/v1"
+
+
+class SRPreflight:
+    '''Checks SR asset permissions for many items over one pooled HTTP client.
+
+    Parameters:
+        api_key: Planet API key (default: PL_API_KEY)
+        asset_type: asset that must carry the "download" permission
+        max_concurrency: asset requests in flight at once
+        ttl: seconds a cached answer stays valid
+        base_url: Data API root, e.g. a local fake server
+    '''
+
+    def __init__(self, api_key=None, asset_type="ortho_analytic_4b_sr", item_type="PSScene",
+                 max_concurrency=16, ttl=3600, base_url=DATA_API_URL, max_retries=3):
+        self.api_key = api_key if api_key is not None else os.environ.get("PL_API_KEY", "")
+        self.asset_type = asset_type
+        self.item_type = item_type
+        self.max_concurrency = max_concurrency
+        self.ttl = ttl
+        self.base_url = base_url.rstrip("/")
+        self.max_retries = max_retries
+        self._cache: Dict[str, Tuple[float, bool]] = {}
+
+    def cached(self, item_id: str) -> Optional[bool]:
+        hit = self._cache.get(item_id)
+        if hit is None or time.monotonic() - hit[0] > self.ttl:
+            return None
+        return hit[1]
+
+    async def _check(self, http, semaphore, item_id: str) -> Optional[bool]:
+        # True/False for a definitive answer, None when the server could not give one
+        url = f"{self.base_url}/item-types/{self.item_type}/items/{item_id}/assets/"
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with semaphore:
+                    with profiler.span('planet.http', 'data.assets') as call:
+                        r = await http.get(url)
+                        if call is not None:
+                            call['response'] = r.text
+            except httpx.TransportError:
+                return None
+            if r.status_code == 429 and attempt < self.max_retries:
+                await asyncio.sleep(float(r.headers.get("Retry-After", 2 ** attempt)))
+                continue
+            break
+        if r.status_code in (403, 404):
+            self._cache[item_id] = (time.monotonic(), False)
+            return False
+        if r.status_code != 200:
+            # 5xx or a 429 after the last retry: unknown, and not cached
+            return None
+        a = r.json().get(self.asset_type)
+        ok = bool(a and "download" in a.get("_permissions", []))
+        self._cache[item_id] = (time.monotonic(), ok)
+        return ok
+
+    async def filter(self, item_ids: List[str]) -> Tuple[List[str], List[str]]:
+        '''Split item IDs into (to order, inaccessible), preserving order.
+
+        Items whose check failed (server error, exhausted 429s, transport error) are
+        kept: the order itself is the final check, and an inaccessible item it rejects
+        is filtered and resubmitted by the caller.
+        '''
+        answers = {i: self.cached(i) for i in dict.fromkeys(item_ids)}
+        todo = [i for i, ok in answers.items() if ok is None]
+        if todo:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            limits = httpx.Limits(max_connections=self.max_concurrency,
+                                  max_keepalive_connections=self.max_concurrency)
+            async with httpx.AsyncClient(auth=(self.api_key, ""), limits=limits, timeout=30) as http:
+                answers.update(zip(todo, await asyncio.gather(*[self._check(http, semaphore, i) for i in todo])))
+        keep = [i for i in item_ids if answers[i] is not False]
+        dropped = [i for i in item_ids if answers[i] is False]
+        return keep, dropped
+
+
+_default = None
+
+def default_preflight() -> SRPreflight:
+    # Shared instance so the TTL cache survives across calls in one session
+    global _default
+    if _default is None:
+        _default = SRPreflight()
+    return _default
@@ -0,0 +1,171 @@
+import os
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import ee
+
+from . import cache as diskcache
+
+## Preview mode for interactive maps: composites are evaluated at a fixed coarse scale
+## instead of each zoom level's native resolution, and rendered tiles are kept in a
+## local LRU cache keyed by the expression graph and vis params. Re-running a map cell
+## or panning back over seen tiles is served from disk without contacting Earth Engine.
+
+WEB_MERCATOR = 'EPSG:3857'
+LEVEL0_SCALE = 156543.03392804097  # metres per pixel of a 256 px zoom-0 web mercator tile
+TILE_PATH = os.path.join(os.path.dirname(diskcache.DEFAULT_PATH), 'tiles.sqlite')
+
+
+def level_scale(level):
+    '''Nominal scale (metres per pixel) of a web mercator pyramid level.'''
+    return LEVEL0_SCALE / 2 ** level
+
+def coarsen(image, scale=None, level=None, crs=WEB_MERCATOR):
+    '''Pin evaluation to a coarse scale (metres) or pyramid level, whatever the map zoom.
+
+    Inputs are read from Earth Engine's pyramids at that scale, so a median of many
+    PlanetScope scenes costs a fraction of the full-resolution computation.
+    '''
+    if level is not None:
+        scale = level_scale(level)
+    if scale is None:
+        return image
+    return ee.Image(image).reproject(crs=crs, scale=scale)
+
+
+class EETileSource:
+    '''Renders tiles with Earth Engine. getMapId is only called on the first cache miss.'''
+
+    def __init__(self, image, vis):
+        self.image = image
+        self.vis = vis
+        self._fetcher = None
+        self._lock = threading.Lock()
+
+    def __call__(self, z, x, y) -> bytes:
+        with self._lock:
+            if self._fetcher is None:
+                self._fetcher = self.image.getMapId(self.vis)['tile_fetcher']
+        return self._fetcher.fetch_tile(x, y, z)
+
+
+_tiles = None
+
+def tile_cache() -> diskcache.DiskCache:
+    # Tiles live in their own file so they do not evict cloud summaries from the main cache
+    global _tiles
+    if _tiles is None:
+        _tiles = diskcache.DiskCache(TILE_PATH, max_bytes=1024 * 2**20, ttl=7 * 86400)
+    return _tiles
+
+
+class PreviewLayer:
+    '''A coarse-scale, tile-cached map layer.
+
+    Parameters:
+        image: ee.Image, or an ee.ImageCollection (mosaicked, as Map.addLayer does)
+        vis: visualization params passed to getMapId
+        scale / level: evaluation scale in metres, or a web mercator pyramid level
+        cache: True (shared tile cache), False/None (no caching) or a DiskCache
+        source: factory fn(image, vis) -> fn(z, x, y) -> tile bytes; replace it to
+            render tiles without Earth Engine (tests, offline benchmarks)
+    '''
+
+    def __init__(self, image, vis=None, scale=None, level=None, crs=WEB_MERCATOR, cache=True,
+                 source=EETileSource):
+        if isinstance(image, ee.ImageCollection):
+            image = image.mosaic()
+        self.image = coarsen(image, scale, level, crs)
+        self.vis = dict(vis or {})
+        # Serializing the graph is local; the key changes with any edit to the expression
+        self.key = diskcache.content_key('tiles', self.image.serialize(), self.vis)
+        self.cache = tile_cache() if cache is True else cache or None
+        self.source = source(self.image, self.vis)
+        self.hits = 0
+        self.misses = 0
+
+    def tile(self, z, x, y) -> bytes:
+        key = f'{self.key}/{z}/{x}/{y}'
+        data = self.cache.get(key) if self.cache is not None else None
+        if data is not None:
+            self.hits += 1
+            return data
+        data = self.source(z, x, y)
+        self.misses += 1
+        if self.cache is not None:
+            self.cache.set(key, data)
+        return data
+
+
+class TileServer:
+    '''Local HTTP server for PreviewLayer tiles at http://<host>:<port>/<key>/{z}/{x}/{y}.png.
+
+    The map widget's browser fetches tiles from here, so the notebook kernel must be
+    reachable at host:port (e.g. forward the port when the kernel runs remotely).
+    '''
+
+    TILE_URL = re.compile(r'^/(\w+)/(\d+)/(\d+)/(\d+)\.png$')
+
+    def __init__(self, host='127.0.0.1', port=0):
+        self.layers = {}
+        layers = self.layers
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                match = TileServer.TILE_URL.match(self.path)
+                layer = layers.get(match.group(1)) if match else None
+                if layer is None:
+                    self.send_error(404)
+                    return
+                try:
+                    data = layer.tile(*(int(v) for v in match.groups()[1:]))
+                except Exception as e:
+                    # Not cached, so the browser's next request retries the render
+                    self.send_error(502, f'{type(e).__name__}: {e}')
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'image/png')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.host, self.port = self.httpd.server_address[:2]
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+
+    def register(self, layer) -> str:
+        '''Serve a PreviewLayer; returns its XYZ URL template.'''
+        self.layers[layer.key] = layer
+        return f'http://{self.host}:{self.port}/{layer.key}/{{z}}/{{x}}/{{y}}.png'
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+_server = None
+
+def tile_server() -> TileServer:
+    global _server
+    if _server is None:
+        _server = TileServer()
+    return _server
+
+
+def addPreviewLayer(m, image, vis=None, name='Preview', scale=None, level=None, cache=True,
+                    source=EETileSource, shown=True, opacity=1.0):
+    '''Preview replacement for m.addLayer(image, vis, name) on a geemap Map.
+
+    Example:
+        addPreviewLayer(m, ic.median().clip(aoi_fc), ndvi_vis, 'NDVI (preview)', scale=30)
+    '''
+    layer = PreviewLayer(image, vis, scale=scale, level=level, cache=cache, source=source)
+    url = tile_server().register(layer)
+    m.add_tile_layer(url=url, name=name, attribution='Google Earth Engine', shown=shown, opacity=opacity)
+    return layer
@@ -0,0 +1,200 @@
+import os
+import sys
+import json
+import time
+import atexit
+import threading
+import contextlib
+from collections import defaultdict
+
+import ee
+
+## Opt-in instrumentation of remote calls (Earth Engine getInfo/tasks, Planet HTTP).
+## Use `with profiler.profile(): ...` or set GEE_MULTITOOL_PROFILE=<output prefix>.
+
+ENV_FLAG = 'GEE_MULTITOOL_PROFILE'
+
+_SKIP = (os.path.dirname(ee.__file__), __file__, contextlib.__file__)
+
+
+class Profiler:
+    '''Collects one event per remote call: caller, latency, request and response size.'''
+
+    def __init__(self):
+        self.events = []
+        self.t0 = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def record(self, kind, name, caller, start, end, request_bytes=None, response_bytes=None, error=None):
+        with self._lock:
+            self.events.append({
+                'kind': kind, 'name': name, 'caller': caller,
+                'start': start - self.t0, 'seconds': end - start,
+                'request_bytes': request_bytes, 'response_bytes': response_bytes,
+                'error': error, 'thread': threading.get_ident(),
+            })
+
+    def summary(self):
+        '''Rows aggregated per (kind, caller), slowest total first.'''
+        groups = defaultdict(list)
+        for e in self.events:
+            groups[(e['kind'], e['caller'])].append(e)
+        rows = []
+        for (kind, caller), events in groups.items():
+            seconds = [e['seconds'] for e in events]
+            rows.append({
+                'kind': kind, 'caller': caller, 'calls': len(events),
+                'total_s': sum(seconds), 'mean_s': sum(seconds) / len(events), 'max_s': max(seconds),
+                'request_bytes': sum(e['request_bytes'] or 0 for e in events),
+                'response_bytes': sum(e['response_bytes'] or 0 for e in events),
+                'errors': sum(1 for e in events if e['error']),
+            })
+        return sorted(rows, key=lambda r: r['total_s'], reverse=True)
+
+    def format_summary(self):
+        lines = [f"{'kind':<12} {'caller':<44} {'calls':>6} {'total s':>9} {'mean s':>8} "
+                 f"{'max s':>8} {'graph B':>10} {'resp B':>10} {'err':>4}"]
+        for r in self.summary():
+            lines.append(f"{r['kind']:<12} {r['caller'][-44:]:<44} {r['calls']:>6} {r['total_s']:>9.2f} "
+                         f"{r['mean_s']:>8.3f} {r['max_s']:>8.2f} {r['request_bytes']:>10} "
+                         f"{r['response_bytes']:>10} {r['errors']:>4}")
+        return '\n'.join(lines)
+
+    def chrome_trace(self):
+        '''Events in Chrome trace format (load in chrome://tracing or Perfetto).'''
+        pid = os.getpid()
+        return {'traceEvents': [{
+            'name': e['name'], 'cat': e['kind'], 'ph': 'X', 'pid': pid, 'tid': e['thread'],
+            'ts': e['start'] * 1e6, 'dur': e['seconds'] * 1e6,
+            'args': {k: e[k] for k in ('caller', 'request_bytes', 'response_bytes', 'error')},
+        } for e in self.events], 'displayTimeUnit': 'ms'}
+
+    def write(self, prefix):
+        with open(f'{prefix}.trace.json', 'w') as f:
+            json.dump(self.chrome_trace(), f)
+        with open(f'{prefix}.summary.txt', 'w') as f:
+            f.write(self.format_summary() + '\n')
+        return f'{prefix}.trace.json', f'{prefix}.summary.txt'
+
+
+_active = None
+_originals = {}
+
+def active():
+    return _active
+
+def _caller():
+    # First frame outside ee, contextlib and this module, e.g. "modules.parse.getCloudInfoBatch:112"
+    frame = sys._getframe(1)
+    while frame is not None and frame.f_code.co_filename.startswith(_SKIP):
+        frame = frame.f_back
+    if frame is None:
+        return '?'
+    return f"{frame.f_globals.get('__name__', '?')}.{frame.f_code.co_name}:{frame.f_lineno}"
+
+def _size(value):
+    try:
+        return len(json.dumps(value, default=str))
+    except Exception:
+        return None
+
+@contextlib.contextmanager
+def span(kind, name, request_bytes=None):
+    '''Time a remote call made outside Earth Engine (e.g. Planet HTTP). No-op unless profiling.'''
+    prof = _active
+    if prof is None:
+        yield None
+        return
+    caller, error = _caller(), None
+    start = time.perf_counter()
+    result = {}
+    try:
+        yield result
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        prof.record(kind, name, caller, start, time.perf_counter(), request_bytes,
+                    _size(result['response']) if 'response' in result else None, error)
+
+def _wrap_getinfo(original):
+    def getInfo(self, *args, **kwargs):
+        if _active is None:
+            return original(self, *args, **kwargs)
+        try:
+            graph = len(self.serialize())
+        except Exception:
+            graph = None
+        with span('ee.getInfo', type(self).__name__, graph) as result:
+            value = original(self, *args, **kwargs)
+            result['response'] = value
+        return value
+    return getInfo
+
+def _wrap_task(original, name):
+    def call(*args, **kwargs):
+        if _active is None:
+            return original(*args, **kwargs)
+        with span('ee.task', name):
+            return original(*args, **kwargs)
+    return call
+
+def _install():
+    if _originals:
+        return
+    _originals['getInfo'] = ee.ComputedObject.getInfo
+    _originals['start'] = ee.batch.Task.start
+    _originals['list'] = ee.batch.Task.__dict__['list']
+    ee.ComputedObject.getInfo = _wrap_getinfo(_originals['getInfo'])
+    ee.batch.Task.start = _wrap_task(_originals['start'], 'Task.start')
+    ee.batch.Task.list = staticmethod(_wrap_task(_originals['list'].__func__, 'Task.list'))
+
+def _uninstall():
+    if not _originals:
+        return
+    ee.ComputedObject.getInfo = _originals.pop('getInfo')
+    ee.batch.Task.start = _originals.pop('start')
+    ee.batch.Task.list = _originals.pop('list')
+
+def start():
+    global _active
+    _install()
+    _active = Profiler()
+    return _active
+
+def stop():
+    global _active
+    prof, _active = _active, None
+    _uninstall()
+    return prof
+
+@contextlib.contextmanager
+def profile(output=None, show=True):
+    '''Profile every remote call in the block.
+
+    Parameters:
+        output: path prefix for <output>.trace.json and <output>.summary.txt
+        show: print the summary table when the block exits
+    '''
+    prof = start()
+    try:
+        yield prof
+    finally:
+        stop()
+        if show:
+            print(prof.format_summary())
+        if output:
+            prof.write(output)
+
+def _from_env():
+    prefix = os.environ.get(ENV_FLAG)
+    if not prefix or _active is not None:
+        return
+    prof = start()
+    def finish():
+        stop()
+        print(prof.format_summary())
+        prof.write('gee_multitool_profile' if prefix in ('1', 'true') else prefix)
+    atexit.register(finish)
+
+_from_env()
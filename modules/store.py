@@ -0,0 +1,132 @@
+import os
+import time
+import uuid
+import threading
+
+from ._lazy import lazy_import
+
+pa = lazy_import('pyarrow')
+ds = lazy_import('pyarrow.dataset')
+
+## Columnar results store: scene metadata, delivered orders and index statistics
+## appended to Parquet datasets partitioned by sensor and year, so past runs can be
+## queried with predicate pushdown instead of re-fetching them from Earth Engine.
+
+PARTITIONS = ('sensor', 'year')
+
+def _schemas():
+    common = [('run', pa.string()), ('recorded', pa.timestamp('s', tz='UTC')),
+              ('sensor', pa.string()), ('year', pa.int32()), ('period', pa.string())]
+    return {
+        'scenes': pa.schema(common + [
+            ('aoi', pa.string()), ('date', pa.string()), ('cloud_cover', pa.float64()),
+        ]),
+        'orders': pa.schema(common + [
+            ('name', pa.string()), ('order_id', pa.string()), ('state', pa.string()),
+            ('item_count', pa.int64()), ('error', pa.string()),
+        ]),
+        'stats': pa.schema(common + [
+            ('feature', pa.string()), ('index', pa.string()), ('stat', pa.string()), ('value', pa.float64()),
+        ]),
+    }
+
+def period_year(key):
+    # Period keys look like 2021_06 (retrieveImagery) or 2021-06 (PlanetScope months)
+    return int(str(key)[:4])
+
+
+class ResultsStore:
+    '''Parquet datasets under root/<table>/sensor=<sensor>/year=<year>/.
+
+    Every append writes new files (nothing is rewritten), tagged with this store's
+    run ID, so several runs or threads can write to the same root.
+
+    Parameters:
+        root: dataset directory
+        run_id: label for rows written through this instance (default: timestamp + random suffix)
+    '''
+
+    def __init__(self, root='results', run_id=None):
+        self.root = root
+        self.run_id = run_id or f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        self._schemas = _schemas()
+        self._lock = threading.Lock()
+        self._files = 0
+
+    def path(self, table):
+        return os.path.join(self.root, table)
+
+    def append(self, table, rows):
+        '''Append rows (dicts missing run/recorded/year get them filled in); returns the row count.'''
+        if not rows:
+            return 0
+        schema = self._schemas[table]
+        now = int(time.time())
+        for row in rows:
+            row.setdefault('run', self.run_id)
+            row.setdefault('recorded', now)
+            row.setdefault('year', period_year(row['period']))
+        data = pa.Table.from_pylist(rows, schema=schema)
+        with self._lock:
+            self._files += 1
+            ds.write_dataset(
+                data, self.path(table), format='parquet',
+                partitioning=self._partitioning(table),
+                basename_template=f'{self.run_id}-{self._files}-{uuid.uuid4().hex[:8]}-{{i}}.parquet',
+                existing_data_behavior='overwrite_or_ignore',
+            )
+        return len(rows)
+
+    def add_cloud_info(self, cloudDict, satellite, aoi=None):
+        '''Scene metadata from a retrieveImagery / retrieveMultiSensor cloudDict.'''
+        rows = [{'sensor': img.get('sensor', satellite), 'period': key, 'aoi': aoi,
+                 'date': img['date'], 'cloud_cover': img['cloud_cover']}
+                for key, info in cloudDict.items() for img in info['images']]
+        return self.append('scenes', rows)
+
+    def add_orders(self, results, failures=None, satellite='PS'):
+        '''Delivered-order metadata from submit_month_orders' (results, failures).'''
+        rows = []
+        for month, details in results.items():
+            # A month split into several orders reports them under 'orders'
+            for order in details.get('orders', [details]):
+                items = sum(len(p.get('item_ids', [])) for p in order.get('products', []))
+                rows.append({'sensor': satellite, 'period': month, 'name': order.get('name'),
+                             'order_id': order.get('id'), 'state': order.get('state'),
+                             'item_count': items, 'error': None})
+        for month, error in (failures or {}).items():
+            rows.append({'sensor': satellite, 'period': month, 'name': month, 'order_id': None,
+                         'state': 'failed', 'item_count': 0, 'error': f"{type(error).__name__}: {error}"})
+        return self.append('orders', rows)
+
+    def add_stats(self, frame, satellite):
+        '''Index statistics in zonal.tidy's long format (feature, period, index, stat, value).'''
+        rows = [{'sensor': satellite, 'period': str(r.period), 'feature': str(r.feature),
+                 'index': r.index, 'stat': r.stat,
+                 'value': None if r.value is None else float(r.value)}
+                for r in frame.itertuples(index=False)]
+        return self.append('stats', rows)
+
+    def _partitioning(self, table):
+        schema = self._schemas[table]
+        return ds.partitioning(pa.schema([schema.field(p) for p in PARTITIONS]), flavor='hive')
+
+    def dataset(self, table):
+        return ds.dataset(self.path(table), format='parquet', schema=self._schemas[table],
+                          partitioning=self._partitioning(table))
+
+    def query(self, table, sensors=None, years=None, filter=None, columns=None):
+        '''Rows as a DataFrame; sensor/year filters prune partitions, filter is a pyarrow expression.
+
+        Example:
+            store.query('scenes', sensors=['L8'], years=range(2015, 2020),
+                        filter=ds.field('cloud_cover') < 10, columns=['period', 'date'])
+        '''
+        if not os.path.isdir(self.path(table)):
+            return self._schemas[table].empty_table().to_pandas()
+        expr = filter
+        for name, values in (('sensor', sensors), ('year', years)):
+            if values is not None:
+                clause = ds.field(name).isin(list(values))
+                expr = clause if expr is None else expr & clause
+        return self.dataset(table).to_table(filter=expr, columns=columns).to_pandas()
@@ -0,0 +1,140 @@
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import ee
+
+from ._lazy import lazy_import
+
+pd = lazy_import('pandas')
+
+## Zonal statistics for every period and index band in one reduceRegions
+## expression, paged over large AOI FeatureCollections.
+
+SEP = '__'  # period / band separator in stacked band names
+
+STATS_SCHEMA = {  # explicit Parquet column types, so a chunk of all-null values or numeric ids still fits
+    'feature': 'string', 'period': 'string', 'index': 'string', 'stat': 'string', 'value': 'float64',
+}
+
+
+def period_image(value, composite='median'):
+    # Accept a per-period ee.Image or an ee.ImageCollection to composite
+    if isinstance(value, ee.ImageCollection):
+        return getattr(value, composite)()
+    return ee.Image(value)
+
+def stacked_names(periods, bands):
+    return [f'{key}{SEP}{b}' for key in sorted(periods) for b in bands]
+
+def stack_periods(periods, bands, composite='median'):
+    '''One multi-band image with a band per (period, index), named "<period>__<index>".
+
+    Parameters:
+        periods: dict of period key -> ee.Image or ee.ImageCollection (e.g. collection()'s output)
+        bands: index bands to keep from each period
+    '''
+    images = [
+        period_image(value, composite).select(list(bands), [f'{key}{SEP}{b}' for b in bands])
+        for key, value in sorted(periods.items())
+    ]
+    return ee.Image.cat(images)
+
+def zonal_reducer(percentiles=(10, 90), names=None):
+    '''mean/median/percentiles/count; with names (the image's band names) the outputs are
+    always "<band>_<stat>", where reduceRegions would leave a single band's unprefixed.'''
+    reducer = ee.Reducer.mean().combine(ee.Reducer.median(), sharedInputs=True)
+    if percentiles:
+        reducer = reducer.combine(ee.Reducer.percentile(list(percentiles)), sharedInputs=True)
+    reducer = reducer.combine(ee.Reducer.count(), sharedInputs=True)
+    return reducer.forEach(list(names)) if names else reducer
+
+def tidy(features, id_property=None, names=None):
+    '''Long-format rows (feature, period, index, stat, value) from reduceRegions features.
+
+    Parameters:
+        names: stacked band names the statistics were computed for; other feature
+            properties are skipped. Default: any property containing SEP.
+    '''
+    names = set(names) if names is not None else None
+    rows = []
+    for f in features:
+        props = f['properties']
+        fid = props.get(id_property) if id_property else f.get('id')
+        for name, value in props.items():
+            band_name, _, stat = name.rpartition('_')
+            if SEP not in band_name or (names is not None and band_name not in names):
+                continue
+            period, band = band_name.split(SEP, 1)
+            rows.append((fid, period, band, stat, value))
+    return pd.DataFrame(rows, columns=list(STATS_SCHEMA))
+
+
+def _write(df, out_path, state):
+    if str(out_path).endswith('.parquet'):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        schema = pa.schema([(name, pa.type_for_alias(kind)) for name, kind in STATS_SCHEMA.items()])
+        df = df.assign(feature=[None if v is None else str(v) for v in df['feature']])
+        table = pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+        if state.get('writer') is None:
+            state['writer'] = pq.ParquetWriter(out_path, schema)
+        state['writer'].write_table(table)
+    else:
+        df.to_csv(out_path, mode='a' if state.get('started') else 'w',
+                  header=not state.get('started'), index=False)
+        state['started'] = True
+
+def zonal_stats(periods, regions, bands=('NDVI', 'EVI', 'SAVI'), scale=30, percentiles=(10, 90),
+                composite='median', id_property=None, chunk_size=500, max_workers=4,
+                tile_scale=1, out_path=None, results_store=None, satellite=None):
+    '''Per-feature statistics for every period and index band.
+
+    Parameters:
+        periods: dict of period key -> ee.Image or ee.ImageCollection
+        regions: ee.FeatureCollection of AOI polygons
+        bands: index bands to summarize
+        percentiles: percentiles added to the mean/median/count reducer
+        id_property: feature property identifying each polygon (default: feature id)
+        chunk_size: features per server call; chunks are fetched concurrently
+        out_path: stream rows to this .csv or .parquet instead of returning them
+        results_store: optional ResultsStore; each finished chunk is also appended under satellite
+
+    Returns:
+        a tidy DataFrame, or out_path when streaming
+    '''
+    image = stack_periods(periods, bands, composite)
+    names = stacked_names(periods, bands)
+    reducer = zonal_reducer(percentiles, names)
+    regions = ee.FeatureCollection(regions)
+    size = regions.size().getInfo()
+
+    def fetch(offset):
+        chunk = ee.FeatureCollection(regions.toList(chunk_size, offset))
+        stats = image.reduceRegions(collection=chunk, reducer=reducer, scale=scale, tileScale=tile_scale)
+        return tidy(stats.getInfo()['features'], id_property, names)
+
+    def consume(done):
+        for future in done:
+            df = future.result()
+            if results_store is not None:
+                results_store.add_stats(df, satellite)
+            if out_path is None:
+                frames.append(df)
+            else:
+                _write(df, out_path, state)  # only finished chunks are held in memory
+
+    frames, state, pending = [], {}, set()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for offset in range(0, size, chunk_size):
+            pending.add(pool.submit(fetch, offset))
+            if len(pending) >= max_workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                consume(done)
+        consume(wait(pending)[0])
+    if state.get('writer') is not None:
+        state['writer'].close()
+
+    if out_path is not None:
+        return out_path
+    if not frames:
+        return tidy([], id_property)
+    return pd.concat(frames, ignore_index=True)
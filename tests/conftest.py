@@ -0,0 +1,14 @@
+import os
+import sys
+import importlib.util
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# The offline fakes (fake_ee, fake_planet) live with the benchmarks
+sys.path.append(os.path.join(ROOT, 'benchmarks'))
+
+if importlib.util.find_spec('ee') is None:
+    # modules.cloudmask/indices import ee at module level; the code under test never
+    # calls Earth Engine, so the offline stand-in is enough to import them.
+    import fake_ee
+    fake_ee.install(latency=0)
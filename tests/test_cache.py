@@ -0,0 +1,58 @@
+import pytest
+
+from modules import cache
+from modules.cache import DiskCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, 'time', lambda: now[0])
+    return now
+
+@pytest.fixture
+def store(tmp_path, clock):
+    c = DiskCache(str(tmp_path / 'cache.sqlite'), max_bytes=100, ttl=60)
+    yield c
+    c.close()
+
+
+def test_round_trip_json_and_bytes(store):
+    store.set('summary', {'images': [{'date': '2024-05-01', 'cloud_cover': 3.5}]})
+    store.set('tile', b'\x89PNG\x00')
+    assert store.get('summary') == {'images': [{'date': '2024-05-01', 'cloud_cover': 3.5}]}
+    assert store.get('tile') == b'\x89PNG\x00'
+    assert store.get('missing', 'default') == 'default'
+
+def test_ttl_expiry(store, clock):
+    store.set('a', 1)
+    store.set('b', 2, ttl=10)
+    clock[0] += 30
+    assert store.get('b') is None
+    assert store.get('a') == 1
+    clock[0] += 31
+    assert store.get('a') is None
+
+def test_ttl_none_never_expires(store, clock):
+    store.set('past', [1, 2], ttl=None)
+    clock[0] += 10 ** 9
+    assert store.get('past') == [1, 2]
+
+def test_size_counts_bytes(store):
+    store.set('name', 'é' * 10)  # json.dumps escapes it: 62 ASCII bytes
+    store.set('tile', bytes(20))
+    assert store.size() == len('"' + '\\u00e9' * 10 + '"') + 20
+    with_utf8 = DiskCache(':memory:')
+    with_utf8.set('raw', 'é'.encode() * 10)
+    assert with_utf8.size() == 20
+
+def test_least_recently_used_is_evicted_first(store, clock):
+    for key in 'abc':
+        store.set(key, bytes(30))
+        clock[0] += 1
+    store.get('a')  # a is now the most recently used
+    clock[0] += 1
+    store.set('d', bytes(30))  # 120 bytes > 100: b goes
+    assert store.get('b') is None
+    assert all(store.get(k) is not None for k in 'acd')
+    assert store.size() == 90
@@ -0,0 +1,82 @@
+import pytest
+
+from modules import catalog
+from modules.catalog import AssetCatalog
+
+COLLECTION = 'projects/demo/assets/planet'
+
+
+def asset(name, updated, acquired='2024-05-02T10:00:00Z'):
+    return {'type': 'IMAGE', 'id': f'{COLLECTION}/{name}', 'updateTime': updated, 'startTime': acquired,
+            'geometry': {'type': 'Polygon', 'coordinates': [[[10, 45], [11, 45], [11, 46], [10, 45]]]}}
+
+@pytest.fixture
+def listing(monkeypatch):
+    '''The collection's current assets; each listAssets call is recorded with its params.'''
+    state = {'assets': [], 'calls': []}
+
+    def list_assets(params):
+        state['calls'].append(dict(params))
+        assets = state['assets']
+        if 'filter' in params:
+            since = params['filter'].split('"')[1]
+            assets = [a for a in assets if a['updateTime'] > since]
+        start = int(params.get('pageToken', 0))
+        end = start + params['pageSize']
+        page = {'assets': assets[start:end]}
+        if end < len(assets):
+            page['nextPageToken'] = str(end)
+        return page
+
+    monkeypatch.setattr(catalog.ee.data, 'listAssets', list_assets, raising=False)
+    return state
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_700_000_000.0]
+    monkeypatch.setattr(catalog.time, 'time', lambda: now[0])
+    return now
+
+
+def test_incremental_sync_lists_only_updates(tmp_path, listing, clock):
+    listing['assets'] = [asset('a', '2024-05-03T00:00:00Z'), asset('b', '2024-05-04T00:00:00Z')]
+    cat = AssetCatalog(COLLECTION, str(tmp_path / 'c.sqlite'))
+    assert cat.sync(page_size=1) == 2
+    assert 'filter' not in listing['calls'][0] and len(listing['calls']) == 2
+
+    listing['assets'].append(asset('c', '2024-05-05T00:00:00Z'))
+    clock[0] += 60
+    assert cat.sync() == 1
+    assert listing['calls'][-1]['filter'] == 'update_time > "2024-05-04T00:00:00Z"'
+    assert cat.last_update() == '2024-05-05T00:00:00Z'
+
+def test_full_sync_removes_deleted_assets(tmp_path, listing, clock):
+    listing['assets'] = [asset(n, f'2024-05-0{i + 1}T00:00:00Z') for i, n in enumerate('abc')]
+    cat = AssetCatalog(COLLECTION, str(tmp_path / 'c.sqlite'))
+    cat.sync()
+    del listing['assets'][1]
+
+    clock[0] += 60
+    assert cat.sync() == 0  # an incremental listing cannot see the deletion
+    assert len(cat.asset_ids(0, 2 ** 62)) == 3
+
+    clock[0] += catalog.FULL_SYNC_SECONDS
+    assert cat.sync() == 1
+    assert 'filter' not in listing['calls'][-1]
+    assert cat.asset_ids(0, 2 ** 62) == [f'{COLLECTION}/a', f'{COLLECTION}/c']
+    assert cat.sync(full=False) == 0
+
+def test_failed_full_listing_keeps_rows(tmp_path, listing, clock, monkeypatch):
+    listing['assets'] = [asset('a', '2024-05-01T00:00:00Z'), asset('b', '2024-05-02T00:00:00Z')]
+    path = str(tmp_path / 'c.sqlite')
+    AssetCatalog(COLLECTION, path).sync()
+
+    def broken(params):
+        if params.get('pageToken'):
+            raise RuntimeError('listing interrupted')
+        return {'assets': listing['assets'][:1], 'nextPageToken': '1'}
+    monkeypatch.setattr(catalog.ee.data, 'listAssets', broken)
+    cat = AssetCatalog(COLLECTION, path)
+    with pytest.raises(RuntimeError):
+        cat.sync(full=True)
+    assert len(cat.asset_ids(0, 2 ** 62)) == 2
@@ -0,0 +1,79 @@
+import warnings
+
+import numpy as np
+import pytest
+
+from modules import cloudmask, compositor, indices
+
+## The windowed compositor against reductions of the whole stack held in memory.
+
+RNG = np.random.default_rng(1)
+
+
+@pytest.mark.parametrize('n_scenes, n_bands, budget', [
+    (1, 1, 256 * 2**20), (30, 4, 256 * 2**20), (365, 6, 64 * 2**20), (7, 3, 10**6 + 7),
+])
+def test_tile_side_fits_the_byte_budget(n_scenes, n_bands, budget):
+    side = compositor.tile_side(n_scenes, n_bands, budget)
+    assert side % 16 == 0
+    assert 4 * n_scenes * n_bands * side ** 2 <= budget
+    # The next multiple of 16 would not fit
+    assert 4 * n_scenes * n_bands * (side + 16) ** 2 > budget
+
+def test_tile_side_shrinks_with_scenes_but_not_below_16():
+    sides = [compositor.tile_side(n, 4, 64 * 2**20) for n in (10, 100, 1000)]
+    assert sides == sorted(sides, reverse=True) and sides[0] > sides[-1]
+    assert compositor.tile_side(10**6, 10, 1024) == 16
+
+
+def write_scene(rasterio, path, data, names, nodata=None):
+    from rasterio.transform import from_origin
+    with rasterio.open(path, 'w', driver='GTiff', width=data.shape[2], height=data.shape[1],
+                       count=len(data), dtype=str(data.dtype), nodata=nodata,
+                       crs='EPSG:32633', transform=from_origin(500000, 4000000, 10, 10)) as dst:
+        dst.write(data)
+        for i, name in enumerate(names, start=1):
+            dst.set_band_description(i, name)
+
+def test_windowed_composite_matches_in_memory_reduction(tmp_path):
+    rasterio = pytest.importorskip('rasterio')
+
+    n, rows, cols = 5, 37, 45  # several windows, ragged at the right and bottom edges
+    bands = [indices.SENSORS['S2']['bands'][b] for b in ('red', 'nir')]
+    stack = RNG.uniform(0, 5000, (n, len(bands), rows, cols)).astype(np.float32)
+    stack[RNG.random(stack.shape) < 0.1] = -9999  # nodata
+    scl = RNG.choice([4, 5, 9], (n, rows, cols)).astype(np.float32)
+    stack[:, :, :3, :3] = -9999  # never observed: stays NaN
+    udm = (RNG.random((n, rows, cols)) > 0.2).astype(np.uint8)
+
+    src, masks = [], []
+    for t in range(n):
+        src.append(tmp_path / f'scene{t}.tif')
+        write_scene(rasterio, src[-1], np.concatenate([stack[t], scl[t][None]]), bands + ['SCL'], nodata=-9999)
+        masks.append(tmp_path / f'udm{t}.tif')
+        write_scene(rasterio, masks[-1], udm[t][None], ['clear'])
+
+    reducers = ('median', 'mean', 'p90', 'count')
+    budget = 4 * n * len(bands) * 16 * 16  # 16 px tiles
+    out = tmp_path / 'composite.tif'
+    names = compositor.composite(src, out, reducers=reducers, satellite='S2', mask_paths=masks,
+                                 max_tile_bytes=budget, processes=1)
+    assert names == compositor.output_names(bands, reducers)
+
+    expected = stack.copy()
+    expected[expected == -9999] = np.nan
+    expected[np.broadcast_to((np.isin(scl, cloudmask.S2_SCL_REJECT) | (udm == 0))[:, None], expected.shape)] = np.nan
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        reference = np.concatenate([
+            np.nanmedian(expected, axis=0),
+            np.nanmean(expected, axis=0),
+            np.nanpercentile(expected, 90, axis=0),
+            (~np.isnan(expected[:, 0])).sum(axis=0)[None],
+        ])
+
+    with rasterio.open(out) as result:
+        assert list(result.descriptions) == names
+        assert result.block_shapes[0] == (16, 16)
+        np.testing.assert_allclose(result.read(), reference, rtol=1e-6)
+    assert np.isnan(reference[:-1, :3, :3]).all()
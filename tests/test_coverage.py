@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+shapely = pytest.importorskip('shapely')
+
+from modules import coverage
+
+
+def test_aoi_grid_cells_fall_inside_the_aoi():
+    aoi = shapely.box(10.0, 45.0, 10.1, 45.05)
+    cells = coverage.aoi_grid(aoi, cell_size_m=1000)
+    assert len(cells) > 20
+    assert shapely.contains(aoi, cells).all()
+
+def test_aoi_grid_is_bounded_by_max_cells():
+    cells = coverage.aoi_grid(shapely.box(0, 0, 1, 1), cell_size_m=100, max_cells=500)
+    assert 0 < len(cells) <= 500
+
+def test_aoi_grid_smaller_than_a_cell():
+    cells = coverage.aoi_grid(shapely.box(0, 0, 1e-4, 1e-4), cell_size_m=1000)
+    assert len(cells) == 1
+
+
+def test_clear_scene_covers_fully():
+    matrix = np.array([[True, True, True, True], [True, True, False, False]])
+    chosen, fraction = coverage.greedy_cover(matrix, [0, 0], coverage_target=1.0)
+    assert chosen == [0] and fraction == 1.0
+
+def test_cloudy_scenes_count_for_their_clear_fraction():
+    # Every scene covers all cells; at 20% cloud one scene gives only 0.8 expected
+    # clear observations, so two are needed for one per cell
+    matrix = np.ones((3, 5), dtype=bool)
+    chosen, fraction = coverage.greedy_cover(matrix, [20, 20, 20], coverage_target=1.0)
+    assert len(chosen) == 2 and fraction == 1.0
+
+def test_clearer_scene_wins_and_fully_cloudy_scenes_are_never_taken():
+    matrix = np.ones((3, 4), dtype=bool)
+    chosen, fraction = coverage.greedy_cover(matrix, [100, 50, 10], coverage_target=1.0, min_clear_obs=1)
+    assert chosen == [2, 1] and fraction == 1.0
+    chosen, fraction = coverage.greedy_cover(matrix[:1], [100], coverage_target=1.0)
+    assert chosen == [] and fraction == 0.0
+
+def test_coverage_target_stops_early():
+    matrix = np.eye(4, dtype=bool)
+    chosen, fraction = coverage.greedy_cover(matrix, [0, 0, 0, 0], coverage_target=0.5)
+    assert len(chosen) == 2 and fraction == 0.5
+
+def test_select_scenes_picks_the_covering_footprint():
+    aoi = shapely.box(10.0, 45.0, 10.1, 45.05)
+    footprints = [shapely.box(9.9, 44.9, 10.2, 45.1), shapely.box(10.0, 45.0, 10.05, 45.05)]
+    chosen, fraction = coverage.select_scenes(aoi, footprints, [5, 0], {'coverage_target': 0.9,
+                                                                       'min_clear_obs': 0.9})
+    assert chosen == [0] and fraction == 1.0
@@ -0,0 +1,70 @@
+import numpy as np
+
+from modules.items import ItemStore
+
+
+def item(i, **overrides):
+    props = {'instrument': 'PSB.SD', 'cloud_cover': 0.05 * (i % 4), 'clear_percent': 90 - i,
+             'sun_elevation': 40.5 + i, 'acquired': f'2024-05-{i + 1:02d}T10:{i:02d}:07.123Z',
+             'ground_control': True, 'gsd': 3.0}
+    base = {'id': f'2024050{i}_101207_24c8', 'collection': 'PSScene', 'clear_fraction': 0.9 - i / 100,
+            'properties': props}
+    base.update(overrides)
+    return base
+
+PLANS = {
+    '2024-05': {'aoi_coverage': 0.97, 'candidate_count': 6, 'items': [
+        item(0),
+        item(1, properties={'acquired': '2024-05-02T12:30:00+02:00', 'cloud_cover': 0.1}),
+        {'id': '20240503_000000_aaaa', 'properties': {'acquired': '2024-05-03T00:00:00.5Z'}},
+        item(3, collection=None, clear_fraction=None, bbox=[10.0, 45.0, 10.2, 45.1]),
+        item(4, properties=None, extra={'note': 'kept'}),
+    ]},
+    '2024-06': {'aoi_coverage': 0.0, 'candidate_count': 0, 'items': []},
+    '2024-07': {'aoi_coverage': None},
+}
+
+
+def test_round_trip_is_exact():
+    assert ItemStore(PLANS).to_plans() == PLANS
+
+def test_round_trip_of_a_subset():
+    store = ItemStore(PLANS).filter(ids=['20240501_101207_24c8', '20240503_000000_aaaa'])
+    assert store['2024-05']['items'] == [PLANS['2024-05']['items'][i] for i in (1, 2)]
+
+def test_offsets_are_converted_to_utc():
+    store = ItemStore(PLANS)
+    assert store.acquired[1] == np.datetime64('2024-05-02T10:30:00')
+    kept = store.filter(start='2024-05-02T10:00:00Z', end='2024-05-02T12:00:00+01:00')
+    assert kept.id.tolist() == ['20240501_101207_24c8']
+
+
+def footprint_plans():
+    square = [[[10.0, 45.0], [10.2, 45.0], [10.2, 45.1], [10.0, 45.1], [10.0, 45.0]]]
+    hole = [[[10.05, 45.02], [10.1, 45.02], [10.1, 45.05], [10.05, 45.02]]]
+    items = [
+        item(0, geometry={'type': 'Polygon', 'coordinates': square}),
+        item(1, geometry={'type': 'Polygon', 'coordinates': square + hole}, bbox=[10.0, 45.0, 10.2, 45.1]),
+        item(2, geometry={'type': 'MultiPolygon', 'coordinates': [square, [[[11, 46], [12, 46], [12, 47], [11, 46]]]]}),
+        item(3, geometry={'type': 'Polygon', 'coordinates': [[[c[0], c[1], 5.0] for c in square[0]]]}),
+        # Neither converts back unchanged through the columns, so both are kept as given
+        item(4, geometry={'type': 'Polygon', 'coordinates': [square[0][:-1]]}, bbox=[0, 0, 1, 1, 2, 2]),
+        item(5, geometry={'type': 'Point', 'coordinates': [10.1, 45.05], 'bbox': [10.1, 45.05, 10.1, 45.05]}),
+    ]
+    return {'2024-05': {'items': items}}
+
+def test_footprints_are_columnar_and_round_trip():
+    plans = footprint_plans()
+    store = ItemStore(plans)
+    assert store.to_plans() == plans
+    assert [g is not None for g in store.footprint] == [True, True, True, True, False, False]
+    assert store.has_bbox.tolist() == [False, True, False, False, False, False]
+    assert store._extra[0] is None and set(store._extra[4]) == {'geometry', 'bbox'}
+    np.testing.assert_allclose(store.bounds[2], [10.0, 45.0, 12.0, 47.0])
+
+def test_intersecting_uses_footprint_bounds():
+    from shapely.geometry import box
+    store = ItemStore(footprint_plans())
+    ids = store.intersecting(box(11.5, 46.5, 11.6, 46.6)).id.tolist()
+    # item 2's second polygon; items 4 and 5 have no columnar footprint and always match
+    assert ids == ['20240502_101207_24c8', '20240504_101207_24c8', '20240505_101207_24c8']
@@ -0,0 +1,102 @@
+import asyncio
+import hashlib
+import json
+import os
+
+import pytest
+
+from modules import cache
+from modules.ledger import IN_FLIGHT, LEDGER_PATH, OrderLedger, order_key
+
+planet = pytest.importorskip('planet')
+fake_planet = pytest.importorskip('fake_planet')
+
+from modules import main  # noqa: E402
+
+BUNDLE = 'analytic_sr_udm2'
+
+
+def test_order_key_is_stable():
+    # Keys are persisted: changing their derivation would orphan every existing ledger
+    expected = hashlib.sha256(json.dumps(['2024-05', ['a', 'b'], BUNDLE]).encode()).hexdigest()
+    assert order_key('2024-05', ['b', 'a', 'b'], BUNDLE) == expected
+    assert order_key('2024-05', ['a', 'b'], 'analytic_udm2') != expected
+    assert order_key('2024-06', ['a', 'b'], BUNDLE) != expected
+    assert order_key('2024-05', ['a'], BUNDLE) != expected
+
+
+def test_default_path_is_in_the_user_cache(tmp_path):
+    assert LEDGER_PATH.startswith(os.path.dirname(cache.DEFAULT_PATH))
+    path = tmp_path / 'new' / 'orders.sqlite'
+    OrderLedger(str(path)).close()
+    assert path.exists()
+
+
+def test_state_transitions(tmp_path):
+    ledger = OrderLedger(str(tmp_path / 'orders.sqlite'))
+    track = ledger.tracker('2024-05', ['b', 'a'], BUNDLE)
+    track('order-1', 'queued')
+    assert ledger.lookup('2024-05', ['a', 'b'], BUNDLE)['state'] == 'queued'
+    track('order-1', 'running')
+    track('order-1', 'success', {'id': 'order-1', 'state': 'success'})
+    track('order-1', 'success')  # a later callback without details keeps them
+    entry = ledger.get('order-1')
+    assert (entry['state'], entry['details'], entry['item_ids']) == ('success', {'id': 'order-1', 'state': 'success'},
+                                                                     ['a', 'b'])
+    ledger.update('order-1', 'failed')
+    assert [e['order_id'] for e in ledger.orders(IN_FLIGHT)] == []
+    assert [e['order_id'] for e in ledger.orders(['failed'])] == ['order-1']
+    ledger.close()
+
+
+@pytest.fixture
+def server():
+    fake_planet.offline_specs(BUNDLE)
+    with fake_planet.FakePlanetServer(latency=0, inaccessible_rate=0, fulfil_seconds=0.1) as server:
+        yield server
+
+def submit(server, orders, ledger, chunk_size=main.ORDER_CHUNK_SIZE):
+    delivery = planet.order_request.delivery(
+        cloud_config=planet.order_request.google_earth_engine(project='test', collection='test'))
+    return asyncio.run(main.submit_month_orders(
+        orders, BUNDLE, delivery, ledger=ledger, chunk_size=chunk_size, poller_factory=False,
+        client_factory=fake_planet.orders_client_factory(server.orders_url, poll_interval=0.02)))
+
+
+def test_replay_after_crash_resumes_instead_of_reordering(server, tmp_path):
+    path = str(tmp_path / 'orders.sqlite')
+    items = ['20240501_a', '20240502_b']
+    # A run that placed the order and then died before it was delivered
+    client = fake_planet.FakeOrdersClient(server.orders_url)
+    placed = asyncio.run(client.create_order({'name': '2024-05', 'products': []}))
+    crashed = OrderLedger(path)
+    crashed.record('2024-05', items, BUNDLE, placed['id'], 'queued')
+    crashed.close()
+
+    ledger = OrderLedger(path)
+    results, failures = submit(server, {'2024-05': items}, ledger)
+    assert not failures and results['2024-05']['id'] == placed['id']
+    assert server.requests.get('orders.create') == 1  # only the crashed run's
+    assert ledger.get(placed['id'])['state'] == 'success'
+
+    # A further rerun skips the delivered month without any request
+    before = dict(server.requests)
+    results, _ = submit(server, {'2024-05': items}, ledger)
+    assert results['2024-05']['id'] == placed['id'] and server.requests == before
+    ledger.close()
+
+
+def test_only_missing_chunks_are_placed_again(server, tmp_path):
+    ledger = OrderLedger(str(tmp_path / 'orders.sqlite'))
+    items = [f'202405{i:02d}_x' for i in range(1, 5)]
+    delivered = {'id': 'order-earlier', 'name': '2024-05-1of2', 'state': 'success'}
+    ledger.record('2024-05-1of2', items[:2], BUNDLE, 'order-earlier', 'success', delivered)
+
+    results, failures = submit(server, {'2024-05': items}, ledger, chunk_size=2)
+    assert not failures
+    assert server.requests.get('orders.create') == 1
+    month = results['2024-05']
+    assert month['state'] == 'success'
+    assert [d['name'] for d in month['orders']] == ['2024-05-1of2', '2024-05-2of2']
+    assert ledger.lookup('2024-05-2of2', items[2:], BUNDLE)['state'] == 'success'
+    ledger.close()
@@ -0,0 +1,149 @@
+import numpy as np
+import pytest
+
+from modules import cloudmask, indices, local
+
+## The local engine against the reference formulas, computed pixel by pixel in float64.
+
+RNG = np.random.default_rng(0)
+
+
+def reflectance(shape=(8, 9)):
+    return {b: RNG.uniform(0.0, 0.6, shape).astype(np.float32) for b in indices.TCAP_BANDS}
+
+def ref_ndvi(red, nir):
+    return (nir - red) / (nir + red)
+
+def ref_evi(red, nir, blue):
+    return 2.5 * (nir - red) / (nir + 6 * red - 7.5 * blue + 1)
+
+def ref_savi(red, nir):
+    return (1 + 0.5) * (nir - red) / (nir + red + 0.5)
+
+def ref_tcap(b, coefficients):
+    return np.array([sum(c * b[name].astype(np.float64) for c, name in zip(row, indices.TCAP_BANDS))
+                     for row in coefficients])
+
+def ref_bits_clear(value, bits):
+    return all(not (int(value) >> bit) & 1 for bit in bits)
+
+
+def test_ratio_indices_match_reference():
+    b = reflectance()
+    red, nir, blue = (b[n].astype(np.float64) for n in ('red', 'nir', 'blue'))
+    np.testing.assert_allclose(local.ndvi(b['red'], b['nir']), ref_ndvi(red, nir), rtol=1e-5)
+    np.testing.assert_allclose(local.evi(b['red'], b['nir'], b['blue']), ref_evi(red, nir, blue), rtol=1e-4)
+    np.testing.assert_allclose(local.savi(b['red'], b['nir']), ref_savi(red, nir), rtol=1e-5)
+
+def test_zero_denominator_is_nan():
+    zero = np.zeros((2, 2), dtype=np.float32)
+    assert np.isnan(local.ndvi(zero, zero)).all()
+
+@pytest.mark.parametrize('satellite', ['L5', 'L8', 'S2'])
+def test_tcap_matches_coefficients(satellite):
+    b = reflectance()
+    refl = np.stack([b[n] for n in indices.TCAP_BANDS])
+    expected = ref_tcap(b, indices.SENSORS[satellite]['tcap'])
+    np.testing.assert_allclose(local.tcap(refl, satellite), expected, rtol=1e-5, atol=1e-6)
+
+
+@pytest.mark.parametrize('satellite, product, bits', [
+    ('L8', 'SR', (3, 4)),
+    ('L5', 'TOA', (3, 4)),
+    ('S2', 'TOA', (10, 11)),
+])
+def test_bit_masks(satellite, product, bits):
+    qa = np.arange(2 ** 12, dtype=np.uint16).reshape(64, 64)
+    expected = np.vectorize(lambda v: ref_bits_clear(v, bits))(qa)
+    mask = local.sr_mask(qa, satellite) if product == 'SR' else local.toa_mask(qa, satellite)
+    np.testing.assert_array_equal(mask, expected)
+
+def test_scl_classes():
+    scl = np.arange(12, dtype=np.uint8)
+    keep = {2, 4, 5, 6, 7}  # dark area, vegetation, bare soil, water, unclassified
+    np.testing.assert_array_equal(local.sr_mask(scl, 'S2'), [c in keep for c in range(12)])
+
+
+def test_compute_scales_and_masks():
+    shape = (6, 5)
+    sensor = indices.SENSORS['L8']
+    dn = {sensor['bands'][b]: RNG.integers(8000, 30000, shape).astype(np.uint16) for b in indices.TCAP_BANDS}
+    qa = np.zeros(shape, dtype=np.uint16)
+    qa[0, 0] = 1 << 3   # cloud
+    qa[1, 1] = 1 << 4   # cloud shadow
+    qa[2, 2] = 1 << 5   # snow: kept
+    dn['QA_PIXEL'] = qa
+
+    names, out = local.compute(dn, 'L8')
+    assert names == ['NDVI', 'EVI', 'SAVI'] + indices.TCAP_NAMES
+
+    refl = {b: dn[sensor['bands'][b]] * sensor['scale'] + sensor['offset'] for b in indices.TCAP_BANDS}
+    expected = np.concatenate([
+        [ref_ndvi(refl['red'], refl['nir'])],
+        [ref_evi(refl['red'], refl['nir'], refl['blue'])],
+        [ref_savi(refl['red'], refl['nir'])],
+        ref_tcap(refl, sensor['tcap']),
+    ])
+    masked = np.zeros(shape, dtype=bool)
+    masked[0, 0] = masked[1, 1] = True
+    expected[:, masked] = np.nan
+    assert np.isnan(out[:, masked]).all()
+    np.testing.assert_allclose(out, expected, rtol=1e-4, atol=1e-5)
+
+
+def test_process_windowed_round_trip(tmp_path):
+    rasterio = pytest.importorskip('rasterio')
+    from rasterio.transform import from_origin
+
+    rows, cols = 37, 45  # not a multiple of the block size, so edge windows are exercised
+    sensor = indices.SENSORS['S2']
+    band_names = [sensor['bands'][b] for b in indices.TCAP_BANDS] + ['SCL']
+    data = RNG.integers(100, 6000, (len(band_names), rows, cols)).astype(np.uint16)
+    data[-1] = RNG.choice([3, 4, 5, 8, 9], (rows, cols))
+
+    src = tmp_path / 'src.tif'
+    profile = dict(driver='GTiff', width=cols, height=rows, count=len(band_names), dtype='uint16',
+                   crs='EPSG:32633', transform=from_origin(500000, 4000000, 10, 10))
+    with rasterio.open(src, 'w', **profile) as dst:
+        dst.write(data)
+        for i, name in enumerate(band_names, start=1):
+            dst.set_band_description(i, name)
+
+    dst = tmp_path / 'out.tif'
+    outputs = local.process(src, dst, 'S2', block_size=16)
+    names, expected = local.compute(dict(zip(band_names, data)), 'S2')
+    assert outputs == names
+
+    with rasterio.open(dst) as result:
+        assert list(result.descriptions) == names
+        assert (result.height, result.width) == (rows, cols)
+        np.testing.assert_array_equal(result.read(), expected)
+    assert np.isnan(expected[:, np.isin(data[-1], cloudmask.S2_SCL_REJECT)]).all()
+
+def test_float_qa_is_cast_and_nan_is_masked():
+    scl = np.array([[4.0, 9.0], [np.nan, 5.0]], dtype=np.float32)
+    np.testing.assert_array_equal(local.sr_mask(scl, 'S2'), [[True, False], [False, True]])
+    qa = np.array([0.0, float(1 << 3)], dtype=np.float64)
+    np.testing.assert_array_equal(local.sr_mask(qa, 'L8'), [True, False])
+
+def test_process_rounds_block_size_and_reads_float_rasters(tmp_path):
+    rasterio = pytest.importorskip('rasterio')
+    from rasterio.transform import from_origin
+
+    rows, cols = 130, 110
+    sensor = indices.SENSORS['S2']
+    band_names = [sensor['bands'][b] for b in ('red', 'nir')] + ['SCL']
+    data = RNG.uniform(100, 6000, (3, rows, cols)).astype(np.float32)
+    data[-1] = RNG.choice([4, 9], (rows, cols))
+
+    src = tmp_path / 'float.tif'
+    with rasterio.open(src, 'w', driver='GTiff', width=cols, height=rows, count=3, dtype='float32',
+                       crs='EPSG:32633', transform=from_origin(500000, 4000000, 10, 10)) as dst:
+        dst.write(data)
+
+    out = tmp_path / 'ndvi.tif'
+    assert local.process(src, out, 'S2', names=('NDVI',), band_names=band_names, block_size=100) == ['NDVI']
+    _, expected = local.compute(dict(zip(band_names, data)), 'S2', names=('NDVI',))
+    with rasterio.open(out) as result:
+        assert result.block_shapes[0] == (96, 96)
+        np.testing.assert_array_equal(result.read(), expected)
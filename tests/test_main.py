@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+from modules import main
+
+
+class StubPreflight:
+    async def filter(self, item_ids):
+        return [i for i in item_ids if not i.endswith('x')], [i for i in item_ids if i.endswith('x')]
+
+
+@pytest.fixture
+def preflight(monkeypatch):
+    monkeypatch.setattr(main, 'default_preflight', StubPreflight)
+
+
+def test_filter_sr_ids_without_a_loop(preflight):
+    assert main.filter_sr_ids(['a', 'bx', 'c']) == ['a', 'c']
+
+def test_filter_sr_ids_inside_a_running_loop(preflight):
+    # As in a notebook cell: a blocking call while the kernel's loop is running
+    async def cell():
+        return main.filter_sr_ids(['a', 'bx']), await main.filter_sr_ids_async(['cx', 'd'])
+    assert asyncio.run(cell()) == (['a'], ['d'])
+
+
+class StubOrdersClient:
+    '''list_orders shows only the orders in `listed`; get_order answers from `orders`.'''
+
+    def __init__(self, orders, listed=()):
+        self.orders = orders
+        self.listed = list(listed)
+        self.gets = []
+
+    async def list_orders(self, last_modified=None, limit=0, **filters):
+        for order_id in self.listed:
+            yield self.orders[order_id]
+
+    async def get_order(self, order_id):
+        self.gets.append(order_id)
+        return self.orders[order_id]
+
+
+def test_poller_interval_adapts_to_quiet_time(monkeypatch):
+    async def run():
+        poller = main.OrderPoller(StubOrdersClient({}), min_interval=5, max_interval=120, age_factor=0.1)
+        assert poller.interval() == 120  # nothing pending
+        poller.watch('order-1')
+        assert poller.interval() == 5  # just placed
+        monkeypatch.setattr(main.time, 'time', lambda: poller._pending['order-1']['changed'] + 300)
+        assert poller.interval() == 30
+        monkeypatch.setattr(main.time, 'time', lambda: poller._pending['order-1']['changed'] + 10 ** 5)
+        assert poller.interval() == 120
+        await poller.close()
+    asyncio.run(run())
+
+def test_poller_routes_listed_state_changes():
+    async def run():
+        orders = {'order-1': {'id': 'order-1', 'state': 'running'}}
+        client = StubOrdersClient(orders, listed=['order-1'])
+        poller = main.OrderPoller(client, min_interval=60)
+        states = []
+        future = poller.watch('order-1', callback=states.append)
+        await poller.poll()
+        orders['order-1'] = {'id': 'order-1', 'state': 'success'}
+        await poller.poll()
+        assert future.done() and future.result()['state'] == 'success'
+        assert states == ['running', 'success'] and client.gets == []
+        assert poller.requests == 2
+        await poller.close()
+    asyncio.run(run())
+
+def test_resumed_order_resolves_on_the_first_tick():
+    # Finished while the kernel was down: the modified-since listing no longer shows it
+    async def run():
+        client = StubOrdersClient({'order-1': {'id': 'order-1', 'state': 'success'}})
+        poller = main.OrderPoller(client, min_interval=60, stale_after=600)
+        future = poller.watch('order-1')
+        await poller.poll()
+        assert future.done() and client.gets == ['order-1']
+        await poller.close()
+    asyncio.run(run())
+
+
+def test_merge_order_details():
+    one = {'id': 'o1', 'state': 'success'}
+    assert main.merge_order_details('2024-05', [one]) is one
+    two = {'id': 'o2', 'state': 'success'}
+    merged = main.merge_order_details('2024-05', [one, two])
+    assert merged == {'name': '2024-05', 'state': 'success', 'orders': [one, two], 'errors': {}}
+    partial = main.merge_order_details('2024-05', [one, dict(two, state='partial')])
+    assert partial['state'] == 'partial'
+    failed = main.merge_order_details('2024-05', [one], {'2024-05-2of2': RuntimeError('boom')})
+    assert failed['state'] == 'partial' and failed['errors'] == {'2024-05-2of2': 'RuntimeError: boom'}
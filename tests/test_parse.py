@@ -0,0 +1,34 @@
+from datetime import datetime, timezone
+
+from modules import parse
+
+
+def millis(text):
+    return int(datetime.fromisoformat(text).replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def test_monthly_periods():
+    periods = parse.periodBounds('2024-01-01', '2024-04-01', 'M')
+    assert [(k, s, e) for k, s, e in periods] == [
+        ('2024_01', millis('2024-01-01'), millis('2024-02-01')),
+        ('2024_02', millis('2024-02-01'), millis('2024-03-01')),
+        ('2024_03', millis('2024-03-01'), millis('2024-04-01')),
+    ]
+
+def test_month_ends_are_clamped_like_ee_date_advance():
+    # Jan 31 + 1 month is Feb 29 (2024), and the next period starts from there
+    periods = parse.periodBounds('2024-01-31', '2024-04-15', 'M')
+    assert [e for _, _, e in periods] == [millis('2024-02-29'), millis('2024-03-29'),
+                                           millis('2024-04-29')]
+
+def test_annual_and_single_periods():
+    annual = parse.periodBounds('2020-06-01', '2022-01-01', 'A')
+    assert [k for k, _, _ in annual] == ['2020_06', '2021_06']
+    assert annual[-1][2] == millis('2022-06-01')  # the last period runs a full step
+    whole = parse.periodBounds('2020-06-01', '2020-09-01', None)
+    assert whole == [('2020_06', millis('2020-06-01'), millis('2020-09-01'))]
+
+def test_millis_inputs_and_empty_range():
+    start = millis('2024-05-01')
+    assert parse.periodBounds(start, millis('2024-06-01'), 'M')[0][1] == start
+    assert parse.periodBounds('2024-05-01', '2024-05-01', 'M') == []
@@ -0,0 +1,24 @@
+import pandas as pd
+import pytest
+
+from modules import zonal
+
+
+def test_tidy_single_band_outputs():
+    names = zonal.stacked_names({'2020-05': None}, ['NDVI'])
+    features = [{'id': '3', 'properties': {'name': 'field__a', '2020-05__NDVI_mean': 0.4,
+                                            '2020-05__NDVI_p10': 0.1, '2020-05__NDVI_count': 12}}]
+    df = zonal.tidy(features, names=names)
+    assert df.values.tolist() == [['3', '2020-05', 'NDVI', 'mean', 0.4], ['3', '2020-05', 'NDVI', 'p10', 0.1],
+                                  ['3', '2020-05', 'NDVI', 'count', 12]]
+
+def test_parquet_schema_is_fixed(tmp_path):
+    pytest.importorskip('pyarrow')
+    out = str(tmp_path / 'stats.parquet')
+    state = {}
+    zonal._write(pd.DataFrame([['a', '2020-05', 'NDVI', 'mean', None]], columns=list(zonal.STATS_SCHEMA)), out, state)
+    zonal._write(pd.DataFrame([[7, '2020-05', 'NDVI', 'mean', 0.5]], columns=list(zonal.STATS_SCHEMA)), out, state)
+    state['writer'].close()
+    df = pd.read_parquet(out)
+    assert df['feature'].tolist() == ['a', '7']
+    assert df['value'].isna().tolist() == [True, False]